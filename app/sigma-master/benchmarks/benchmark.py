@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+# Benchmark suite: measures YAML loading, rule parsing, condition optimization and query generation of all backends
+# over the rule set, writes the results with machine metadata to JSON and compares them with a baseline.
+#
+# Run from the repository root with the Sigma tools in the Python path, e.g. make benchmark or
+#   PYTHONPATH=tools benchmarks/benchmark.py -o results.json --baseline baseline.json rules/
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import argparse
+import contextlib
+import copy
+import datetime
+import fnmatch
+import io
+import json
+import os
+import pathlib
+import platform
+import re
+import shlex
+import subprocess
+import sys
+import time
+
+import yaml
+
+import sigma.backends.discovery as backends
+from sigma.config.collection import SigmaConfigurationManager
+from sigma.configuration import SigmaConfigurationChain
+from sigma.parser.collection import SigmaCollectionParser
+from sigma.parser.condition import SigmaConditionOptimizer
+from sigma.sigma_backend_benchmark import measure
+from sigma.tools import getRulePaths
+
+RESULT_FORMAT = 1
+root = pathlib.Path(__file__).resolve().parent.parent
+
+def set_argparser():
+    argparser = argparse.ArgumentParser(description="Measure parsing and query generation over a Sigma rule set and compare the results with a baseline.")
+    argparser.add_argument("--output", "-o", help="Write results as JSON to this file")
+    argparser.add_argument("--baseline", "-b", help="Compare results with this result file. Exits with code 1 if a benchmark regressed")
+    argparser.add_argument("--threshold", "-t", type=float, default=10.0, help="Maximum slowdown in percent that isn't reported as regression (default: 10)")
+    argparser.add_argument("--threshold-for", "-T", action="append", default=[], metavar="PATTERN=PERCENT", help="Threshold for benchmarks matching the glob pattern, e.g. 'generate:*=25'. The last matching pattern applies")
+    argparser.add_argument("--min-delta", type=float, default=0.005, metavar="SECONDS", help="Slowdowns below this absolute time are never regressions (default: 0.005)")
+    argparser.add_argument("--repeat", "-n", type=int, default=3, help="Number of measurements per benchmark, the fastest is reported (default: 3)")
+    argparser.add_argument("--makefile", default=str(root / "Makefile"), help="Makefile with the sigmac invocations of the test-sigmac target that define backend configurations and options")
+    argparser.add_argument("--backend", "-B", action="append", metavar="PATTERN", help="Only measure backends matching the glob pattern. Can be given multiple times")
+    argparser.add_argument("inputs", nargs="*", default=[ str(root / "rules") ], help="Sigma rule files or directories (default: rules/)")
+    return argparser
+
+def get_makefile_targets(makefile):
+    """
+    Return dict backend identifier -> (configurations, backend options) from the sigmac invocations of the
+    test-sigmac target in the Makefile that are expected to succeed on the whole rule set. The first invocation
+    with configurations is used for each backend.
+    """
+    argparser = argparse.ArgumentParser(add_help=False)
+    argparser.add_argument("-t", dest="target")
+    argparser.add_argument("-c", dest="config", action="append", default=[])
+    argparser.add_argument("-O", dest="backend_option", action="append", default=[])
+    argparser.add_argument("-f", dest="filter")
+
+    targets = dict()
+    inside = False
+    with open(makefile) as f:
+        for line in f:
+            if re.match(r"^[\w-]+:", line):
+                inside = line.startswith("test-sigmac:")
+                continue
+            command = line.strip()
+            if not inside or command.startswith("!") or "tools/sigmac" not in command:
+                continue
+            try:
+                args = shlex.split(command.split("tools/sigmac", 1)[1])
+            except ValueError:
+                continue
+            if ">" in args:
+                args = args[:args.index(">")]
+            if not args or args[-1].rstrip("/") != "rules":
+                continue
+            cmdargs, _ = argparser.parse_known_args(args[:-1])
+            if cmdargs.target is None or cmdargs.filter is not None:
+                continue
+            if cmdargs.target not in targets or (cmdargs.config and not targets[cmdargs.target][0]):
+                targets[cmdargs.target] = (cmdargs.config, cmdargs.backend_option)
+    return targets
+
+def get_metadata(args, paths):
+    try:
+        revision = subprocess.run([ "git", "rev-parse", "HEAD" ], cwd=str(root), stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, universal_newlines=True).stdout.strip() or None
+    except OSError:
+        revision = None
+    return {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "revision": revision,
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            "cpus": os.cpu_count(),
+            "libyaml": yaml.__with_libyaml__,
+            "rules": len(paths),
+            "repeat": args.repeat,
+            }
+
+def measure_parser(contents, repeat):
+    """
+    Return dict with the fastest times of YAML loading, construction of the collection parsers and parsing of the
+    conditions of all rules and the time of the condition optimizer while parsing.
+    """
+    optimizer_time = [ 0.0 ]
+    optimizeTree = SigmaConditionOptimizer.optimizeTree
+    def timed_optimizeTree(self, tree):
+        start = time.perf_counter()
+        try:
+            return optimizeTree(self, tree)
+        finally:
+            optimizer_time[0] += time.perf_counter() - start
+
+    results = { "yaml": list(), "collection": list(), "parse": list(), "optimizer": list() }
+    rules = 0
+    errors = 0
+    SigmaConditionOptimizer.optimizeTree = timed_optimizeTree
+    try:
+        for i in range(repeat):
+            documents = list()
+            start = time.perf_counter()
+            for content in contents:
+                try:
+                    documents.append(list(yaml.safe_load_all(content)))
+                except yaml.YAMLError:
+                    pass
+            results["yaml"].append(time.perf_counter() - start)
+
+            documents = copy.deepcopy(documents)        # the parser modifies the documents
+            config = SigmaConfigurationChain()
+            collection_time = 0.0
+            parse_time = 0.0
+            optimizer_time[0] = 0.0
+            rules = 0
+            errors = 0
+            for docs in documents:
+                try:
+                    start = time.perf_counter()
+                    collection = SigmaCollectionParser(None, config, documents=docs)
+                    collection_time += time.perf_counter() - start
+                    start = time.perf_counter()
+                    for parser in collection.parsers:
+                        parser.condparsed
+                        rules += 1
+                    parse_time += time.perf_counter() - start
+                except Exception:
+                    errors += 1
+            results["collection"].append(collection_time)
+            results["parse"].append(parse_time)
+            results["optimizer"].append(optimizer_time[0])
+    finally:
+        SigmaConditionOptimizer.optimizeTree = optimizeTree
+    return { name: { "time": min(times), "rules": rules, "errors": errors } for name, times in results.items() }
+
+def measure_backends(contents, targets, repeat, patterns):
+    """Return dict generate:identifier -> result of query generation of each backend."""
+    scm = SigmaConfigurationManager([ str(root / "tools" / "config") ])
+    results = dict()
+    for identifier in sorted(backends.getRegistry()):
+        if patterns and not any(fnmatch.fnmatchcase(identifier, pattern) for pattern in patterns):
+            continue
+        configs, options = targets.get(identifier, (list(), list()))
+        backend_class = backends.getBackend(identifier)
+        if not configs and backend_class.config_required and backend_class.default_config is None:
+            print("Skipping backend %s: requires a configuration" % identifier, file=sys.stderr)
+            continue
+        configs = [ str(root / config) if os.path.exists(str(root / config)) else config for config in configs ]
+        try:
+            with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+                rules, errors, elapsed, _ = measure(identifier, configs, contents, options, repeat, scm)
+        except Exception as e:
+            print("Skipping backend %s: %s" % (identifier, str(e)), file=sys.stderr)
+            continue
+        results["generate:" + identifier] = { "time": elapsed, "rules": rules, "errors": errors }
+        print("{:<35} {:>10.1f} ms".format("generate:" + identifier, elapsed * 1000), file=sys.stderr)
+    return results
+
+def get_threshold(name, threshold, patterns):
+    for pattern, value in patterns:
+        if fnmatch.fnmatchcase(name, pattern):
+            threshold = value
+    return threshold
+
+def compare(results, baseline, threshold, patterns, min_delta):
+    """Print comparison of results with baseline and return list of regressed benchmark names."""
+    regressions = list()
+    for key in ("python", "implementation", "machine", "processor", "cpus", "libyaml", "rules"):
+        if results["metadata"].get(key) != baseline["metadata"].get(key):
+            print("Warning: %s differs from baseline (%s, baseline: %s)" % (key, results["metadata"].get(key), baseline["metadata"].get(key)))
+    print("{:<35} {:>12} {:>12} {:>9}  {}".format("Benchmark", "Baseline ms", "Current ms", "Change", "Status"))
+    for name in sorted(set(results["benchmarks"]) | set(baseline["benchmarks"])):
+        current = results["benchmarks"].get(name)
+        base = baseline["benchmarks"].get(name)
+        if current is None or base is None:
+            print("{:<35} {:>12} {:>12} {:>9}  {}".format(name, "%.1f" % (base["time"] * 1000) if base else "-", "%.1f" % (current["time"] * 1000) if current else "-", "-", "new" if base is None else "missing"))
+            continue
+        delta = current["time"] - base["time"]
+        change = delta / base["time"] * 100 if base["time"] else 0.0
+        limit = get_threshold(name, threshold, patterns)
+        if change > limit and delta >= min_delta:
+            status = "REGRESSION (> %g%%)" % limit
+            regressions.append(name)
+        elif change < -limit and -delta >= min_delta:
+            status = "faster"
+        else:
+            status = "ok"
+        print("{:<35} {:>12.1f} {:>12.1f} {:>+8.1f}%  {}".format(name, base["time"] * 1000, current["time"] * 1000, change, status))
+    return regressions
+
+def main():
+    argparser = set_argparser()
+    args = argparser.parse_args()
+
+    patterns = list()
+    for spec in args.threshold_for:
+        pattern, sep, value = spec.rpartition("=")
+        try:
+            patterns.append((pattern, float(value)))
+        except ValueError:
+            argparser.error("Invalid threshold '%s', expected PATTERN=PERCENT" % spec)
+        if not sep:
+            argparser.error("Invalid threshold '%s', expected PATTERN=PERCENT" % spec)
+
+    baseline = None
+    if args.baseline:
+        try:
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        except FileNotFoundError:
+            print("Baseline %s doesn't exist, results are not compared. Create it with make benchmark-baseline." % args.baseline, file=sys.stderr)
+        else:
+            if baseline.get("format") != RESULT_FORMAT:
+                argparser.error("Baseline %s has an unsupported format" % args.baseline)
+
+    paths = list(getRulePaths(args.inputs, True))
+    contents = list()
+    for path in paths:
+        with path.open(encoding="utf-8") as f:
+            contents.append(f.read())
+
+    results = {
+            "format": RESULT_FORMAT,
+            "metadata": get_metadata(args, paths),
+            "benchmarks": dict(),
+            }
+    results["benchmarks"].update(measure_parser(contents, args.repeat))
+    for name in ("yaml", "collection", "parse", "optimizer"):
+        print("{:<35} {:>10.1f} ms".format(name, results["benchmarks"][name]["time"] * 1000), file=sys.stderr)
+    results["benchmarks"].update(measure_backends(contents, get_makefile_targets(args.makefile), args.repeat, args.backend))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold, patterns, args.min_delta)
+        if regressions:
+            print("%d benchmarks regressed: %s" % (len(regressions), ", ".join(regressions)))
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
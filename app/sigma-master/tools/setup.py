@@ -58,6 +58,8 @@ setup(
             'sigma2attack = sigma.sigma2attack:main',
             'sigma_similarity = sigma.sigma_similarity:main',
             'sigma_uuid = sigma.sigma_uuid:main',
+            'sigma_optimizer_report = sigma.sigma_optimizer_report:main',
+            'sigma_match = sigma.sigma_match:main',
         ],
     },
 )
@@ -22,6 +22,8 @@ class ArcSightBackend(SingleTextQueryBackend):
     """Converts Sigma rule into ArcSight saved search. Contributed by SOC Prime. https://socprime.com"""
     identifier = "arcsight"
     active = True
+    stateAttributes = tuple()
+    cacheableResults = True
     andToken = " AND "
     orToken = " OR "
     notToken = " NOT "
@@ -156,6 +158,8 @@ class ArcSightESMBackend(SingleTextQueryBackend):
     reEscape = re.compile('(["\\\()])')
     identifier = "arcsight-esm"
     active = True
+    stateAttributes = tuple()
+    cacheableResults = True
     andToken = " AND "
     orToken = " OR "
     notToken = " NOT "
@@ -25,6 +25,8 @@ class SQLBackend(SingleTextQueryBackend):
     """Converts Sigma rule into SQL query"""
     identifier = "athena"
     active = True
+    stateAttributes = tuple()
+    cacheableResults = True
 
     andToken = " AND "                      # Token used for linking expressions with logical AND
     orToken = " OR "                        # Same for OR
@@ -42,6 +44,13 @@ class SQLBackend(SingleTextQueryBackend):
     mapListsSpecialHandling = False         # Same handling for map items with list values as for normal values (strings, integers) if True, generateMapItemListNode method is called with node
     mapListValueExpression = "%s OR %s"     # Syntax for field/value condititons where map value is a list
     mapLength = "(%s %s)"
+    escapeRules = (
+            (r"(?<!\\)\\(?!(\\|\*|\?))", r"\\\\"),       # single backslashes which are not in front of * or ? are doubled
+            (r"_", r"\_"),                                 # _ is a SQL wildcard
+            (r"%", r"\%"),                                 # % is a SQL wildcard
+            (r"(?<!\\)(\\\\)*(?!\\)\*", r"\1%"),           # * is replaced with % if even number of backslashes (or zero) in front of it
+            (r"(?<!\\)(\\\\)*(?!\\)\?", r"\1_"),           # ? is replaced with _ if even number of backslashes (or zero) in front of it
+            )
 
     options = SingleTextQueryBackend.options + (
         ("table", "eventlog", "Use this option to specify table name.", None),
@@ -197,22 +206,7 @@ class SQLBackend(SingleTextQueryBackend):
     def cleanValue(self, val):
         if not isinstance(val, str):
             return str(val)
-
-        #Single backlashes which are not in front of * or ? are doulbed
-        val = re.sub(r"(?<!\\)\\(?!(\\|\*|\?))", r"\\\\", val)
-
-        #Replace _ with \_ because _ is a sql wildcard
-        val = re.sub(r'_', r'\_', val)
-
-        #Replace % with \% because % is a sql wildcard
-        val = re.sub(r'%', r'\%', val)
-
-        #Replace * with %, if even number of backslashes (or zero) in front of *
-        val = re.sub(r"(?<!\\)(\\\\)*(?!\\)\*", r"\1%", val)
-
-        #Replace ? with _, if even number of backsashes (or zero) in front of ?
-        val = re.sub(r"(?<!\\)(\\\\)*(?!\\)\?", r"\1_", val)
-        return val
+        return super().cleanValue(val)
 
     def generateAggregation(self, agg, where_clausel):
         if not agg:
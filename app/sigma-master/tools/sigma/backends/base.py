@@ -17,6 +17,7 @@
 import sys
 
 import sigma
+import sigma.parser.condition
 import yaml
 import re
 
@@ -93,6 +94,71 @@ class BaseBackend:
     config_required = True
     default_config = None
     mapExpression = ""
+    # Parse tree node types and the names of their generator methods. generateNode() dispatches nodes by their exact
+    # type and nodes of subclasses of the types in subclassNodeGenerators by isinstance() checks. The results are
+    # passed to applyOverrides(), except for the node types in rawNodeTypes.
+    nodeGenerators = {
+            sigma.parser.condition.ConditionAND: "generateANDNode",
+            sigma.parser.condition.ConditionOR: "generateORNode",
+            sigma.parser.condition.ConditionNOT: "generateNOTNode",
+            sigma.parser.condition.ConditionNULLValue: "generateNULLValueNode",
+            sigma.parser.condition.ConditionNotNULLValue: "generateNotNULLValueNode",
+            sigma.parser.condition.NodeSubexpression: "generateSubexpressionNode",
+            sigma.parser.condition.SigmaSearchValueAsIs: "generateValueAsIsNode",
+            tuple: "generateMapItemNode",
+            str: "generateValueNode",
+            int: "generateValueNode",
+            list: "generateListNode",
+            }
+    subclassNodeGenerators = {
+            SigmaTypeModifier: "generateTypedValueNode",
+            }
+    rawNodeTypes = { sigma.parser.condition.SigmaSearchValueAsIs }
+    overrideSteps = None            # overrides compiled from the configuration by compileOverrides()
+    overridesPerNode = False        # apply overrides to each generated node instead of the query root
+    overridesActive = False         # query root is generated, overrides are applied to it after generation
+    # Generated subtrees can be memoized by their structure with the backend option generation_cache, e.g. log source
+    # conditions that are equal in many rules. This is only possible for backends whose node generators don't change
+    # the backend state and only depend on the node and the backend attributes named in generationCacheState.
+    generationCacheState = None     # attributes that influence generated subtrees, None if the backend isn't cacheable
+    generationCacheSize = 4096      # number of memoized subtrees
+    generationCache = None          # structural key, overrides active and state -> generated subtree
+    generationCacheHits = 0
+    generationCacheMisses = 0
+    # Backends that support parallel conversions declare the attributes containing the output collected for finalize(),
+    # an empty tuple if there is none. Parallel conversions merge the states of the backends of their worker processes
+    # with mergeState() in input order before finalize() is called. Backends must not carry other state from one rule to
+    # the next, undeclared backends and subclasses overriding finalize() without own declaration are used sequentially.
+    stateAttributes = None
+    uniqueStateAttributes = tuple()     # state sets that must be disjoint, e.g. rule names made unique with counters
+    # Results of backends without state for finalize() can be cached if they only depend on the rule, the configuration
+    # and the options, not on the previously converted rules or on random values like generated UUIDs. This must be
+    # verified for each backend class, the declaration isn't inherited by subclasses.
+    cacheableResults = False
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.compileNodeGenerators()
+
+    @classmethod
+    def compileNodeGenerators(cls):
+        """
+        Build the dispatch table from node types to (generator function, apply overrides) of this class. This is done
+        at class creation, generator methods overridden by subclasses are contained in their own dispatch table.
+        """
+        cls.nodeDispatch = {
+                nodetype: (getattr(cls, method), nodetype not in cls.rawNodeTypes)
+                for nodetype, method in cls.nodeGenerators.items()
+                }
+
+    def getNodeGenerator(self, nodetype):
+        """Return generator for node type that is not contained in the dispatch table and add it to the table."""
+        for supertype, method in self.subclassNodeGenerators.items():
+            if issubclass(nodetype, supertype):
+                generator = (getattr(type(self), method), nodetype not in self.rawNodeTypes)
+                self.nodeDispatch[nodetype] = generator
+                return generator
+        raise TypeError("Node type %s was not expected in Sigma parse tree" % (str(nodetype)))
 
     def __init__(self, sigmaconfig, backend_options=dict()):
         """
@@ -112,6 +178,15 @@ class BaseBackend:
                 target = option
             setattr(self, target, self.backend_options.setdefault(option, default_value))
 
+        if self.generationCacheState is not None:
+            try:
+                if self.backend_options.get("generation_cache", False):
+                    self.generationCache = dict()
+                    self.generationKeys = dict()
+                    self.generateNode = self.generateCachedNode
+            except AttributeError:      # backend without options
+                pass
+
     def generate(self, sigmaparser):
         """Method is called for each sigma rule and receives the parsed rule (SigmaParser)"""
         if len(sigmaparser.condparsed) > 1:
@@ -138,49 +213,108 @@ class BaseBackend:
         #result = self.applyOverrides(result)
         return result
 
-    def applyOverrides(self, query):
+    def compileOverrides(self):
+        """
+        Compile the overrides of the configuration into a list of (regular expression, literal, replacement) steps.
+        This is done once on first use, as backends may set mapExpression during their initialization. Overrides
+        following an invalid one are ignored, like they were never reached by the former uncompiled implementation.
+        The backend option overrides_per_node restores the application of overrides to each generated node.
+        """
+        steps = list()
         try:
-            if 'overrides' in self.sigmaconfig.config and isinstance(query, str):
-                for expression in self.sigmaconfig.config['overrides']:
-                    if 'regexes' in expression:
-                        for x in expression['regexes']:
-                            sub = expression['field']
-                            value = expression['value']
-                            query = re.sub(x, self.mapExpression % (sub, value), query)
-                    if 'literals' in expression:
-                        for x in expression['literals']:
-                            sub = expression['field']
-                            value = expression['value']
-                            query = query.replace(x, self.mapExpression % (sub, value))
+            for expression in self.sigmaconfig.config['overrides']:
+                if 'regexes' in expression:
+                    for x in expression['regexes']:
+                        replacement = self.mapExpression % (expression['field'], expression['value'])
+                        regex = re.compile(x)
+                        regex.sub(replacement, "")      # raise errors of replacement template here
+                        steps.append((regex, None, replacement))
+                if 'literals' in expression:
+                    for x in expression['literals']:
+                        replacement = self.mapExpression % (expression['field'], expression['value'])
+                        "".replace(x, replacement)
+                        steps.append((None, x, replacement))
         except Exception:
             pass
+        self.overrideSteps = steps
+        try:
+            self.overridesPerNode = bool(self.backend_options.get("overrides_per_node", False))
+        except AttributeError:      # backend without options
+            pass
+        return steps
+
+    def applyOverrides(self, query):
+        steps = self.overrideSteps
+        if steps is None:
+            steps = self.compileOverrides()
+        if isinstance(query, str):
+            for regex, literal, replacement in steps:
+                if regex is not None:
+                    query = regex.sub(replacement, query)
+                else:
+                    query = query.replace(literal, replacement)
         return query
 
     def generateNode(self, node):
-        if type(node) == sigma.parser.condition.ConditionAND:
-            return self.applyOverrides(self.generateANDNode(node))
-        elif type(node) == sigma.parser.condition.ConditionOR:
-            return self.applyOverrides(self.generateORNode(node))
-        elif type(node) == sigma.parser.condition.ConditionNOT:
-            return self.applyOverrides(self.generateNOTNode(node))
-        elif type(node) == sigma.parser.condition.ConditionNULLValue:
-            return self.applyOverrides(self.generateNULLValueNode(node))
-        elif type(node) == sigma.parser.condition.ConditionNotNULLValue:
-            return self.applyOverrides(self.generateNotNULLValueNode(node))
-        elif type(node) == sigma.parser.condition.NodeSubexpression:
-            return self.applyOverrides(self.generateSubexpressionNode(node))
-        elif type(node) == sigma.parser.condition.SigmaSearchValueAsIs:
-            return self.generateValueAsIsNode(node)
-        elif type(node) == tuple:
-            return self.applyOverrides(self.generateMapItemNode(node))
-        elif type(node) in (str, int):
-            return self.applyOverrides(self.generateValueNode(node))
-        elif type(node) == list:
-            return self.applyOverrides(self.generateListNode(node))
-        elif isinstance(node, SigmaTypeModifier):
-            return self.applyOverrides(self.generateTypedValueNode(node))
+        try:
+            generator, overrides = self.nodeDispatch[type(node)]
+        except KeyError:
+            generator, overrides = self.getNodeGenerator(type(node))
+        if overrides and not self.overridesActive:
+            if self.overrideSteps is None:
+                self.compileOverrides()
+            if self.overrideSteps:
+                if self.overridesPerNode:
+                    return self.applyOverrides(generator(self, node))
+                self.overridesActive = True
+                try:
+                    query = generator(self, node)
+                finally:
+                    self.overridesActive = False
+                return self.applyOverrides(query)
+        return generator(self, node)
+
+    def generateCachedNode(self, node):
+        """
+        Return generated subtree from the generation cache or generate it with the generateNode() method of the class
+        and add it to the cache. This method replaces generateNode() of backends with enabled generation cache.
+        """
+        if not isinstance(node, sigma.parser.condition.ParseTreeNode):
+            return type(self).generateNode(self, node)
+        if len(self.generationKeys) > 16 * self.generationCacheSize:      # keys of parse trees of previous rules
+            self.generationKeys.clear()
+        try:
+            key = (
+                    sigma.parser.condition.structuralKey(node, self.generationKeys),
+                    self.overridesActive,
+                    tuple(getattr(self, name, None) for name in self.generationCacheState),
+                    )
+            result = self.generationCache[key]
+        except KeyError:
+            pass
+        except TypeError:           # unhashable state
+            return type(self).generateNode(self, node)
         else:
-            raise TypeError("Node type %s was not expected in Sigma parse tree" % (str(type(node))))
+            self.generationCacheHits += 1
+            return result
+        self.generationCacheMisses += 1
+        result = type(self).generateNode(self, node)
+        if len(self.generationCache) >= self.generationCacheSize:
+            del self.generationCache[next(iter(self.generationCache))]
+        self.generationCache[key] = result
+        return result
+
+    def getGenerationCacheStats(self):
+        """Return dict with hits, misses, size and hit rate of the generation cache or None if it is disabled."""
+        if self.generationCache is None:
+            return None
+        lookups = self.generationCacheHits + self.generationCacheMisses
+        return {
+                "hits": self.generationCacheHits,
+                "misses": self.generationCacheMisses,
+                "size": len(self.generationCache),
+                "hitrate": self.generationCacheHits / lookups if lookups else 0.0,
+                }
 
     def generateValueAsIsNode(self, node):
         raise NotImplementedError("Node type not implemented for this backend")
@@ -231,6 +365,37 @@ class BaseBackend:
         """
         pass
 
+    @classmethod
+    def isMergeable(cls):
+        """Return True if rules can be converted by multiple instances of the backend whose states are merged."""
+        return cls.stateAttributes is not None and (len(cls.stateAttributes) > 0 or cls.finalize is BaseBackend.finalize)
+
+    def getState(self):
+        """
+        Return the state collected for finalize() as dict of the state attributes. It is called once after the backend
+        converted its part of the rules.
+        """
+        return { name: getattr(self, name) for name in self.stateAttributes or () }
+
+    def mergeState(self, state):
+        """
+        Merge the state of a backend instance that converted the following rules. Lists and strings are concatenated,
+        dicts and sets are updated. Returns False without changing this backend if the state can't be merged, the rules
+        must then be converted again by this backend.
+        """
+        for name in self.uniqueStateAttributes:
+            if not getattr(self, name).isdisjoint(state.get(name, ())):
+                return False
+        for name, value in state.items():
+            current = getattr(self, name)
+            if isinstance(current, (dict, set)):
+                current.update(value)
+            else:
+                setattr(self, name, current + value)
+        return True
+
+BaseBackend.compileNodeGenerators()
+
 class SingleTextQueryBackend(RulenameCommentMixin, BaseBackend, QuoteCharMixin):
     """Base class for backends that generate one text-based expression from a Sigma rule"""
     identifier = "base-textquery"
@@ -47,6 +47,8 @@ class CarbonBlackQueryBackend(CarbonBlackWildcardHandlingMixin, SingleTextQueryB
     """Converts Sigma rule into CarbonBlack query string. Only searches, no aggregations. Contributed by SOC Prime. https://socprime.com"""
     identifier = "carbonblack"
     active = True
+    stateAttributes = tuple()
+    cacheableResults = True
 
     # reEscape = re.compile("([\s+\\-=!(){}\\[\\]^\"~:/]|(?<!\\\\)\\\\(?![*?\\\\])|\\\\u|&&|\\|\\|)")
     reEscape = re.compile("([\s\s+()\"])")
@@ -21,7 +21,6 @@
 #           sigmas["rules/windows/process_creation/win_cmdkey_recon.yml"] = THE OUTPUT OF csharp BACKEND
 
 import re
-import sigma
 from .base import SingleTextQueryBackend
 from .mixins import MultiRuleOutputMixin
 
@@ -29,6 +28,8 @@ class CSharpBackend(SingleTextQueryBackend):
     """Converts Sigma rule into CSharp Regex in LINQ query."""
     identifier = "csharp"
     active = True
+    stateAttributes = tuple()
+    cacheableResults = True
     config_required = False
     default_config = ["sysmon"]
     
@@ -44,6 +45,11 @@ class CSharpBackend(SingleTextQueryBackend):
     notNullExpression = "%s=\"*\""
     mapExpression = "%s == %s"
     mapListsSpecialHandling = True
+    nodeGenerators = {
+            **SingleTextQueryBackend.nodeGenerators,
+            str: "generateKeywordNode",       # values without field name
+            int: "generateKeywordNode",
+            }
 
     logname = None
 
@@ -73,27 +79,8 @@ class CSharpBackend(SingleTextQueryBackend):
       
         return " select x;"
 
-    def generateNode(self, node):
-        if type(node) == sigma.parser.condition.ConditionAND:
-            return self.generateANDNode(node)
-        elif type(node) == sigma.parser.condition.ConditionOR:
-            return self.generateORNode(node)
-        elif type(node) == sigma.parser.condition.ConditionNOT:
-            return self.generateNOTNode(node)
-        elif type(node) == sigma.parser.condition.ConditionNULLValue:
-            return self.generateNULLValueNode(node)
-        elif type(node) == sigma.parser.condition.ConditionNotNULLValue:
-            return self.generateNotNULLValueNode(node)
-        elif type(node) == sigma.parser.condition.NodeSubexpression:
-            return self.generateSubexpressionNode(node)
-        elif type(node) == tuple:
-            return self.generateMapItemNode(node)
-        elif type(node) in (str, int):
-            return self.generateValueNode(node, False)
-        elif type(node) == list:
-            return self.generateListNode(node)
-        else:
-            raise TypeError("Node type %s was not expected in Sigma parse tree" % (str(type(node))))
+    def generateKeywordNode(self, node):
+        return self.generateValueNode(node, False)
 
     def generateQuery(self, parsed, sigmaparser):
         result = self.generateNode(parsed.parsedSearch)
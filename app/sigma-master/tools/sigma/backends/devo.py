@@ -25,6 +25,8 @@ class DevoBackend(SingleTextQueryBackend):
     """Converts Sigma rule into Devo query."""
     identifier = "devo"
     active = True
+    stateAttributes = tuple()
+    cacheableResults = True
 
     andToken = " and "                            # Token used for linking expressions with logical AND
     orToken = " or "                              # Same for OR
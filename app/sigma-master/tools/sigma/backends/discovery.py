@@ -18,20 +18,51 @@ import sys
 import json
 import re
 import os
+import importlib
 import sigma.backends
 from .base import BaseBackend
 from sigma.tools import getAllSubclasses, getClassDict
 
+_backendList = None         # memoized result of backend discovery
+_backendClasses = dict()    # identifier -> backend class loaded by getBackend()
+
 def getBackendList():
-    """Return list of backend classes"""
-    path = os.path.dirname(__file__)
-    return getAllSubclasses(path, "backends", BaseBackend)
+    """Return list of backend classes. All backend modules are imported on first call."""
+    global _backendList
+    if _backendList is None:
+        path = os.path.dirname(__file__)
+        _backendList = getAllSubclasses(path, "backends", BaseBackend)
+    return _backendList
 
 def getBackendDict():
     return getClassDict(getBackendList())
 
+def getRegistry():
+    """
+    Return the backend registry from the generated manifest in sigma.backends.registry as dict identifier ->
+    (module, class name, description) without import of the backend modules. Falls back to backend discovery if
+    the manifest is missing.
+    """
+    try:
+        from .registry import backends
+        return backends
+    except ImportError:
+        return { backend.identifier: (backend.__module__, backend.__name__, backend.__doc__) for backend in getBackendList() }
+
 def getBackend(name):
+    """Return backend class by identifier. Only the module of the backend is imported if it is contained in the registry."""
+    try:
+        return _backendClasses[name]
+    except KeyError:
+        pass
+
     try:
-        return getBackendDict()[name]
-    except KeyError as e:
-        raise LookupError("Backend not found") from e
+        module, classname, description = getRegistry()[name]
+        backend = getattr(importlib.import_module(module), classname)
+    except (KeyError, ImportError, AttributeError):     # not in registry or registry outdated: discover all backends
+        try:
+            backend = getBackendDict()[name]
+        except KeyError as e:
+            raise LookupError("Backend not found") from e
+    _backendClasses[name] = backend
+    return backend
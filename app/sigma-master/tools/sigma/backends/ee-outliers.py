@@ -26,8 +26,11 @@ class OutliersBackend(ElasticsearchDSLBackend, MultiRuleOutputMixin):
     """Converts Sigma rule into ee-outliers"""
     identifier = 'ee-outliers'
     active = True
+    stateAttributes = ("queries", "rulenames")
+    uniqueStateAttributes = ("rulenames",)
 
     def generate(self, sigmaparser):
+        self.queries = []               # drop queries left over by a rule that failed to convert
         super().generate(sigmaparser)
 
         self.tags = sigmaparser.parsedyaml.setdefault("tags", "")
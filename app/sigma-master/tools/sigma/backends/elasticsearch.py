@@ -75,8 +75,7 @@ class ElasticsearchWildcardHandlingMixin(object):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.matchKeyword = True
-        self.CaseInSensitiveField = False
+        self.resetKeywordState()
         self.keyword_field = self.keyword_field.strip().strip('.') # Prevent mistake if user added a '.' or field has spaces
         self.analyzed_sub_field_name = self.analyzed_sub_field_name.strip().strip('.') # Prevent mistake if user added a '.' or field has spaces
         try:
@@ -108,6 +107,18 @@ class ElasticsearchWildcardHandlingMixin(object):
         except AttributeError:
             self.wildcard_use_keyword = False
 
+    def resetKeywordState(self):
+        """
+        Field mappings decide about keyword matching of the following search values. Reset this at the beginning of
+        each rule, else keywords without field are converted depending on the last field of the previous rule.
+        """
+        self.matchKeyword = True
+        self.CaseInSensitiveField = False
+
+    def generate(self, sigmaparser):
+        self.resetKeywordState()
+        return super().generate(sigmaparser)
+
     def containsWildcard(self, value):
         """Determine if value contains wildcard."""
         if type(value) == str:
@@ -269,6 +280,8 @@ class ElasticsearchQuerystringBackend(DeepFieldMappingMixin, ElasticsearchWildca
     """Converts Sigma rule into Elasticsearch query string. Only searches, no aggregations."""
     identifier = "es-qs"
     active = True
+    stateAttributes = tuple()
+    cacheableResults = True
 
     reEscape = re.compile("([\s+\\-=!(){}\\[\\]^\"~:/]|(?<!\\\\)\\\\(?![*?\\\\])|\\\\u|&&|\\|\\|)")
     andToken = " AND "
@@ -524,13 +537,28 @@ class ElasticsearchDSLBackend(DeepFieldMappingMixin, RulenameCommentMixin, Elast
     interval = None
     title = None
     reEscape = re.compile( "([\s+\\-=!(){}\\[\\]^\"~:/]|(?<!\\\\)\\\\(?![*?\\\\])|\\\\u|&&|\\|\\|)" )
+    stateAttributes = ("queries",)
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.queries = []
 
+    def getState(self):
+        state = super().getState()
+        if "indices" in self.__dict__:      # finalize() uses the indices of the last converted rule
+            state["indices"] = self.indices
+        return state
+
+    def mergeState(self, state):
+        if not super().mergeState({ name: value for name, value in state.items() if name != "indices" }):
+            return False
+        if "indices" in state:
+            self.indices = state["indices"]
+        return True
+
     def generate(self, sigmaparser):
         """Method is called for each sigma rule and receives the parsed rule (SigmaParser)"""
+        self.resetKeywordState()
         self.title = sigmaparser.parsedyaml.setdefault("title", "")
         logsource = sigmaparser.get_logsource()
         if logsource is None:
@@ -543,7 +571,7 @@ class ElasticsearchDSLBackend(DeepFieldMappingMixin, RulenameCommentMixin, Elast
         try:
             self.interval = sigmaparser.parsedyaml['detection']['timeframe']
         except:
-            pass
+            self.interval = None
 
         for parsed in sigmaparser.condparsed:
             self.generateBefore(parsed)
@@ -800,6 +828,7 @@ class KibanaBackend(ElasticsearchQuerystringBackend, MultiRuleOutputMixin):
     """Converts Sigma rule into Kibana JSON Configuration files (searches only)."""
     identifier = "kibana"
     active = True
+    stateAttributes = None             # curl output depends on the order of the index pattern set
     options = ElasticsearchQuerystringBackend.options + (
             ("output", "import", "Output format: import = JSON file manually imported in Kibana, curl = Shell script that imports queries in Kibana via curl (jq is additionally required)", "output_type"),
             ("es", "localhost:9200", "Host and port of Elasticsearch instance", None),
@@ -813,6 +842,7 @@ class KibanaBackend(ElasticsearchQuerystringBackend, MultiRuleOutputMixin):
         self.indexsearch = set()
 
     def generate(self, sigmaparser):
+        self.resetKeywordState()
         description = sigmaparser.parsedyaml.setdefault("description", "")
 
         columns = list()
@@ -914,6 +944,8 @@ class XPackWatcherBackend(ElasticsearchQuerystringBackend, MultiRuleOutputMixin)
     """Converts Sigma Rule into X-Pack Watcher JSON for alerting"""
     identifier = "xpack-watcher"
     active = True
+    stateAttributes = ("watcher_alert", "rulenames")
+    uniqueStateAttributes = ("rulenames",)
     supported_alert_methods = {'email', 'webhook','index'}
     options = ElasticsearchQuerystringBackend.options + (
             ("output", "curl", "Output format: curl = Shell script that imports queries in Watcher index with curl", "output_type"),
@@ -955,6 +987,7 @@ class XPackWatcherBackend(ElasticsearchQuerystringBackend, MultiRuleOutputMixin)
         self.url_prefix = self.watcher_urls[self.watcher_url]
 
     def generate(self, sigmaparser):
+        self.resetKeywordState()
         # get the details if this alert occurs
         title = sigmaparser.parsedyaml.setdefault("title", "")
         description = sigmaparser.parsedyaml.setdefault("description", "")
@@ -1228,6 +1261,8 @@ class XPackWatcherBackend(ElasticsearchQuerystringBackend, MultiRuleOutputMixin)
 class ElastalertBackend(DeepFieldMappingMixin, MultiRuleOutputMixin):
     """Elastalert backend"""
     active = True
+    stateAttributes = ("rulenames",)
+    uniqueStateAttributes = ("rulenames",)
     supported_alert_methods = {'email', 'http_post'}
 
     options = ElasticsearchQuerystringBackend.options + (
@@ -1422,6 +1457,11 @@ class ElastalertBackendDsl(ElastalertBackend, ElasticsearchDSLBackend):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
+    def generate(self, sigmaparser):
+        self.resetKeywordState()
+        self.queries = []               # drop queries left over by a rule that failed to convert
+        return super().generate(sigmaparser)
+
     def generateQuery(self, parsed):
         #Generate ES DSL Query
         super().generateBefore(parsed)
@@ -1435,6 +1475,10 @@ class ElastalertBackendQs(ElastalertBackend, ElasticsearchQuerystringBackend):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
+    def generate(self, sigmaparser):
+        self.resetKeywordState()
+        return super().generate(sigmaparser)
+
     def generateQuery(self, parsed):
         #Generate ES QS Query
         return [{ 'query' : { 'query_string' : { 'query' : super().generateQuery(parsed) } } }]
@@ -1754,6 +1798,7 @@ class KibanaNdjsonBackend(ElasticsearchQuerystringBackend, MultiRuleOutputMixin)
     """Converts Sigma rule into Kibana JSON Configuration files (searches only)."""
     identifier = "kibana-ndjson"
     active = True
+    stateAttributes = None             # curl output depends on the order of the index pattern set
     options = ElasticsearchQuerystringBackend.options + (
             ("output", "import", "Output format: import = JSON file manually imported in Kibana, curl = Shell script that imports queries in Kibana via curl (jq is additionally required)", "output_type"),
             ("es", "localhost:9200", "Host and port of Elasticsearch instance", None),
@@ -1767,6 +1812,7 @@ class KibanaNdjsonBackend(ElasticsearchQuerystringBackend, MultiRuleOutputMixin)
         self.indexsearch = set()
 
     def generate(self, sigmaparser):
+        self.resetKeywordState()
         description = sigmaparser.parsedyaml.setdefault("description", "")
 
         columns = list()
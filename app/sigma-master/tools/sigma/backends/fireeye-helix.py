@@ -31,6 +31,8 @@ class FireEyeHelixBackend(SingleTextQueryBackend):
 
     identifier = "fireeye-helix"
     active = True
+    stateAttributes = tuple()
+    cacheableResults = True
     index_field = "metaclass"
     nonTaxonomyField = "rawmsg"
 
@@ -21,6 +21,7 @@ class GraylogQuerystringBackend(ElasticsearchQuerystringBackend):
     """Converts Sigma rule into Graylog query string. Only searches, no aggregations."""     
     identifier = "graylog"
     active = True
+    cacheableResults = True
     config_required = False
 
     reEscape = re.compile("([\s+\\-!(){}\\[\\]^\"~:/]|(?<!\\\\)\\\\(?![*?\\\\])|&&|\\|\\|)")
@@ -31,6 +31,7 @@ class HAWKBackend(SingleTextQueryBackend):
     """Converts Sigma rule into HAWK search"""
     identifier = "hawk"
     active = True
+    stateAttributes = tuple()
     config_required = False
     default_config = ["sysmon", "hawk"]
     reEscape = re.compile('(")')
@@ -47,6 +48,19 @@ class HAWKBackend(SingleTextQueryBackend):
     notNullExpression = "%s != null"
     mapExpression = "%s=%s"
     mapListsSpecialHandling = True
+    nodeGenerators = {
+            sigma.parser.condition.ConditionAND: "generateANDNode",
+            sigma.parser.condition.ConditionOR: "generateORNode",
+            sigma.parser.condition.ConditionNOT: "generateNOTNode",
+            sigma.parser.condition.ConditionNULLValue: "generateNULLValueNode",
+            sigma.parser.condition.ConditionNotNULLValue: "generateNotNULLValueNode",
+            sigma.parser.condition.NodeSubexpression: "generateSubexpressionNode",
+            tuple: "generateMapItemNode",
+            str: "generateKeywordNode",       # values without field name
+            int: "generateKeywordNode",
+            list: "generateListNode",
+            }
+    subclassNodeGenerators = dict()     # typed values without field name are not supported
     aql_database = "events"
 
     def cleanKey(self, key):
@@ -59,55 +73,36 @@ class HAWKBackend(SingleTextQueryBackend):
         return value
 
     def generateNode(self, node, notNode=False):
-        #print(type(node))
+        """Dispatch nodes like the base backend, the generators also get whether the node is negated."""
+        try:
+            generator, _ = self.nodeDispatch[type(node)]
+        except KeyError:
+            generator, _ = self.getNodeGenerator(type(node))
+        return generator(self, node, notNode)
+
+    def generateKeywordNode(self, node, notNode=False):
+        nodeRet = {"key": "",  "description": "", "class": "column", "return": "str", "args": { "comparison": { "value": "=" }, "str": { "value": "5", "regex": "true" } } }
+        #key = next(iter(self.sigmaparser.parsedyaml['detection'])) 
+        key = "payload"
+
+        #nodeRet['key'] = self.cleanKey(key).lower()
+        nodeRet['key'] = key
+
         #print(node)
-        if type(node) == sigma.parser.condition.ConditionAND:
-            return self.generateANDNode(node, notNode)
-        elif type(node) == sigma.parser.condition.ConditionOR:
-            #print("OR NODE")
-            #print(node)
-            return self.generateORNode(node, notNode)
-        elif type(node) == sigma.parser.condition.ConditionNOT:
-            #print("NOT NODE")
-            #print(node)
-            return self.generateNOTNode(node)
-        elif type(node) == sigma.parser.condition.ConditionNULLValue:
-            return self.generateNULLValueNode(node, notNode)
-        elif type(node) == sigma.parser.condition.ConditionNotNULLValue:
-            return self.generateNotNULLValueNode(node)
-        elif type(node) == sigma.parser.condition.NodeSubexpression:
-            #print(node)
-            return self.generateSubexpressionNode(node, notNode)
-        elif type(node) == tuple:
-            #print("TUPLE: ", node)
-            return self.generateMapItemNode(node, notNode)
-        elif type(node) in (str, int):
-            nodeRet = {"key": "",  "description": "", "class": "column", "return": "str", "args": { "comparison": { "value": "=" }, "str": { "value": "5", "regex": "true" } } }
-            #key = next(iter(self.sigmaparser.parsedyaml['detection'])) 
-            key = "payload"
-
-            #nodeRet['key'] = self.cleanKey(key).lower()
-            nodeRet['key'] = key
-
-            #print(node)
-            #print("KEY: ", key)
-            # they imply the entire payload
-            nodeRet['description'] = key
-            nodeRet['rule_id'] = str(uuid.uuid4())
-            value = self.generateValueNode(node, False).replace("*", "EEEESTAREEE")
-            value = re.escape(value)
-            value = value.replace("EEEESTAREEE", ".*")
-            if value[0:2] == ".*":  
-                value = value[2:]
-            if value[-2:] == ".*":
-                value = value[:-2]
-            nodeRet['args']['str']['value'] = value 
-            # return json.dumps(nodeRet)
-            return nodeRet
-        elif type(node) == list:
-            return self.generateListNode(node, notNode)
-        else:
-            raise TypeError("Node type %s was not expected in Sigma parse tree" % (str(type(node))))
+        #print("KEY: ", key)
+        # they imply the entire payload
+        nodeRet['description'] = key
+        nodeRet['rule_id'] = str(uuid.uuid4())
+        value = self.generateValueNode(node, False).replace("*", "EEEESTAREEE")
+        value = re.escape(value)
+        value = value.replace("EEEESTAREEE", ".*")
+        if value[0:2] == ".*":  
+            value = value[2:]
+        if value[-2:] == ".*":
+            value = value[:-2]
+        nodeRet['args']['str']['value'] = value 
+        # return json.dumps(nodeRet)
+        return nodeRet
 
     def generateANDNode(self, node, notNode=False):
         """
@@ -172,7 +167,7 @@ class HAWKBackend(SingleTextQueryBackend):
         #print(result)
         return self.listExpression % (self.listSeparator.join(result))
 
-    def generateNOTNode(self, node):
+    def generateNOTNode(self, node, notNode=False):
         generated = self.generateNode(node.item, True)
         return generated
 
@@ -305,7 +300,7 @@ class HAWKBackend(SingleTextQueryBackend):
     def generateValueNode(self, node, keypresent):
         return self.valueExpression % (self.cleanValue(str(node)))
 
-    def generateNULLValueNode(self, node, notNode):
+    def generateNULLValueNode(self, node, notNode=False):
         # node.item
         nodeRet = { "key" : "empty", "description" : "Value Does Not Exist (IS NULL)", "class" : "function", "inputs" : { "comparison" : { "order" : 0, "source" : "comparison", "type" : "comparison" }, "column" : { "order" : 1, "source" : "columns", "type" : "str" } }, "args" : { "comparison" : { "value" : "!=" }, "column" : { "value" : node.item } }, "return" : "boolean" }
         nodeRet['args']['column']['value'] = self.cleanKey(node.item).lower()
@@ -318,7 +313,7 @@ class HAWKBackend(SingleTextQueryBackend):
         # return json.dumps(nodeRet)
         return nodeRet
 
-    def generateNotNULLValueNode(self, node):
+    def generateNotNULLValueNode(self, node, notNode=False):
         # return self.notNullExpression % (node.item)
         return node.item
 
@@ -98,13 +98,19 @@ def str_presenter(dumper, data):
     return dumper.represent_scalar('tag:yaml.org,2002:str', data)
 
 
-yaml.add_representer(str, str_presenter)
+class LaceworkDumper(yaml.Dumper):
+    """YAML dumper with literal style for multiline strings, kept local to this backend"""
+
+
+LaceworkDumper.add_representer(str, str_presenter)
 
 
 class LaceworkBackend(SingleTextQueryBackend):
     """Converts Sigma rule into Lacework Policy Platform"""
     identifier = "lacework"
     active = True
+    stateAttributes = tuple()
+    cacheableResults = True
     # our approach to config will be such that we support both an
     # embedded or specified config.
     config_required = False
@@ -386,6 +392,7 @@ class LaceworkQuery:
 
         return yaml.dump(
             o,
+            Dumper=LaceworkDumper,
             explicit_start=True,
             default_flow_style=False,
             sort_keys=False
@@ -581,6 +588,7 @@ class LaceworkPolicy:
 
         return yaml.dump(
             o,
+            Dumper=LaceworkDumper,
             explicit_start=True,
             default_flow_style=False,
             sort_keys=False
@@ -281,6 +281,8 @@ class LimaCharlieBackend(BaseBackend):
     """Converts Sigma rule into LimaCharlie D&R rules. Contributed by LimaCharlie. https://limacharlie.io"""
     identifier = "limacharlie"
     active = True
+    stateAttributes = tuple()
+    cacheableResults = True
     config_required = False
     default_config = ["limacharlie"]
 
@@ -7,6 +7,8 @@ class LogiqBackend(SingleTextQueryBackend):
     identifier = "logiq"
     config_required = False
     active = True
+    stateAttributes = tuple()
+    cacheableResults = True
     reEscape = re.compile('(")')
     reClear = None
     andToken = " && "
@@ -22,6 +22,8 @@ class LogPointBackend(SingleTextQueryBackend):
     """Converts Sigma rule into LogPoint query"""
     identifier = "logpoint"
     active = True
+    stateAttributes = tuple()
+    cacheableResults = True
     config_required = False
     default_config = ["sysmon", "logpoint-windows"]
 
@@ -42,6 +44,7 @@ class LogPointBackend(SingleTextQueryBackend):
     mapExpression = "%s=%s"
     mapListsSpecialHandling = True
     mapListValueExpression = "%s IN %s"
+    generationCacheState = ()
 
     def generateAggregation(self, agg):
         if agg == None:
@@ -14,26 +14,89 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import re
+from functools import lru_cache
+
 import sigma
 
+class EscapeTranslator:
+    """
+    Translates values with a sequence of escape rules. Each rule is a (regular expression, substitution) tuple that is
+    applied with sub() to the result of the previous rule. The rules are compiled once. Adjacent rules that replace
+    a single character with a literal string are merged into one str.translate() step if the result doesn't change.
+    Results are memoized in a bounded LRU cache.
+    """
+    def __init__(self, rules, cachesize=4096):
+        self.rules = tuple(rules)
+        self.steps = list()         # str.translate() tables and (regular expression, substitution) tuples
+        for pattern, substitution in self.rules:
+            regex = re.compile(pattern)
+            char = self.getLiteralChar(regex)
+            if char is None:
+                self.steps.append((regex, substitution))
+                continue
+            replacement = regex.sub(substitution, char)
+            table = self.steps[-1] if self.steps and type(self.steps[-1]) == dict else None
+            if table is None or ord(char) in table or any(char in value for value in table.values()):
+                table = dict()
+                self.steps.append(table)
+            table[ord(char)] = replacement
+        self.translate = lru_cache(maxsize=cachesize)(self.apply)
+
+    @staticmethod
+    def getLiteralChar(regex):
+        """Return the character matched by a regular expression that consists only of one literal character, else None."""
+        if len(regex.pattern) == 1 and regex.pattern not in ".^$*+?{}[]\\|()" and regex.flags == re.compile("").flags:
+            return regex.pattern
+
+    def apply(self, value):
+        for step in self.steps:
+            if type(step) == dict:
+                value = str.translate(value, step)
+            else:
+                value = step[0].sub(step[1], value)
+        return value
+
+    def __call__(self, value):
+        if not self.steps:
+            return value
+        return self.translate(value)
+
 ### Mixins
 class QuoteCharMixin:
     """
     This class adds the cleanValue method that quotes and filters characters according to the configuration in
-    the attributes provided by the mixin.
+    the attributes provided by the mixin. The escape rules are compiled into an EscapeTranslator on first use.
     """
     reEscape = None                     # match characters that must be quoted
     escapeSubst = "\\\\\g<1>"           # Substitution that is applied to characters/strings matched for escaping by reEscape
     reClear = None                      # match characters that are cleaned out completely
+    escapeRules = None                  # sequence of (regular expression, substitution) rules applied in given order instead of reEscape and reClear
+    escapeCacheSize = 4096              # number of memoized escaped values
+    escapeTranslator = None
+
+    def getEscapeRules(self):
+        if self.escapeRules is not None:
+            return self.escapeRules
+        rules = list()
+        if self.reEscape:
+            rules.append((self.reEscape, self.escapeSubst))
+        if self.reClear:
+            rules.append((self.reClear, ""))
+        return rules
+
+    def getEscapeTranslator(self):
+        """Return translator of escape rules, it is compiled again if the rules were changed."""
+        source = (self.escapeRules, self.reEscape, self.escapeSubst, self.reClear)
+        if self.escapeTranslator is None or self.escapeTranslator.source != source:
+            self.escapeTranslator = EscapeTranslator(self.getEscapeRules(), self.escapeCacheSize)
+            self.escapeTranslator.source = source
+        return self.escapeTranslator
 
     def cleanValue(self, val):
         if type(val) == int:
             return val
-        if self.reEscape:
-            val = self.reEscape.sub(self.escapeSubst, val)
-        if self.reClear:
-            val = self.reClear.sub("", val)
-        return val
+        return self.getEscapeTranslator()(val)
 
 class RulenameCommentMixin:
     """Prefixes each rule with the rule title."""
@@ -44,6 +44,8 @@ class NetWitnessEplBackend(SingleTextQueryBackend):
     config_required = False
     default_config = ["sysmon","netwitness-epl"]
     active = True
+    stateAttributes = tuple()
+    cacheableResults = True
     reEscape = re.compile('(")')
     #reEscape = re.compile("([\\|()\[\]{}.^$+])")
     reClear = None
@@ -27,6 +27,8 @@ class NetWitnessBackend(SingleTextQueryBackend):
     config_required = False
     default_config = ["sysmon", "netwitness"]
     active = True
+    stateAttributes = tuple()
+    cacheableResults = True
     reEscape = re.compile('(")')
     reClear = None
     andToken = " && "
@@ -591,6 +591,7 @@ class OpenSearchQsBackend(OpenSearchBackend, ElasticsearchQuerystringBackend):
     since query string in both OpenSearch monitors and ElasticRule are in Elastic Common Schema.
     '''
     identifier = "opensearch-monitor"
+    stateAttributes = None      # rule ids are tracked across rules
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
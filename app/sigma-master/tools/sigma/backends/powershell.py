@@ -42,6 +42,11 @@ class PowerShellBackend(SingleTextQueryBackend):
     notNullExpression = "%s=\"*\""
     mapExpression = "$_.%s -eq %s"
     mapListsSpecialHandling = True
+    nodeGenerators = {
+            **SingleTextQueryBackend.nodeGenerators,
+            str: "generateKeywordNode",       # values without field name
+            int: "generateKeywordNode",
+            }
 
     logname = None
     fieldMappings = {
@@ -78,27 +83,8 @@ class PowerShellBackend(SingleTextQueryBackend):
             return " | ConvertTo-CSV -NoTypeInformation"
         return ""
 
-    def generateNode(self, node):
-        if type(node) == sigma.parser.condition.ConditionAND:
-            return self.generateANDNode(node)
-        elif type(node) == sigma.parser.condition.ConditionOR:
-            return self.generateORNode(node)
-        elif type(node) == sigma.parser.condition.ConditionNOT:
-            return self.generateNOTNode(node)
-        elif type(node) == sigma.parser.condition.ConditionNULLValue:
-            return self.generateNULLValueNode(node)
-        elif type(node) == sigma.parser.condition.ConditionNotNULLValue:
-            return self.generateNotNULLValueNode(node)
-        elif type(node) == sigma.parser.condition.NodeSubexpression:
-            return self.generateSubexpressionNode(node)
-        elif type(node) == tuple:
-            return self.generateMapItemNode(node)
-        elif type(node) in (str, int):
-            return self.generateValueNode(node, False)
-        elif type(node) == list:
-            return self.generateListNode(node)
-        else:
-            raise TypeError("Node type %s was not expected in Sigma parse tree" % (str(type(node))))
+    def generateKeywordNode(self, node):
+        return self.generateValueNode(node, False)
 
     def generateQuery(self, parsed, sigmaparser):
         result = self.generateNode(parsed.parsedSearch)
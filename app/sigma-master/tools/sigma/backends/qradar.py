@@ -27,6 +27,8 @@ class QRadarBackend(SingleTextQueryBackend):
     """Converts Sigma rule into Qradar saved search. Contributed by SOC Prime. https://socprime.com"""
     identifier = "qradar"
     active = True
+    stateAttributes = tuple()
+    cacheableResults = True
     config_required = False
     default_config = ["sysmon", "qradar"]
     reEscape = re.compile('(")')
@@ -43,6 +45,11 @@ class QRadarBackend(SingleTextQueryBackend):
     notNullExpression = "not (%s is null)"
     mapExpression = "%s=%s"
     mapListsSpecialHandling = True
+    nodeGenerators = {
+            **SingleTextQueryBackend.nodeGenerators,
+            str: "generateKeywordNode",       # values without field name
+            int: "generateKeywordNode",
+            }
     aql_database = "events"
 
     def cleanKey(self, key):
@@ -58,27 +65,8 @@ class QRadarBackend(SingleTextQueryBackend):
         """Remove quotes in text"""
         return value.replace("\'","\\\'")
 
-    def generateNode(self, node):
-        if type(node) == sigma.parser.condition.ConditionAND:
-            return self.generateANDNode(node)
-        elif type(node) == sigma.parser.condition.ConditionOR:
-            return self.generateORNode(node)
-        elif type(node) == sigma.parser.condition.ConditionNOT:
-            return self.generateNOTNode(node)
-        elif type(node) == sigma.parser.condition.ConditionNULLValue:
-            return self.generateNULLValueNode(node)
-        elif type(node) == sigma.parser.condition.ConditionNotNULLValue:
-            return self.generateNotNULLValueNode(node)
-        elif type(node) == sigma.parser.condition.NodeSubexpression:
-            return self.generateSubexpressionNode(node)
-        elif type(node) == tuple:
-            return self.generateMapItemNode(node)
-        elif type(node) in (str, int):
-            return self.generateValueNode(node, False)
-        elif type(node) == list:
-            return self.generateListNode(node)
-        else:
-            raise TypeError("Node type %s was not expected in Sigma parse tree" % (str(type(node))))
+    def generateKeywordNode(self, node):
+        return self.generateValueNode(node, False)
 
 
     def generateMapItemNode(self, node):
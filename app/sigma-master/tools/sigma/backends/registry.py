@@ -0,0 +1,57 @@
+# Sigma backend registry
+# Generated by sigma_backend_registry from the backend modules, don't edit. Rebuild it after adding,
+# renaming or removing backends.
+
+backends = {
+    'ala': ('sigma.backends.ala', 'AzureLogAnalyticsBackend', 'Converts Sigma rule into Azure Log Analytics Queries.'),
+    'ala-rule': ('sigma.backends.ala', 'AzureAPIBackend', 'Converts Sigma rule into Azure Log Analytics Rule.'),
+    'arcsight': ('sigma.backends.arcsight', 'ArcSightBackend', 'Converts Sigma rule into ArcSight saved search. Contributed by SOC Prime. https://socprime.com'),
+    'arcsight-esm': ('sigma.backends.arcsight', 'ArcSightESMBackend', 'Converts Sigma rule into ArcSight ESM saved search. Contributed by SOC Prime. https://socprime.com'),
+    'athena': ('sigma.backends.athena', 'SQLBackend', 'Converts Sigma rule into SQL query'),
+    'carbonblack': ('sigma.backends.carbonblack', 'CarbonBlackQueryBackend', 'Converts Sigma rule into CarbonBlack query string. Only searches, no aggregations. Contributed by SOC Prime. https://socprime.com'),
+    'chronicle': ('sigma.backends.chronicle', 'ChronicleBackend', 'Converts Sigma rule into Google Chronicle YARA-L. Contributed by SOC Prime. https://socprime.com'),
+    'crowdstrike': ('sigma.backends.splunk', 'CrowdStrikeBackend', 'Converts Sigma rule into CrowdStrike Search Processing Language (SPL).'),
+    'csharp': ('sigma.backends.csharp', 'CSharpBackend', 'Converts Sigma rule into CSharp Regex in LINQ query.'),
+    'devo': ('sigma.backends.devo', 'DevoBackend', 'Converts Sigma rule into Devo query.'),
+    'ee-outliers': ('sigma.backends.ee-outliers', 'OutliersBackend', 'Converts Sigma rule into ee-outliers'),
+    'elastalert': ('sigma.backends.elasticsearch', 'ElastalertBackendQs', 'Converts Sigma rule into ElastAlert QS query'),
+    'elastalert-dsl': ('sigma.backends.elasticsearch', 'ElastalertBackendDsl', 'Converts Sigma rule into ElastAlert DSL query'),
+    'es-dsl': ('sigma.backends.elasticsearch', 'ElasticsearchDSLBackend', 'Converts Sigma rule into Elasticsearch DSL query'),
+    'es-eql': ('sigma.backends.elasticsearch', 'ElasticsearchEQLBackend', 'Converts Sigma rule into Elasticsearch EQL query.'),
+    'es-qs': ('sigma.backends.elasticsearch', 'ElasticsearchQuerystringBackend', 'Converts Sigma rule into Elasticsearch query string. Only searches, no aggregations.'),
+    'es-qs-lr': ('sigma.backends.elasticsearch', 'ElasticsearchQuerystringBackendLogRhythm', 'Converts Sigma rule into Lucene query string for LogRhythm. Only searches, no aggregations.'),
+    'es-rule': ('sigma.backends.elasticsearch', 'ElasticSearchRuleQsBackend', 'Converts Sigma rule into Elastic SIEM lucene query'),
+    'es-rule-eql': ('sigma.backends.elasticsearch', 'ElasticSearchRuleEqlBackend', 'Converts Sigma rule into Elastic SIEM EQL query'),
+    'fieldlist': ('sigma.backends.tools', 'FieldnameListBackend', 'List all fieldnames from given Sigma rules for creation of a field mapping configuration.'),
+    'fireeye-helix': ('sigma.backends.fireeye-helix', 'FireEyeHelixBackend', 'Converts Sigma rule into FireEye Helix Query Language.'),
+    'graylog': ('sigma.backends.graylog', 'GraylogQuerystringBackend', 'Converts Sigma rule into Graylog query string. Only searches, no aggregations.'),
+    'grep': ('sigma.backends.misc', 'GrepBackend', "Generates Perl compatible regular expressions and puts 'grep -P' around it"),
+    'hawk': ('sigma.backends.hawk', 'HAWKBackend', 'Converts Sigma rule into HAWK search'),
+    'humio': ('sigma.backends.humio', 'HumioBackend', 'Converts Sigma rule into Humio query. Contributed by SOC Prime. https://socprime.com'),
+    'kibana': ('sigma.backends.elasticsearch', 'KibanaBackend', 'Converts Sigma rule into Kibana JSON Configuration files (searches only).'),
+    'kibana-ndjson': ('sigma.backends.elasticsearch', 'KibanaNdjsonBackend', 'Converts Sigma rule into Kibana JSON Configuration files (searches only).'),
+    'lacework': ('sigma.backends.lacework', 'LaceworkBackend', 'Converts Sigma rule into Lacework Policy Platform'),
+    'limacharlie': ('sigma.backends.limacharlie', 'LimaCharlieBackend', 'Converts Sigma rule into LimaCharlie D&R rules. Contributed by LimaCharlie. https://limacharlie.io'),
+    'logiq': ('sigma.backends.logiq', 'LogiqBackend', 'Converts Sigma rule into LOGIQ event rule api payload '),
+    'logpoint': ('sigma.backends.logpoint', 'LogPointBackend', 'Converts Sigma rule into LogPoint query'),
+    'mdatp': ('sigma.backends.mdatp', 'WindowsDefenderATPBackend', 'Converts Sigma rule into Microsoft Defender ATP Hunting Queries.'),
+    'netwitness': ('sigma.backends.netwitness', 'NetWitnessBackend', 'Converts Sigma rule into NetWitness saved search. Contributed by @tuckner'),
+    'netwitness-epl': ('sigma.backends.netwitness-epl', 'NetWitnessEplBackend', 'Converts Sigma rule into RSA NetWitness EPL . Contributed by @snake-jump'),
+    'opensearch-monitor': ('sigma.backends.opensearch', 'OpenSearchQsBackend', '\n    Backend class containing the identifier for the -t argument. Can inherit from ElasticsearchQuerystringBackend\n    since query string in both OpenSearch monitors and ElasticRule are in Elastic Common Schema.\n    '),
+    'powershell': ('sigma.backends.powershell', 'PowerShellBackend', 'Converts Sigma rule into PowerShell event log cmdlets.'),
+    'qradar': ('sigma.backends.qradar', 'QRadarBackend', 'Converts Sigma rule into Qradar saved search. Contributed by SOC Prime. https://socprime.com'),
+    'qualys': ('sigma.backends.qualys', 'QualysBackend', 'Converts Sigma rule into Qualys saved search. Contributed by SOC Prime. https://socprime.com'),
+    'sentinel-rule': ('sigma.backends.ala', 'SentinelBackend', 'Converts Sigma rule into Azure Sentinel scheduled alert rule ARM template.'),
+    'splunk': ('sigma.backends.splunk', 'SplunkBackend', 'Converts Sigma rule into Splunk Search Processing Language (SPL).'),
+    'splunkdm': ('sigma.backends.splunkdm', 'SplunkDMBackend', ' (Experimental) Converts Sigma rule into a Splunk syntax leveraging Datamodel acceleration when possible (rolls back to standard SPL query if necessary)'),
+    'splunkxml': ('sigma.backends.splunk', 'SplunkXMLBackend', 'Converts Sigma rule into XML used for Splunk Dashboard Panels'),
+    'sql': ('sigma.backends.sql', 'SQLBackend', 'Converts Sigma rule into SQL query'),
+    'sqlite': ('sigma.backends.sqlite', 'SQLiteBackend', 'Converts Sigma rule into SQL query for SQLite'),
+    'stix': ('sigma.backends.stix', 'STIXBackend', 'Converts Sigma rule into STIX pattern.'),
+    'sumologic': ('sigma.backends.sumologic', 'SumoLogicBackend', 'Converts Sigma rule into SumoLogic query. Contributed by SOC Prime. https://socprime.com'),
+    'sumologic-cse': ('sigma.backends.sumologic', 'SumoLogicCSE', 'Converts Sigma rule into SumoLogic CSE query. Contributed by SOC Prime. https://socprime.com'),
+    'sumologic-cse-rule': ('sigma.backends.sumologic', 'SumoLogicCSERule', 'Converts Sigma rule into SumoLogic CSE query'),
+    'sysmon': ('sigma.backends.sysmon', 'SysmonConfigBackend', 'Converts Sigma rule into sysmon XML configuration'),
+    'uberagent': ('sigma.backends.uberagent', 'uberAgentBackend', "Converts Sigma rule into uberAgent ESA's process tagging rules."),
+    'xpack-watcher': ('sigma.backends.elasticsearch', 'XPackWatcherBackend', 'Converts Sigma Rule into X-Pack Watcher JSON for alerting'),
+}
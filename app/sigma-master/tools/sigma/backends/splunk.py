@@ -23,6 +23,8 @@ class SplunkBackend(SingleTextQueryBackend):
     """Converts Sigma rule into Splunk Search Processing Language (SPL)."""
     identifier = "splunk"
     active = True
+    stateAttributes = tuple()
+    cacheableResults = True
     index_field = "index"
 
     # \   -> \\
@@ -42,6 +44,7 @@ class SplunkBackend(SingleTextQueryBackend):
     mapExpression = "%s=%s"
     mapListsSpecialHandling = True
     mapListValueExpression = "%s IN %s"
+    generationCacheState = ()
 
     def generateMapItemListNode(self, key, value):
         if not set([type(val) for val in value]).issubset({str, int}):
@@ -125,6 +128,7 @@ class SplunkXMLBackend(SingleTextQueryBackend, MultiRuleOutputMixin):
                "<label></label><default><earliest>-24h@h</earliest><latest>now</latest></default></input></fieldset>"
     dash_suf = "</form>"
     queries = dash_pre
+    stateAttributes = ("queries",)
 
 
     reEscape = re.compile('("|(?<!\\\\)\\\\(?![*?\\\\]))')
@@ -141,6 +145,7 @@ class SplunkXMLBackend(SingleTextQueryBackend, MultiRuleOutputMixin):
     mapExpression = SplunkBackend.mapExpression
     mapListsSpecialHandling = SplunkBackend.mapListsSpecialHandling
     mapListValueExpression = SplunkBackend.mapListValueExpression
+    generationCacheState = SplunkBackend.generationCacheState
 
     def generateMapItemListNode(self, key, value):
         return "(" + (" OR ".join(['%s=%s' % (key, self.generateValueNode(item)) for item in value])) + ")"
@@ -168,6 +173,9 @@ class SplunkXMLBackend(SingleTextQueryBackend, MultiRuleOutputMixin):
                 self.queries += query
                 self.queries += self.panel_suf
 
+    def getState(self):
+        return { "queries": self.queries[len(self.dash_pre):] }
+
     def finalize(self):
         self.queries += self.dash_suf
         return self.queries
@@ -175,6 +183,7 @@ class SplunkXMLBackend(SingleTextQueryBackend, MultiRuleOutputMixin):
 class CrowdStrikeBackend(SplunkBackend):
     """Converts Sigma rule into CrowdStrike Search Processing Language (SPL)."""
     identifier = "crowdstrike"
+    cacheableResults = True
 
     def generate(self, sigmaparser):
         lgs = sigmaparser.parsedyaml.get("logsource")
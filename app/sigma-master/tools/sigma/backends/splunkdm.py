@@ -25,6 +25,8 @@ class SplunkDMBackend(SingleTextQueryBackend):
     """ (Experimental) Converts Sigma rule into a Splunk syntax leveraging Datamodel acceleration when possible (rolls back to standard SPL query if necessary)"""
     identifier = "splunkdm"
     active = True
+    stateAttributes = tuple()
+    cacheableResults = True
     index_field = "index"
 
     # \   -> \\
@@ -59,6 +61,8 @@ class SplunkDMBackend(SingleTextQueryBackend):
             raise Exception("[!] Failure to convert sigma rule: No Datamodel found that is corresponding to target sigma rule")
 
     def addDatamodel(self, sigmaparser):
+        # don't use the datamodel of the previous rule if none can be resolved for this one
+        self.datamodel = self.dataset = None
         try:
             self.datamodel = self.backend_options['datamodel']
             self.dataset = self.backend_options['dataset']
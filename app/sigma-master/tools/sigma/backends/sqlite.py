@@ -22,8 +22,12 @@ class SQLiteBackend(SQLBackend):
     """Converts Sigma rule into SQL query for SQLite"""
     identifier = "sqlite"
     active = True
+    cacheableResults = True
 
     mapFullTextSearch = "%s MATCH ('\"%s\"')"
+    escapeRules = (
+            (r'"', r'""'),                               # double quotes are escaped by doubling them in SQLite
+            ) + SQLBackend.escapeRules
 
     countFTS = 0
 
@@ -70,30 +74,6 @@ class SQLiteBackend(SQLBackend):
         else:
             return None
             
-    def cleanValue(self, val):
-        if not isinstance(val, str):
-            return str(val)
-
-        #Escape double quotes in SQLite
-        val = val.replace('"','""')
-
-        #Single backlashes which are not in front of * or ? are doulbed
-        val = re.sub(r"(?<!\\)\\(?!(\\|\*|\?))", r"\\\\", val)
-
-        #Replace _ with \_ because _ is a sql wildcard
-        val = re.sub(r'_', r'\_', val)
-
-        #Replace % with \% because % is a sql wildcard
-        val = re.sub(r'%', r'\%', val)
-
-        #Replace * with %, if even number of backslashes (or zero) in front of *
-        val = re.sub(r"(?<!\\)(\\\\)*(?!\\)\*", r"\1%", val)
-
-        #Replace ? with _, if even number of backsashes (or zero) in front of ?
-        val = re.sub(r"(?<!\\)(\\\\)*(?!\\)\?", r"\1_", val)
-
-        return val
-
     def generateMapItemNode(self, node):
         try:
             self.mappingItem = True
@@ -8,6 +8,8 @@ class STIXBackend(SingleTextQueryBackend):
     """Converts Sigma rule into STIX pattern."""
     identifier = "stix"
     active = True
+    stateAttributes = tuple()
+    cacheableResults = True
     andToken = " AND "
     orToken = " OR "
     notToken = "NOT "
@@ -35,6 +35,8 @@ class SumoLogicBackend(SingleTextQueryBackend):
     """Converts Sigma rule into SumoLogic query. Contributed by SOC Prime. https://socprime.com"""
     identifier = "sumologic"
     active = True
+    stateAttributes = tuple()
+    cacheableResults = True
     config_required = False
     default_config = ["sysmon", "sumologic"]
 
@@ -292,6 +294,7 @@ class SumoLogicCSE(SumoLogicBackend):
     """Converts Sigma rule into SumoLogic CSE query. Contributed by SOC Prime. https://socprime.com"""
     identifier = "sumologic-cse"
     active = True
+    cacheableResults = True
     config_required = False
     default_config = ["sysmon"]
 
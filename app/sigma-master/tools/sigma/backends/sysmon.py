@@ -11,6 +11,8 @@ class SysmonConfigBackend(SingleTextQueryBackend, MultiRuleOutputMixin):
     """Converts Sigma rule into sysmon XML configuration"""
     identifier = "sysmon"
     active = True
+    stateAttributes = tuple()
+    cacheableResults = True
     andToken = " AND "
     orToken = " OR "
     notToken = "NOT "
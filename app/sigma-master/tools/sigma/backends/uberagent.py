@@ -8,8 +8,6 @@ from sigma.parser.modifiers.transform import SigmaContainsModifier, SigmaStartsw
 from sigma.parser.modifiers.type import SigmaRegularExpressionModifier
 from ..parser.modifiers.base import SigmaTypeModifier
 
-gUnsupportedCategories = {}
-
 
 def convert_sigma_level_to_uberagent_risk_score(level):
     """Converts the given Sigma rule level to uberAgent ESA RiskScore property."""
@@ -48,11 +46,6 @@ def convert_sigma_category_to_uberagent_event_type(category):
     if category in categories:
         return categories[category]
 
-    if category in gUnsupportedCategories:
-        gUnsupportedCategories[category] += 1
-    else:
-        gUnsupportedCategories[category] = 1
-
     return None
 
 
@@ -294,6 +287,14 @@ class uberAgentBackend(SingleTextQueryBackend):
     mapExpression = "%s == %s"
     mapListsSpecialHandling = True
     mapListValueExpression = "%s in %s"
+    escapeRules = (
+            (r"(?<!\\)\\(?!(\\|\*|\?))", r"\\\\"),       # single backslashes which are not in front of * or ? are doubled
+            (r"_", r"\_"),                                 # _ is a SQL wildcard
+            (r"%", r"\%"),                                 # % is a SQL wildcard
+            (r'"', r'\"'),                                 # " is a string literal symbol and must be escaped
+            (r"(?<!\\)(\\\\)*(?!\\)\*", r"\1%"),           # * is replaced with % if even number of backslashes (or zero) in front of it
+            (r"(?<!\\)(\\\\)*(?!\\)\?", r"\1_"),           # ? is replaced with _ if even number of backslashes (or zero) in front of it
+            )
 
     # Syntax for swapping wildcard conditions: Adding \ as escape character
     # Wildcard conditions are based on modifiers such as contains,
@@ -390,7 +391,22 @@ class uberAgentBackend(SingleTextQueryBackend):
         "details"
     ]
 
-    rules = []
+    stateAttributes = ("rules", "unsupportedCategories")
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.rules = []
+        self.unsupportedCategories = {}     # category -> number of rules
+
+    def mergeState(self, state):
+        """Merge state, the counts of unsupported categories are summed."""
+        state = dict(state)
+        counts = state.pop("unsupportedCategories", dict())
+        if not super().mergeState(state):
+            return False
+        for category, count in counts.items():
+            self.unsupportedCategories[category] = self.unsupportedCategories.get(category, 0) + count
+        return True
 
     def fieldNameMapping(self, fieldname, value):
         key = fieldname.lower()
@@ -421,6 +437,7 @@ class uberAgentBackend(SingleTextQueryBackend):
 
         # Do not generate a rule if the given category is unsupported by now.
         if not is_sigma_category_supported(category):
+            self.unsupportedCategories[category] = self.unsupportedCategories.get(category, 0) + 1
             return ""
 
         # We support windows rules and generic rules that don't have a specific product specifier - such as DNS.
@@ -479,9 +496,9 @@ class uberAgentBackend(SingleTextQueryBackend):
                                                                                                         count_medium,
                                                                                                         count_low))
 
-        print("There are %d unsupported categories." % len(gUnsupportedCategories))
-        for category in gUnsupportedCategories:
-            print("Category %s has %d unsupported rules." % (category, gUnsupportedCategories[category]))
+        print("There are %d unsupported categories." % len(self.unsupportedCategories))
+        for category in self.unsupportedCategories:
+            print("Category %s has %d unsupported rules." % (category, self.unsupportedCategories[category]))
 
     def generateTypedValueNode(self, node):
         raise IgnoreTypedModifierException()
@@ -519,22 +536,4 @@ class uberAgentBackend(SingleTextQueryBackend):
     def cleanValue(self, val):
         if not isinstance(val, str):
             return str(val)
-
-        # Single backlashes which are not in front of * or ? are doubled
-        val = re.sub(r"(?<!\\)\\(?!(\\|\*|\?))", r"\\\\", val)
-
-        # Replace _ with \_ because _ is a sql wildcard
-        val = re.sub(r'_', r'\_', val)
-
-        # Replace % with \% because % is a sql wildcard
-        val = re.sub(r'%', r'\%', val)
-
-        # Replace " with \" because " is a string literal symbol and must be escaped
-        val = re.sub(r'"', r'\"', val)
-
-        # Replace * with %, if even number of backslashes (or zero) in front of *
-        val = re.sub(r"(?<!\\)(\\\\)*(?!\\)\*", r"\1%", val)
-
-        # Replace ? with _, if even number of backslashes (or zero) in front of ?
-        val = re.sub(r"(?<!\\)(\\\\)*(?!\\)\?", r"\1_", val)
-        return val
+        return super().cleanValue(val)
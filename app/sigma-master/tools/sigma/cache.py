@@ -0,0 +1,171 @@
+# Cache of conversion results
+# Copyright 2016-2019 Thomas Patzke, Florian Roth
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import collections
+import datetime
+import hashlib
+import io
+import json
+import os
+import pickle
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+CACHE_FORMAT = 1            # increased on incompatible changes of the cache entries
+
+CachedResult = collections.namedtuple("CachedResult", ("results", "error", "stdout", "stderr", "metadata", "duration"))
+CachedResult.__doc__ = """
+Outcome of the conversion of a Sigma file: list of results or exception, output of the backend to stdout and stderr,
+rule metadata for formatted output and conversion time in seconds.
+"""
+
+def open_content(content):
+    """Return text stream of Sigma file content given as bytes, like a Sigma file opened by sigmac."""
+    return io.TextIOWrapper(io.BytesIO(content), encoding="utf-8")
+
+def get_code_fingerprint(backend_class):
+    """
+    Return fingerprint of the code that determines the results of a backend: the modules of the backend class and its
+    base classes and the parser and configuration modules of Sigma. Backends have no version numbers, changes of the
+    code replace them.
+    """
+    sigma_path = Path(__file__).parent
+    paths = { Path(sys.modules[cls.__module__].__file__) for cls in backend_class.__mro__ if cls.__module__.startswith("sigma.") }
+    paths.update(sigma_path.glob("parser/**/*.py"))
+    paths.update(sigma_path.glob("config/*.py"))
+    paths.update([ sigma_path / "configuration.py", sigma_path / "filter.py" ])
+    digest = hashlib.sha256()
+    for path in sorted(paths):
+        digest.update(str(path.relative_to(sigma_path)).encode() + b"\0")
+        digest.update(path.read_bytes() + b"\0")
+    return digest.hexdigest()
+
+def get_options_fingerprint(options):
+    """Return fingerprint of normalized backend options, independent from their order."""
+    return hashlib.sha256(json.dumps(options, sort_keys=True, default=str).encode()).hexdigest()
+
+class SigmaResultCache(object):
+    """
+    Directory of conversion results of Sigma files for one target. The results of a Sigma file are stored by the
+    hash of its content in a subdirectory identified by the backend, its code, the backend options, the configuration
+    chain and the rule filter. A cached result is replayed instead of parsing and converting an unchanged Sigma file.
+    The path of the Sigma file is part of the hash, as rules and results can contain the file name.
+
+    Only backends that convert each rule independently and don't collect output for finalize() can be cached. The
+    results are stored as pickles, therefore the cache directory must not be writable by untrusted users.
+    """
+    def __init__(self, path, target, backend_class, config_fingerprint, options_fingerprint, rulefilter=None):
+        key = [ str(CACHE_FORMAT), target, get_code_fingerprint(backend_class), config_fingerprint or "", options_fingerprint, rulefilter or "" ]
+        if rulefilter and "inlastday" in rulefilter:          # filter result depends on current date
+            key.append(datetime.date.today().isoformat())
+        self.path = Path(path) / hashlib.sha256("\0".join(key).encode()).hexdigest()
+        self.hits = 0
+        self.misses = 0
+        self.saved = 0.0            # conversion time of cache hits in seconds
+        self.errors = 0             # number of results that couldn't be stored
+
+    @staticmethod
+    def is_cacheable(backend_class):
+        """
+        Results of backends whose state can be merged, that don't collect state for finalize() and whose class
+        declares its results as cacheable can be cached.
+        """
+        return backend_class.isMergeable() and not backend_class.stateAttributes and backend_class.__dict__.get("cacheableResults", False)
+
+    @staticmethod
+    def get_key(sigmafile, content):
+        return hashlib.sha256(str(sigmafile).encode() + b"\0" + content).hexdigest()
+
+    def get_path(self, key):
+        return self.path / key[:2] / (key + ".pickle")
+
+    def load(self, sigmafile, content, metadata=False):
+        """
+        Return cached result of Sigma file with given content (bytes) or None if it is not cached. Successful results
+        without rule metadata are only returned if metadata is not required.
+        """
+        key = self.get_key(sigmafile, content)
+        path = self.get_path(key)
+        try:
+            with path.open("rb") as f:
+                stored_key, result = pickle.load(f)
+        except Exception:           # missing, unreadable or outdated cache entry
+            result = None
+        else:
+            if stored_key != key or not isinstance(result, CachedResult) or (metadata and result.error is None and result.metadata is None):
+                result = None
+        if result is None:
+            self.misses += 1
+            return None
+        try:
+            os.utime(str(path))     # entries that are used are kept by the garbage collection
+        except OSError:
+            pass
+        self.hits += 1
+        self.saved += result.duration
+        return result
+
+    def store(self, sigmafile, content, result):
+        """Store result of Sigma file with given content (bytes)."""
+        key = self.get_key(sigmafile, content)
+        path = self.get_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmppath = tempfile.mkstemp(dir=str(path.parent), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump((key, result), f, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmppath, str(path))      # atomic replacement for concurrent conversions
+        except BaseException:
+            os.unlink(tmppath)
+            raise
+
+    def get_stats(self):
+        lookups = self.hits + self.misses
+        return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitrate": self.hits / lookups if lookups else 0.0,
+                "saved": self.saved,
+                "errors": self.errors,
+                }
+
+def collect_garbage(path, max_age):
+    """
+    Remove cache entries below path that weren't used for max_age days and empty directories. Cache entries are
+    touched when they are used. Returns the number of removed entries and their size in bytes.
+    """
+    removed = 0
+    size = 0
+    limit = time.time() - max_age * 86400
+    for dirpath, dirnames, filenames in os.walk(str(path), topdown=False):
+        for filename in filenames:
+            filepath = os.path.join(dirpath, filename)
+            try:
+                stat = os.stat(filepath)
+                if stat.st_mtime < limit:
+                    os.unlink(filepath)
+                    removed += 1
+                    size += stat.st_size
+            except OSError:
+                pass
+        if dirpath != str(path):
+            try:
+                os.rmdir(dirpath)       # only succeeds for empty directories
+            except OSError:
+                pass
+    return removed, size
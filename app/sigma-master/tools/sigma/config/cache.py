@@ -0,0 +1,68 @@
+# Cache of compiled Sigma configuration chains
+# Copyright 2016-2018 Thomas Patzke, Florian Roth
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import pickle
+import tempfile
+from pathlib import Path
+from sigma.configuration import SigmaConfigurationChain
+
+class SigmaConfigurationCache(object):
+    """
+    Directory of compiled Sigma configuration chains stored by their fingerprint. A cached chain is loaded with
+    one read instead of parsing and merging all configurations of the chain.
+
+    The chains are stored as pickles, therefore the cache directory must not be writable by untrusted users.
+    """
+    def __init__(self, path):
+        self.path = Path(path)
+
+    def get_path(self, fingerprint):
+        return self.path / (fingerprint + ".pickle")
+
+    def load(self, fingerprint):
+        """Return cached compiled configuration chain with given fingerprint or None if it is not cached."""
+        try:
+            with self.get_path(fingerprint).open("rb") as f:
+                chain = pickle.load(f)
+        except Exception:           # missing, unreadable or outdated cache entry
+            return None
+        if not isinstance(chain, SigmaConfigurationChain) or chain.get_fingerprint() != fingerprint:
+            return None
+        try:
+            os.utime(str(self.get_path(fingerprint)))       # entries that are used are kept by the garbage collection
+        except OSError:
+            pass
+        return chain
+
+    def store(self, chain):
+        """
+        Compile configuration chain if required and store it in the cache. The chain should be stored before it is
+        used for conversions. Returns the fingerprint of the chain.
+        """
+        if chain.fieldmappingtable is None or chain.logsourceindex is None:
+            chain.compile()
+        fingerprint = chain.get_fingerprint()
+        self.path.mkdir(parents=True, exist_ok=True)
+        fd, tmppath = tempfile.mkstemp(dir=str(self.path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(chain, f, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmppath, str(self.get_path(fingerprint)))     # atomic replacement for concurrent conversions
+        except BaseException:
+            os.unlink(tmppath)
+            raise
+        return fingerprint
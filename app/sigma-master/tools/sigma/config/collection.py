@@ -18,7 +18,9 @@ from collections.abc import Iterable
 from pathlib import Path
 import sys
 import re
-from sigma.configuration import SigmaConfiguration
+import yaml
+from sigma.configuration import SigmaConfiguration, SigmaConfigurationChain
+from sigma.parser.collection import load_yaml_attributes
 from sigma.config.exceptions import SigmaConfigParseError
 
 class SigmaConfigurationManager(object):
@@ -27,6 +29,7 @@ class SigmaConfigurationManager(object):
     about them.
     """
     re_identifier = re.compile("^[\\w-]+$")
+    header_attributes = ("title", "backends", "order")
     def __init__(self, paths=None):
         """
         Initialize configuration collection. If paths is not given, some default locations are used:
@@ -55,35 +58,90 @@ class SigmaConfigurationManager(object):
         else:
             raise TypeError("None or iterable of strings expected as paths")
 
-        self.configs = dict()
+        self.configs = dict()           # identifier -> parsed configuration, filled on get()
+        self.config_paths = dict()      # identifier -> path of discovered configuration
+        self.headers = dict()           # identifier -> header attributes
         self.errors = list()
         self.update()
 
     def update(self):
-        """Update configurations"""
+        """Update configurations. Only the paths are discovered here, configurations are parsed on first use."""
         self.configs.clear()
+        self.config_paths.clear()
+        self.headers.clear()
         self.errors.clear()
         for path in reversed(self.paths):       # Configs from first paths override latter ones
             for conf_path in path.glob("**/*.yml"):
-                try:
-                    f = conf_path.open()
-                    self.configs[conf_path.stem] = SigmaConfiguration(f)
-                    f.close()
-                except (SigmaConfigParseError, OSError) as e:
-                    self.errors.append((conf_path, e))
+                self.config_paths[conf_path.stem] = conf_path
+
+    def header(self, name):
+        """
+        Return the header attributes title, backends and order of a discovered configuration without parsing the
+        whole configuration. Returns None if the configuration can't be read.
+        """
+        try:
+            return self.headers[name]
+        except KeyError:
+            pass
+        try:
+            if name in self.configs:
+                config = self.configs[name].config
+            else:
+                content = self.config_paths[name].read_text()
+                config = load_yaml_attributes(content, self.header_attributes)
+                if config is None:      # fall back to complete YAML parsing
+                    config = yaml.safe_load(content)
+            header = { attribute: config.get(attribute) for attribute in self.header_attributes }
+        except (OSError, yaml.YAMLError, AttributeError) as e:
+            self.errors.append((self.config_paths[name], e))
+            header = None
+        self.headers[name] = header
+        return header
 
     def list(self):
         """Returns a list of (identifier, title) tuples of found configurations."""
-        return [ (conf_id, config.config.setdefault("title", ""), config.config.setdefault("backends", list())) for conf_id, config in self.configs.items() ]
+        return [
+                (conf_id, header["title"] or "", header["backends"] or list())
+                for conf_id, header in ((conf_id, self.header(conf_id)) for conf_id in self.config_paths)
+                if header is not None
+            ]
 
     def get(self, name):
         """
         Return a config by identifier or file path. First, it tries to resolve identifier from
         discovered configurations (file name stem). If this fails, the parameter value is treated
-        as file name.
+        as file name. Discovered configurations are parsed on first use.
         """
-        try:                # Lookup in discovered configurations
+        try:                # Lookup in parsed configurations
             return self.configs[name]
+        except KeyError:
+            pass
+
+        try:                # Lookup in discovered configurations
+            conf_path = self.config_paths[name]
         except KeyError:    # identifier not found, try with filename
             f = open(name)
             return SigmaConfiguration(f)
+
+        try:
+            with conf_path.open() as f:
+                config = SigmaConfiguration(f)
+        except (SigmaConfigParseError, OSError) as e:
+            self.errors.append((conf_path, e))
+            raise
+        self.configs[name] = config
+        return config
+
+    def get_fingerprint(self, names):
+        """
+        Return fingerprint of the configuration chain built from the configurations with given identifiers or file
+        paths in given order. Only the contents are read, the configurations are not parsed.
+        """
+        fingerprints = list()
+        for name in names:
+            if name in self.configs:
+                fingerprints.append(self.configs[name].fingerprint)
+            else:
+                path = self.config_paths.get(name, Path(name))
+                fingerprints.append(SigmaConfiguration.get_content_fingerprint(path.read_text()))
+        return SigmaConfigurationChain.combine_fingerprints(fingerprints)
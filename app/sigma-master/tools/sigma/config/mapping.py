@@ -107,7 +107,11 @@ class ConditionalFieldMapping(SimpleFieldMapping):
             self.conditions[field][value].extend(target)
 
     def _targets(self, sigmaparser):
-        # build list of matching target mappings
+        # build list of matching target mappings, memoized per rule as the rule values don't change after parsing
+        try:
+            return set(sigmaparser.fieldmappingtargets[self])
+        except KeyError:
+            pass
         targets = set()
         for condfield in self.conditions:
             if condfield in sigmaparser.values:
@@ -115,6 +119,7 @@ class ConditionalFieldMapping(SimpleFieldMapping):
                 for condvalue in self.conditions[condfield]:
                     if condvalue in rulefieldvalues:
                         targets.update(self.conditions[condfield][condvalue])
+        sigmaparser.fieldmappingtargets[self] = frozenset(targets)
         return targets
 
     def resolve(self, key, value, sigmaparser):
@@ -14,9 +14,11 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import hashlib
+import itertools
 import yaml
-from sigma.parser.condition import ConditionAND, ConditionOR
-from sigma.config.exceptions import SigmaConfigParseError
+from sigma.parser.condition import ConditionAND, ConditionOR, SigmaConditionOptimizer
+from sigma.config.exceptions import SigmaConfigParseError, FieldMappingError
 from sigma.config.mapping import FieldMapping, FieldMappingChain
 
 # Chain of multiple configurations
@@ -25,14 +27,22 @@ class SigmaConfigurationChain(list):
     Chain of SigmaConfiguration objects. Behaves like a list of Sigma configuration objects on the one side and
     like a SigmaConfiguration object on the other. All methods are applied to the given parameters in the order
     of addition of the configurations.
+
+    The compiled state of a chain (field mapping table and log source index) only depends on the contents of the
+    contained configurations, which are identified by the fingerprint of the chain. A compiled chain can be
+    serialized without its backend and reused for further conversions with the same configurations.
     """
+    format_version = 1          # increase on changes of the compiled state, invalidates serialized chains
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.backend = None
         self.defaultindex = None
         self.config = dict()
         self.fieldmappings = dict()
-        self.logsources = dict()
+        self.fieldmappingtable = None       # compiled lookup table from source field names to field mapping chains
+        self.logsourceindex = None          # (category, product, service) with None as wildcard -> [ (position in chain, log source) ]
+        self.logsourcecache = dict()        # (category, product, service) -> merged log source configuration
 
         for config in self:
             self.postprocess_config(config)
@@ -45,9 +55,45 @@ class SigmaConfigurationChain(list):
         self.defaultindex = config.defaultindex
         self.config.update(config.config)
         self.fieldmappings.update(config.fieldmappings)
-        self.logsources.update(config.logsources)
+        self.fieldmappingtable = None
+        self.logsourceindex = None
+        self.logsourcecache = dict()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["backend"] = None
+        return state
+
+    @classmethod
+    def combine_fingerprints(cls, fingerprints):
+        """Return fingerprint of a chain from the fingerprints of its configurations in chain order."""
+        digest = hashlib.sha256(("SigmaConfigurationChain %d" % cls.format_version).encode())
+        for fingerprint in fingerprints:
+            digest.update(b"\0" + (fingerprint or "").encode())
+        return digest.hexdigest()
+
+    def get_fingerprint(self):
+        """Return fingerprint that identifies the contained configurations and the format of the compiled state."""
+        return self.combine_fingerprints(config.fingerprint for config in self)
+
+    def compile(self):
+        """Parse log source definitions of all configurations and compile field mapping table and log source index."""
+        self.compile_fieldmappings()
+        self.compile_logsources()
+
+    def compile_fieldmappings(self):
+        """
+        Build the lookup table from all source field names mapped by a configuration in the chain to the resolved
+        field mapping. Fields that can't be resolved are left out and raise their error on use.
+        """
+        self.fieldmappingtable = dict()
+        for fieldname in { fieldname for config in self for fieldname in config.fieldmappings }:
+            try:
+                self.fieldmappingtable[fieldname] = self.resolve_fieldmapping(fieldname)
+            except (FieldMappingError, TypeError):
+                pass
 
-    def get_fieldmapping(self, fieldname):
+    def resolve_fieldmapping(self, fieldname):
         """Return mapped fieldname by iterative application of each config stored in configuration chain."""
         if self:
             fieldmappings = FieldMappingChain(fieldname)
@@ -57,16 +103,66 @@ class SigmaConfigurationChain(list):
         else:
             return FieldMapping(fieldname)
 
-    def get_logsource(self, category, product, service):
-        """Return merged log source definition of all logosurces that match criteria across all Sigma conversion configurations in chain."""
-        matching = list()
+    def get_fieldmapping(self, fieldname):
+        """
+        Return field mapping from compiled lookup table. Field names that no configuration maps are resolved on each
+        use and not added to the table, which would otherwise grow with each field name of long-running conversions.
+        """
+        if self.fieldmappingtable is None:
+            self.compile_fieldmappings()
+        try:
+            return self.fieldmappingtable[fieldname]
+        except KeyError:
+            return self.resolve_fieldmapping(fieldname)
+
+    def compile_logsources(self):
+        """
+        Build the index from the (category, product, service) tuple of each log source definition to its positions
+        in the chain. Attributes that are not defined by a log source are None in the index key.
+        """
+        self.logsourceindex = dict()
+        position = 0
         for config in self:
+            config.parse_logsources()
             for logsource in config.logsources:
-                if logsource.matches(category, product, service):
-                    matching.append(logsource)
-                    if logsource.rewrite is not None:
-                        category, product, service = logsource.rewrite
-        return SigmaLogsourceConfiguration(matching, self.defaultindex)
+                key = (logsource.category, logsource.product, logsource.service)
+                self.logsourceindex.setdefault(key, list()).append((position, logsource))
+                position += 1
+
+    def match_logsources(self, category, product, service):
+        """
+        Return all log source definitions that match criteria across all Sigma conversion configurations in chain.
+        A rewrite in a matching definition replaces the criteria for all following definitions.
+        """
+        if self.logsourceindex is None:
+            self.compile_logsources()
+        matching = list()
+        position = 0
+        criteria = (category, product, service)
+        while True:
+            candidates = list()
+            for key in itertools.product(*[ (value, None) if type(value) == str else (None,) for value in criteria ]):     # all index keys that match criteria, definitions only contain strings
+                candidates.extend(candidate for candidate in self.logsourceindex.get(key, ()) if candidate[0] >= position)
+            candidates.sort(key=lambda candidate: candidate[0])
+            for candidate_position, logsource in candidates:
+                matching.append(logsource)
+                if logsource.rewrite is not None:       # continue after this definition with rewritten criteria
+                    criteria = logsource.rewrite
+                    position = candidate_position + 1
+                    break
+            else:
+                return matching
+
+    def get_logsource(self, category, product, service):
+        """Return merged log source definition of all logosurces that match criteria across all Sigma conversion configurations in chain."""
+        try:
+            return self.logsourcecache[(category, product, service)]
+        except KeyError:
+            logsource = SigmaLogsourceConfiguration(self.match_logsources(category, product, service), self.defaultindex)
+            self.logsourcecache[(category, product, service)] = logsource
+            return logsource
+        except TypeError:       # unhashable criteria, e.g. list in rule log source
+            return SigmaLogsourceConfiguration(self.match_logsources(category, product, service), self.defaultindex)
 
     def get_logsourcemerging(self):
         value = ''
@@ -79,6 +175,22 @@ class SigmaConfigurationChain(list):
 
         return value
 
+    def get_optimizations(self):
+        """
+        Return names of optional condition optimizer passes enabled by any configuration in chain or by the
+        'optimizations' backend option.
+        """
+        passes = set()
+        for config in self:
+            passes.update(config.get_optimizations())
+        try:
+            passes.update(SigmaConditionOptimizer.parsePasses(self.backend.backend_options.get("optimizations")))
+        except AttributeError:      # no backend or backend without options
+            pass
+        except ValueError as e:
+            raise SigmaConfigParseError("Backend option 'optimizations': " + str(e)) from e
+        return passes
+
     def set_backend(self, backend):
         """Set backend for all sigma conversion configurations in chain."""
         self.backend = backend
@@ -95,13 +207,19 @@ class SigmaConfiguration:
     """Sigma converter configuration. Contains field mappings and logsource descriptions"""
     def __init__(self, configyaml=None):
         if configyaml == None:
+            self.fingerprint = None
             self.config = None
             self.order = None
             self.fieldmappings = dict()
             self.logsources = dict()
             self.defaultindex = None
+            self.optimizations = set()
+            self.logsourcesparsed = True
             self.backend = None
         else:
+            if hasattr(configyaml, "read"):
+                configyaml = configyaml.read()
+            self.fingerprint = self.get_content_fingerprint(configyaml)
             config = yaml.safe_load(configyaml)
             self.config = config
 
@@ -120,9 +238,25 @@ class SigmaConfiguration:
             self.order = config.setdefault("order", None)
             self.defaultindex = config.setdefault('defaultindex', None)
 
+            try:
+                self.optimizations = SigmaConditionOptimizer.parsePasses(config.get('optimizations'))
+            except ValueError as e:
+                raise SigmaConfigParseError(str(e)) from e
+
             self.logsources = list()
+            self.logsourcesparsed = False
             self.backend = None
 
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["backend"] = None
+        return state
+
+    @staticmethod
+    def get_content_fingerprint(content):
+        """Return fingerprint of YAML content of a configuration."""
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
     def get_fieldmapping(self, fieldname):
         """Return mapped fieldname if mapping defined or field name given in parameter value"""
         try:
@@ -141,16 +275,26 @@ class SigmaConfiguration:
                 return self.config['logsourcemerging']
         return ''
 
+    def get_optimizations(self):
+        """Return names of optional condition optimizer passes enabled by this configuration"""
+        return self.optimizations
+
     def set_backend(self, backend):
         """Set backend. This is used by other code to determine target properties for index addressing"""
         self.backend = backend
+        self.parse_logsources()
+
+    def parse_logsources(self):
+        """Parse log source definitions from configuration. This is only done once."""
+        if self.logsourcesparsed:
+            return
         if self.config != None:
             if 'logsources' in self.config:
                 logsources = self.config['logsources']
                 if type(logsources) != dict:
                     raise SigmaConfigParseError("Logsources must be a map")
-                for name, logsource in logsources.items():
-                    self.logsources.append(SigmaLogsourceConfiguration(logsource, self.defaultindex))
+                self.logsources = [ SigmaLogsourceConfiguration(logsource, self.defaultindex) for logsource in logsources.values() ]
+        self.logsourcesparsed = True
 
     def get_indexfield(self):
         """Get index condition if index field name is configured"""
@@ -0,0 +1,338 @@
+# Evaluation of Sigma rules on events
+# Copyright 2016-2019 Thomas Patzke, Florian Roth
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Compiles the parsed conditions of Sigma rules into nested closures that match events given as dicts, e.g. parsed
+JSON log lines. Field mappings and log source conditions of the configuration are applied by the parser.
+
+Matching semantics:
+
+* Strings match the whole field value case-insensitively. * matches any number of characters and ? one character,
+  \\*, \\? and \\\\ are the literal characters.
+* Numbers and booleans match field values with the same string representation, e.g. 4688 matches "4688".
+* Lists of values match if one of the values matches, values of the event that are lists match if one item matches.
+* Values with the re modifier are searched case-sensitively in the field value as Python regular expressions.
+* null matches missing fields, None and empty strings.
+* Keywords, values without field name, match if they are contained in any value of the event.
+* Field names that are not contained in the event are looked up as dotted paths in nested dicts.
+
+Rules with aggregations or free-text search conditions of configurations can't be evaluated on single events and
+raise NotSupportedError while compiling.
+"""
+
+import re
+
+from sigma.backends.exceptions import NotSupportedError
+from sigma.configuration import SigmaConfigurationChain
+from sigma.parser.collection import SigmaCollectionParser
+from sigma.parser.condition import ConditionAND, ConditionOR, ConditionNOT, ConditionNULLValue, ConditionNotNULLValue, NodeSubexpression
+from sigma.parser.modifiers.type import SigmaRegularExpressionModifier
+
+MISSING = object()          # value of fields that are not contained in an event
+
+def wildcard_pattern(value):
+    """
+    Translate a Sigma string value into a regular expression. Returns (pattern, literal) with the unescaped value as
+    literal if it contains no wildcards, else None.
+    """
+    parts = list()
+    literal = list()
+    wildcard = False
+    i = 0
+    while i < len(value):
+        c = value[i]
+        if c == "\\" and value[i + 1:i + 2] in ("*", "?", "\\"):
+            c = value[i + 1]
+            i += 1
+        elif c == "*":
+            parts.append(".*")
+            wildcard = True
+            i += 1
+            continue
+        elif c == "?":
+            parts.append(".")
+            wildcard = True
+            i += 1
+            continue
+        parts.append(re.escape(c))
+        literal.append(c)
+        i += 1
+    return "".join(parts), None if wildcard else "".join(literal)
+
+def to_string(value):
+    """Return the string representation of an event or rule value that is matched, None for other values."""
+    valuetype = type(value)
+    if valuetype == str:
+        return value
+    elif valuetype == bool:
+        return "true" if value else "false"
+    elif valuetype in (int, float):
+        return str(value)
+    else:
+        return None
+
+def compile_getter(fieldname):
+    """Return function that returns the value of a field from an event or MISSING."""
+    if "." not in fieldname:
+        def get(event):
+            return event.get(fieldname, MISSING)
+    else:
+        path = fieldname.split(".")
+        def get(event):
+            value = event.get(fieldname, MISSING)
+            if value is MISSING:
+                value = event
+                for key in path:
+                    if type(value) != dict:
+                        return MISSING
+                    value = value.get(key, MISSING)
+            return value
+    return get
+
+def compile_value(value):
+    """
+    Return predicate on single event values (strings, numbers, None or MISSING) for a value or list of values of a
+    rule.
+    """
+    values = value if type(value) == list else [ value ]
+    exact = set()
+    patterns = list()
+    regexes = list()
+    null = False
+    for item in values:
+        if item is None:
+            null = True
+        elif isinstance(item, SigmaRegularExpressionModifier):
+            try:
+                regexes.append(re.compile(item.value))
+            except re.error as e:
+                raise NotSupportedError("Invalid regular expression '%s': %s" % (item.value, str(e)))
+        elif type(item) == list:
+            raise NotSupportedError("Nested value lists are not supported")
+        else:
+            string = to_string(item)
+            if string is None:
+                raise NotSupportedError("Values of type %s are not supported" % type(item).__name__)
+            pattern, literal = wildcard_pattern(string)
+            if literal is not None:
+                exact.add(literal.lower())
+            else:
+                patterns.append(pattern)
+    wildcard = re.compile("(?:%s)" % "|".join(patterns), re.IGNORECASE | re.DOTALL).fullmatch if patterns else None
+    searches = tuple(regex.search for regex in regexes)
+
+    if not null and not patterns and not regexes:       # most common case: plain values
+        if len(exact) == 1:
+            expected = exact.pop()
+            def match(value):
+                string = to_string(value)
+                return string is not None and string.lower() == expected
+        else:
+            exact = frozenset(exact)
+            def match(value):
+                string = to_string(value)
+                return string is not None and string.lower() in exact
+        return match
+
+    exact = frozenset(exact)
+    def match(value):
+        if value is MISSING or value is None:
+            return null
+        string = to_string(value)
+        if string is None:
+            return False
+        if null and string == "":
+            return True
+        if string.lower() in exact:
+            return True
+        if wildcard is not None and wildcard(string) is not None:
+            return True
+        for search in searches:
+            if search(string) is not None:
+                return True
+        return False
+    return match
+
+def compile_field(fieldname, value):
+    """Return predicate on events for a field/value condition."""
+    get = compile_getter(fieldname)
+    match = compile_value(value)
+    missing = match(MISSING)
+    def match_field(event):
+        value = get(event)
+        if value is MISSING:
+            return missing
+        elif type(value) == list:
+            if not value:
+                return missing
+            for item in value:
+                if match(item):
+                    return True
+            return False
+        else:
+            return match(value)
+    return match_field
+
+def compile_null(fieldname, expected):
+    """Return predicate on events that checks if a field is null (expected=True) or not null."""
+    get = compile_getter(fieldname)
+    def match_null(event):
+        value = get(event)
+        return (value is MISSING or value is None or value == "" or value == []) == expected
+    return match_null
+
+def iter_values(value):
+    """Generate strings of all values contained in an event value."""
+    valuetype = type(value)
+    if valuetype == dict:
+        for item in value.values():
+            yield from iter_values(item)
+    elif valuetype == list:
+        for item in value:
+            yield from iter_values(item)
+    else:
+        string = to_string(value)
+        if string is not None:
+            yield string
+
+def compile_keyword(value):
+    """Return predicate on events that searches a keyword in all values."""
+    string = to_string(value)
+    if string is None:
+        raise NotSupportedError("Keywords of type %s are not supported" % type(value).__name__)
+    pattern, literal = wildcard_pattern(string)
+    if literal is not None:
+        literal = literal.lower()
+        def match_keyword(event):
+            for string in iter_values(event):
+                if literal in string.lower():
+                    return True
+            return False
+    else:
+        search = re.compile(pattern, re.IGNORECASE | re.DOTALL).search
+        def match_keyword(event):
+            for string in iter_values(event):
+                if search(string) is not None:
+                    return True
+            return False
+    return match_keyword
+
+def compile_and(predicates):
+    if len(predicates) == 1:
+        return predicates[0]
+    elif len(predicates) == 2:
+        first, second = predicates
+        return lambda event: first(event) and second(event)
+    predicates = tuple(predicates)
+    def match_and(event):
+        for predicate in predicates:
+            if not predicate(event):
+                return False
+        return True
+    return match_and
+
+def compile_or(predicates):
+    if len(predicates) == 1:
+        return predicates[0]
+    elif len(predicates) == 2:
+        first, second = predicates
+        return lambda event: first(event) or second(event)
+    predicates = tuple(predicates)
+    def match_or(event):
+        for predicate in predicates:
+            if predicate(event):
+                return True
+        return False
+    return match_or
+
+def compile_node(node):
+    """Compile a node of a condition parse tree into a predicate on events."""
+    nodetype = type(node)
+    if nodetype == NodeSubexpression:
+        return compile_node(node.items)
+    elif nodetype == tuple:
+        fieldname, value = node
+        return compile_field(fieldname, value)
+    elif nodetype in (ConditionAND, ConditionOR):
+        predicates = [ compile_node(item) for item in node.items ]
+        if len(predicates) == 0:        # empty conditions are dropped by backends, they don't restrict the events
+            return lambda event: nodetype == ConditionAND
+        return compile_and(predicates) if nodetype == ConditionAND else compile_or(predicates)
+    elif nodetype == ConditionNOT:
+        predicate = compile_node(node.item)
+        return lambda event: not predicate(event)
+    elif nodetype == ConditionNotNULLValue:
+        return compile_null(node.item, False)
+    elif nodetype == ConditionNULLValue:
+        return compile_null(node.item, True)
+    elif nodetype in (str, int, float, bool):
+        return compile_keyword(node)
+    else:
+        raise NotSupportedError("Conditions of type %s can't be evaluated" % nodetype.__name__)
+
+def compile_condition(condition):
+    """Compile a parsed condition (SigmaConditionParser) into a predicate on events."""
+    if condition.parsedAgg is not None:
+        raise NotSupportedError("Aggregations can't be evaluated on single events")
+    return compile_node(condition.parsedSearch)
+
+class SigmaCompiledRule:
+    """
+    Sigma rule compiled into a predicate on events. The rule matches an event if one of its conditions matches,
+    call the compiled rule or its match method with the event.
+    """
+    def __init__(self, sigmaparser, filename=None):
+        self.parser = sigmaparser
+        self.filename = filename
+        self.title = sigmaparser.parsedyaml.get("title")
+        self.id = sigmaparser.parsedyaml.get("id")
+        self.level = sigmaparser.parsedyaml.get("level")
+        self.match = compile_or([ compile_condition(condition) for condition in sigmaparser.condparsed ])
+
+    def __call__(self, event):
+        return self.match(event)
+
+    def __repr__(self):
+        return "<SigmaCompiledRule %s>" % (self.id or self.title)
+
+class SigmaEngine:
+    """
+    Evaluates Sigma rules on events. Rules are parsed with the configuration chain, field names of events are
+    therefore the mapped field names and events must fulfill the log source conditions of the configuration.
+    """
+    def __init__(self, config=None, rulefilter=None):
+        self.config = config if config is not None else SigmaConfigurationChain()
+        self.rulefilter = rulefilter
+        self.rules = list()
+
+    def add_rules(self, content, filename=None):
+        """
+        Compile the rules of a Sigma file given as string or file and add them to the engine. Returns the list of
+        compiled rules. Raises parse errors and NotSupportedError, no rule of the file is added in this case.
+        """
+        parser = SigmaCollectionParser(content, self.config, self.rulefilter, filename)
+        rules = [ SigmaCompiledRule(sigmaparser, filename) for sigmaparser in parser.parsers ]
+        self.rules.extend(rules)
+        return rules
+
+    def add_file(self, path):
+        """Compile the rules of a Sigma file and add them to the engine, see add_rules()."""
+        with open(str(path), encoding="utf-8") as f:
+            return self.add_rules(f, path)
+
+    def match(self, event):
+        """Return list of compiled rules that match the event."""
+        return [ rule for rule in self.rules if rule.match(event) ]
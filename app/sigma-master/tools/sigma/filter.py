@@ -16,6 +16,8 @@
 
 # Rule Filtering
 import datetime
+from sigma.parser.collection import load_yaml_attributes
+
 class SigmaRuleFilter:
     """Filter for Sigma rules with conditions"""
     LEVELS = {
@@ -30,6 +32,7 @@ class SigmaRuleFilter:
               "experimental",
               "test",
               "stable"]
+    METADATA = { "level", "status", "tlp", "target", "logsource", "tags", "date", "modified" }    # top-level keys used by match() besides the detection
 
     def __init__(self, expr):
         self.minlevel      = None
@@ -99,6 +102,19 @@ class SigmaRuleFilter:
             else:
                 raise SigmaRuleFilterParseException("Unknown condition '%s'" % cond)
 
+    def match_metadata(self, content):
+        """
+        Match filter conditions against the metadata of a Sigma rule given as YAML text. Only the top-level
+        attributes used by the filter are parsed, the detection is skipped. Returns None if the decision
+        requires parsing of the whole content, e.g. for rule collections or condition filters.
+        """
+        if self.condition or self.notcondition:
+            return None
+        metadata = load_yaml_attributes(content, self.METADATA | { "action" })
+        if metadata is None or "action" in metadata:       # rule collection
+            return None
+        return self.match(metadata)
+
     def match(self, yamldoc):
         """Match filter conditions against rule"""
         # Levels
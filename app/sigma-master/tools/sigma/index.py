@@ -0,0 +1,118 @@
+# Persistent index of Sigma rule metadata
+# Copyright 2016-2019 Thomas Patzke, Florian Roth
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import hashlib
+import json
+import os
+import pathlib
+import tempfile
+
+from sigma.filter import SigmaRuleFilter
+from sigma.parser.collection import load_yaml_attributes
+
+INDEX_FORMAT = 1
+
+class SigmaRuleIndex:
+    """
+    Persistent index of the metadata of Sigma files that is used by rule filters (level, status, tags, logsource,
+    date, modified, tlp and target). Entries are identified by the absolute path of the Sigma file and updated when
+    its modification time or size changed and the SHA256 hash of its content differs, unchanged files are not read.
+    The metadata of files that can't be indexed without loading the whole YAML, e.g. rule collections, is None.
+    """
+    def __init__(self, path):
+        self.path = pathlib.Path(path)
+        self.entries = dict()           # absolute path -> { "mtime", "size", "hash", "metadata" }
+        self.changed = False
+        self.hits = 0
+        self.updates = 0
+        try:
+            with self.path.open(encoding="utf-8") as f:
+                index = json.load(f)
+            if index.get("format") == INDEX_FORMAT:
+                self.entries = index["rules"]
+        except (OSError, ValueError, KeyError, AttributeError):      # missing or broken index is rebuilt
+            pass
+
+    def get(self, sigmafile):
+        """Return indexed metadata of the Sigma file or None if it can't be indexed. Raises OSError."""
+        key = os.path.abspath(str(sigmafile))
+        stat = os.stat(key)
+        entry = self.entries.get(key)
+        if entry is not None and entry["mtime"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+            self.hits += 1
+            return entry["metadata"]
+
+        with open(key, "rb") as f:
+            content = f.read()
+        digest = hashlib.sha256(content).hexdigest()
+        if entry is None or entry["hash"] != digest:
+            self.updates += 1
+            entry = { "hash": digest, "metadata": get_metadata(content) }
+        else:
+            self.hits += 1
+        entry.update(mtime=stat.st_mtime_ns, size=stat.st_size)
+        self.entries[key] = entry
+        self.changed = True
+        return entry["metadata"]
+
+    def match(self, sigmafile, rulefilter):
+        """
+        Match the rule filter against the indexed metadata of the Sigma file. Returns None if the file must be loaded
+        for the decision, like SigmaRuleFilter.match_metadata(). Raises OSError.
+        """
+        if rulefilter.condition or rulefilter.notcondition:
+            return None
+        metadata = self.get(sigmafile)
+        if metadata is None:
+            return None
+        return rulefilter.match(metadata)
+
+    def prune(self):
+        """Remove entries of Sigma files that don't exist anymore."""
+        for key in [ key for key in self.entries if not os.path.exists(key) ]:
+            del self.entries[key]
+            self.changed = True
+
+    def save(self):
+        """Write the index if it was changed."""
+        if not self.changed:
+            return
+        self.prune()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmppath = tempfile.mkstemp(dir=str(self.path.parent), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({ "format": INDEX_FORMAT, "rules": self.entries }, f)
+            os.replace(tmppath, str(self.path))
+        except BaseException:
+            os.unlink(tmppath)
+            raise
+        self.changed = False
+
+def get_metadata(content):
+    """Return filter metadata of a Sigma file given as bytes or None if it can't be extracted from the text."""
+    try:
+        metadata = load_yaml_attributes(content.decode("utf-8"), SigmaRuleFilter.METADATA | { "action" })
+    except UnicodeDecodeError:
+        return None
+    if metadata is None or "action" in metadata:        # rule collection
+        return None
+    try:
+        if json.loads(json.dumps(metadata)) != metadata:
+            return None
+    except (TypeError, ValueError):     # e.g. dates loaded as date objects are matched on the loaded rule
+        return None
+    return metadata
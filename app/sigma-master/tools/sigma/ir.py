@@ -0,0 +1,277 @@
+# Detached intermediate representation of parsed Sigma rules
+# Copyright 2016-2019 Thomas Patzke, Florian Roth
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import base64
+import datetime
+import json
+import marshal
+
+from sigma.parser.condition import ConditionAND, ConditionOR, ConditionNOT, ConditionNULLValue, ConditionNotNULLValue, NodeSubexpression, ParseTreeNode, SigmaAggregationParser, SigmaConditionParser, SigmaConditionTokenizer, SigmaSearchValueAsIs
+from sigma.parser.modifiers import modifiers
+from sigma.parser.modifiers.base import SigmaTypeModifier
+from sigma.parser.rule import SigmaParser
+
+IR_FORMAT = 1           # increased on incompatible changes of the representation
+BINARY_MAGIC = b"SIGMAIR"
+
+# Parse tree nodes are encoded as lists of a tag and the encoded items. Plain values in conditions, e.g. keywords,
+# are encoded as values. Values that have no JSON representation are encoded as objects with one key starting with
+# an exclamation mark.
+node_tags = {
+        ConditionAND: "and",
+        ConditionOR: "or",
+        ConditionNOT: "not",
+        ConditionNULLValue: "null",
+        ConditionNotNULLValue: "notnull",
+        NodeSubexpression: "sub",
+        SigmaSearchValueAsIs: "asis",
+        tuple: "field",
+        }
+node_classes = { tag: nodeclass for nodeclass, tag in node_tags.items() }
+aggregation_internals = { "parser", "config", "current", "state" }
+
+class SigmaIRError(Exception):
+    """Rule can't be represented or representation can't be loaded"""
+    pass
+
+def get_config_fingerprint(config):
+    """Return fingerprint of a configuration chain or single configuration."""
+    try:
+        return config.get_fingerprint()
+    except AttributeError:
+        return getattr(config, "fingerprint", None)
+
+def encode_value(value):
+    """Encode a value of a rule or its parse tree into JSON compatible data."""
+    valuetype = type(value)
+    if valuetype in (str, int, float, bool) or value is None:
+        return value
+    elif valuetype == list:
+        return [ encode_value(item) for item in value ]
+    elif valuetype == dict:
+        if all([ type(key) == str and not key.startswith("!") for key in value ]):
+            return { key: encode_value(item) for key, item in value.items() }
+        else:
+            return { "!map": [ [ encode_value(key), encode_value(item) ] for key, item in value.items() ] }
+    elif valuetype == tuple:
+        return { "!tuple": [ encode_value(item) for item in value ] }
+    elif valuetype == bytes:
+        return { "!bytes": base64.b64encode(value).decode("ascii") }
+    elif valuetype == datetime.datetime:
+        return { "!datetime": value.isoformat() }
+    elif valuetype == datetime.date:
+        return { "!date": value.isoformat() }
+    elif isinstance(value, SigmaTypeModifier):
+        return { "!type": value.identifier, "value": encode_value(value.value) }
+    elif isinstance(value, (ParseTreeNode, SigmaSearchValueAsIs)):
+        return { "!node": encode_node(value) }
+    else:
+        raise SigmaIRError("Value of type %s can't be represented" % valuetype.__name__)
+
+def decode_value(data):
+    """Decode value encoded by encode_value()."""
+    datatype = type(data)
+    if datatype == list:
+        return [ decode_value(item) for item in data ]
+    elif datatype != dict:
+        return data
+    elif len(data) == 0 or not next(iter(data)).startswith("!"):
+        return { key: decode_value(item) for key, item in data.items() }
+    elif "!map" in data:
+        return { decode_value(key): decode_value(item) for key, item in data["!map"] }
+    elif "!tuple" in data:
+        return tuple(decode_value(item) for item in data["!tuple"])
+    elif "!bytes" in data:
+        return base64.b64decode(data["!bytes"])
+    elif "!datetime" in data:
+        return datetime.datetime.fromisoformat(data["!datetime"])
+    elif "!date" in data:
+        return datetime.date.fromisoformat(data["!date"])
+    elif "!type" in data:
+        try:
+            modifier = modifiers[data["!type"]]
+        except KeyError:
+            raise SigmaIRError("Unknown type modifier '%s'" % data["!type"])
+        value = modifier.__new__(modifier)          # the value was validated while parsing the rule
+        value.value = decode_value(data["value"])
+        return value
+    elif "!node" in data:
+        return decode_node(data["!node"])
+    else:
+        raise SigmaIRError("Unknown value encoding %s" % next(iter(data)))
+
+def encode_node(node):
+    """Encode condition parse tree."""
+    try:
+        tag = node_tags[type(node)]
+    except KeyError:
+        return encode_value(node)
+    if tag == "field":
+        return [ tag ] + [ encode_value(item) for item in node ]
+    elif tag == "sub":
+        return [ tag, encode_node(node.items) ]
+    elif tag == "asis":
+        return [ tag, encode_value(node.value) ]
+    else:
+        return [ tag ] + [ encode_node(item) for item in node.items ]
+
+def decode_node(data):
+    """Decode condition parse tree encoded by encode_node()."""
+    if type(data) != list:
+        return decode_value(data)
+    try:
+        tag = data[0]
+        nodeclass = node_classes[tag]
+    except (IndexError, KeyError, TypeError):
+        raise SigmaIRError("Unknown parse tree node %s" % str(data[:1]))
+    if tag == "field":
+        return tuple(decode_value(item) for item in data[1:])
+    elif tag == "sub":
+        return NodeSubexpression(decode_node(data[1]))
+    elif tag == "asis":
+        return SigmaSearchValueAsIs(decode_value(data[1]))
+    node = nodeclass()
+    node.items = [ decode_node(item) for item in data[1:] ]
+    return node
+
+def encode_aggregation(aggregation):
+    """Encode the parsed attributes of an aggregation."""
+    if aggregation is None:
+        return None
+    return { name: encode_value(value) for name, value in aggregation.__dict__.items() if name not in aggregation_internals }
+
+def decode_aggregation(data, parser):
+    if data is None:
+        return None
+    aggregation = SigmaAggregationParser.__new__(SigmaAggregationParser)
+    aggregation.parser = parser
+    aggregation.config = parser.config
+    for name, value in data.items():
+        setattr(aggregation, name, decode_value(value))
+    if hasattr(aggregation, "include"):
+        aggregation.current = aggregation.include
+    return aggregation
+
+def encode_rule(sigmaparser):
+    """
+    Return the intermediate representation of a parsed rule: the YAML of the rule and its parsed conditions and
+    aggregations. Parses the conditions if they weren't parsed before.
+    """
+    return {
+            "yaml": encode_value(sigmaparser.parsedyaml),
+            "conditions": [
+                { "search": encode_node(condition.parsedSearch), "aggregation": encode_aggregation(condition.parsedAgg) }
+                for condition in sigmaparser.condparsed
+                ],
+            }
+
+class SigmaIRParser(SigmaParser):
+    """
+    Sigma parser of a rule loaded from its intermediate representation. The parsed conditions are restored without
+    parsing and can be converted by backends like the conditions of a SigmaParser. Definitions and conditions are
+    still available for backends that parse parts of the rule again, e.g. for near aggregations.
+    """
+    def __init__(self, rule, config):
+        self.definitions = dict()
+        self.values = dict()
+        self.fieldmappingtargets = dict()
+        self.config = config
+        self.parsedyaml = decode_value(rule["yaml"])
+        self._condtoken = None
+        try:
+            for definitionName, definition in self.parsedyaml["detection"].items():
+                if definitionName != "condition":
+                    self.definitions[definitionName] = definition
+                    self.extract_values(definition)
+        except (KeyError, AttributeError, TypeError):
+            raise SigmaIRError("Rule contains no detection")
+        self._condparsed = [ self.decode_condition(condition) for condition in rule["conditions"] ]
+
+    def decode_condition(self, data):
+        condition = SigmaConditionParser.__new__(SigmaConditionParser)
+        condition.sigmaParser = self
+        condition.config = self.config
+        condition.parsedSearch = decode_node(data["search"])
+        condition.parsedAgg = decode_aggregation(data["aggregation"], self)
+        return condition
+
+    @property
+    def condtoken(self):
+        """Tokenized conditions, tokenized on first access."""
+        if self._condtoken is None:
+            conditions = self.parsedyaml["detection"]["condition"]
+            if type(conditions) == str:
+                conditions = [ conditions ]
+            self._condtoken = [ SigmaConditionTokenizer(condition) for condition in conditions ]
+        return self._condtoken
+
+    @condtoken.setter
+    def condtoken(self, value):
+        self._condtoken = value
+
+def dump_rules(sigmaparsers):
+    """
+    Return the intermediate representation of parsed rules as JSON compatible document. All rules must be parsed
+    with the same configurations, their fingerprint is stored in the document.
+    """
+    fingerprints = { get_config_fingerprint(sigmaparser.config) for sigmaparser in sigmaparsers }
+    if len(fingerprints) > 1:
+        raise SigmaIRError("Rules were parsed with different configurations")
+    return {
+            "format": IR_FORMAT,
+            "config": fingerprints.pop() if fingerprints else None,
+            "rules": [ encode_rule(sigmaparser) for sigmaparser in sigmaparsers ],
+            }
+
+def load_rules(document, config, check_config=True):
+    """
+    Return a SigmaIRParser for each rule of an intermediate representation document. The rules must be loaded with
+    the configurations they were parsed with, because field mappings and log source conditions are contained in the
+    parsed conditions. This is verified by the fingerprint of the configurations if check_config is set.
+    """
+    try:
+        if document["format"] != IR_FORMAT:
+            raise SigmaIRError("Unsupported intermediate representation format %s" % str(document["format"]))
+        if check_config and document["config"] != get_config_fingerprint(config):
+            raise SigmaIRError("Rules were parsed with different configurations")
+        return [ SigmaIRParser(rule, config) for rule in document["rules"] ]
+    except (KeyError, TypeError) as e:
+        raise SigmaIRError("Invalid intermediate representation: %s" % str(e)) from e
+
+def dumps(sigmaparsers, binary=False):
+    """
+    Serialize the intermediate representation of parsed rules to JSON or, if binary is set, to a compact binary
+    encoding. Binary representations depend on the marshal format of Python and must only be loaded from trusted
+    sources, e.g. caches or worker processes.
+    """
+    document = dump_rules(sigmaparsers)
+    if binary:
+        return BINARY_MAGIC + bytes([ IR_FORMAT ]) + marshal.dumps(document, 4)
+    else:
+        return json.dumps(document, separators=(",", ":"))
+
+def loads(data, config, check_config=True):
+    """Load rules from serialized intermediate representation, see dumps() and load_rules()."""
+    try:
+        if isinstance(data, bytes) and data.startswith(BINARY_MAGIC):
+            if data[len(BINARY_MAGIC)] != IR_FORMAT:
+                raise SigmaIRError("Unsupported intermediate representation format %d" % data[len(BINARY_MAGIC)])
+            document = marshal.loads(data[len(BINARY_MAGIC) + 1:])
+        else:
+            document = json.loads(data)
+    except (ValueError, EOFError, IndexError) as e:
+        raise SigmaIRError("Invalid intermediate representation: %s" % str(e)) from e
+    return load_rules(document, config, check_config)
@@ -14,9 +14,130 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import io
+import json
+import sys
+import textwrap
 import yaml
+import ruamel.yaml
 
 class SigmaYAMLDumper(yaml.Dumper):
     """YAML dumper that increases amount of indentation, e.g. for lists"""
     def increase_indent(self, flow=False, indentless=False):
         return super().increase_indent(flow, False)
+
+class SigmaOutputError(Exception):
+    """Error while opening or writing an output file"""
+    def __init__(self, filename, error):
+        self.filename = filename
+        self.error = error
+        super().__init__("Failed to open output file '%s': %s" % (filename, str(error)))
+
+def get_rule_metadata(rules, fields):
+    """
+    Merge the values of the given fields from the parsed rules of a Sigma file into a metadata dict. Rules later in
+    the file take precedence.
+    """
+    metadata = dict()
+    for rule in rules:
+        for key, value in rule.items():
+            if key in fields:
+                metadata[key] = value
+    return metadata
+
+class SigmaOutputWriter:
+    """
+    Writes conversion results to a stream, an output file or one file per result named after the Sigma file with the
+    given prefix. Results are written as plain text delimited by a separator or as rule records with metadata in JSON,
+    NDJSON or YAML format. Records are written incrementally, a JSON array is completed by close().
+    """
+    def __init__(self, filename=None, extension=".rule", separator="\n", output_format=None, target=None, stream=None):
+        self.extension = extension
+        self.separator = separator
+        self.output_format = output_format
+        self.target = target
+        self.fileprefix = None
+        self.records = 0
+        self.yaml = None
+        if not filename:
+            self.out = stream or sys.stdout
+        elif filename[-1:] in ['_','/','\\']:
+            self.fileprefix = filename
+            self.out = None
+            if output_format is not None:       # records of all rules are written into one file
+                self.out = self.open(self.get_mono_filename())
+        else:
+            self.out = self.open(filename)
+
+    def open(self, filename):
+        try:
+            return open(filename, "w", encoding='utf-8')
+        except (IOError, OSError) as e:
+            raise SigmaOutputError(filename, e) from e
+
+    def get_mono_filename(self):
+        return "%s%s_mono_output%s" % (self.fileprefix, self.target, self.extension)
+
+    def get_result_filename(self, sigmafile, index=None):
+        filename = self.fileprefix + str(sigmafile.name)
+        if index is None:
+            return filename.replace('.yml', self.extension)
+        else:
+            return filename.replace('.yml', '_' + str(index) + self.extension)
+
+    def write(self, result):
+        """Write a single result to the output stream."""
+        self.out.write("%s%s" % (result, self.separator))
+
+    def write_results(self, sigmafile, results):
+        """
+        Write the list of results of a Sigma file. With a file prefix, each result is written into its own file that is
+        numbered if the Sigma file resulted in multiple outputs. If the backend generated no result, further output is
+        written into one file for all rules.
+        """
+        if self.fileprefix is None:
+            for result in results:
+                self.write(result)
+        elif len(results) == 0:       # backend generates one output for all rules
+            self.out = self.open(self.get_mono_filename())
+            self.fileprefix = None
+        else:
+            for index, result in enumerate(results):
+                filename = self.get_result_filename(sigmafile, index if len(results) > 1 else None)
+                with self.open(filename) as f:
+                    f.write("%s%s" % (result, self.separator))
+
+    def write_record(self, metadata, results, filename=None):
+        """Write the metadata, results and optionally the name of a Sigma file as record in the output format."""
+        record = dict(metadata)
+        record['rule'] = list(results)
+        if filename is not None:
+            record['filename'] = filename
+        if self.output_format == "json":
+            self.out.write("[\n" if self.records == 0 else ",\n")
+            self.out.write(textwrap.indent(json.dumps(record, indent=4, ensure_ascii=False), "    "))
+        elif self.output_format == "ndjson":
+            self.out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        elif self.output_format == "yaml":
+            if self.yaml is None:
+                self.yaml = ruamel.yaml.YAML()
+            text = io.StringIO()
+            self.yaml.dump([ record ], text)
+            self.out.write(text.getvalue())
+        else:
+            raise NotImplementedError("Output format '%s' not supported" % self.output_format)
+        self.records += 1
+
+    def write_final(self, result):
+        """Write the output of the finalization of the backend."""
+        if self.out is None:
+            self.out = self.open(self.get_mono_filename())
+        print(result, file=self.out)
+
+    def close(self):
+        if self.output_format == "json":
+            self.out.write("\n]\n" if self.records > 0 else "[]\n")
+        elif self.output_format == "yaml":
+            self.out.write("\n" if self.records > 0 else "[]\n\n")
+        if self.out is not None:
+            self.out.close()
@@ -0,0 +1,160 @@
+# Parallel conversion of Sigma rules
+# Copyright 2016-2019 Thomas Patzke, Florian Roth
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import collections
+import contextlib
+import copy
+import io
+import itertools
+import math
+import pickle
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from sigma.parser.collection import SigmaCollectionParser
+from sigma.cache import CachedResult, open_content
+
+def convert_file(path, sigmaconfigs, rulefilter, backend, content=None):
+    """
+    Convert all rules contained in a Sigma file with the backend and return the list of results. The content of the
+    file can be passed as bytes if it was already read.
+    """
+    with path.open(encoding="utf-8") if content is None else open_content(content) as f:
+        parser = SigmaCollectionParser(f, sigmaconfigs, rulefilter, path)
+        return list(parser.generate(backend))
+
+def picklable_exception(exception):
+    """Return exception or, if it can't be passed to another process, a new exception of the same type."""
+    try:
+        pickle.loads(pickle.dumps(exception))
+        return exception
+    except Exception:
+        pass
+    try:
+        exception = type(exception)(str(exception))
+        pickle.loads(pickle.dumps(exception))
+        return exception
+    except Exception:
+        return RuntimeError("%s: %s" % (type(exception).__name__, str(exception)))
+
+STREAM_CHUNKSIZE = 8      # chunk size of paths from iterables of unknown length
+
+worker = None           # (backend class, configuration chain, backend options, rule filter, result cache) of a worker process
+
+def init_worker(backend_class, sigmaconfigs, backend_options, rulefilter, cache=None):
+    global worker
+    worker = (backend_class, sigmaconfigs, backend_options, rulefilter, cache)
+
+def convert_chunk(paths):
+    """
+    Convert Sigma files in a worker process with a new backend. Returns the list of (results, exception, output to
+    stdout, output to stderr) tuples of the files and the state of the backend. The outcomes are stored in the result
+    cache if one is used.
+    """
+    backend_class, sigmaconfigs, backend_options, rulefilter, cache = worker
+    backend = backend_class(sigmaconfigs, copy.copy(backend_options))
+    outcomes = list()
+    for path in paths:
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        results = None
+        error = None
+        content = None
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            try:
+                if cache is not None:
+                    content = path.read_bytes()
+                start = time.perf_counter()
+                results = convert_file(path, sigmaconfigs, rulefilter, backend, content)
+            except Exception as e:
+                error = picklable_exception(e)
+        outcomes.append((results, error, stdout.getvalue(), stderr.getvalue()))
+        if content is not None:
+            try:
+                cache.store(path, content, CachedResult(results, error, stdout.getvalue(), stderr.getvalue(), None, time.perf_counter() - start))
+            except Exception:       # the cache is an optimization, results are still returned
+                pass
+    return outcomes, backend.getState()
+
+class SigmaParallelConverter:
+    """
+    Converts Sigma files in a pool of worker processes. Chunks of consecutive files are converted by a new backend
+    instance in a worker. The results are returned in input order and the states of the chunk backends are merged into
+    the backend given to the converter, which is finalized by the caller. Chunks whose state can't be merged are
+    converted again sequentially by this backend. Workers store their results in the result cache if one is given.
+    """
+    def __init__(self, jobs, backend, sigmaconfigs, backend_options, rulefilter=None, chunksize=None, cache=None):
+        self.jobs = jobs
+        self.backend = backend
+        self.sigmaconfigs = sigmaconfigs
+        self.backend_options = backend_options
+        self.rulefilter = rulefilter
+        self.chunksize = chunksize
+        self.cache = cache
+
+    def get_chunks(self, paths):
+        """
+        Generate chunks of consecutive paths. The default chunk size depends on the number of paths if they are given
+        as list, paths from other iterables are consumed chunk by chunk.
+        """
+        if self.chunksize:
+            chunksize = self.chunksize
+        elif isinstance(paths, list):
+            chunksize = max(1, min(32, math.ceil(len(paths) / (self.jobs * 4))))
+        else:
+            chunksize = STREAM_CHUNKSIZE
+        paths = iter(paths)
+        chunk = list(itertools.islice(paths, chunksize))
+        while chunk:
+            yield chunk
+            chunk = list(itertools.islice(paths, chunksize))
+
+    def convert_sequential(self, paths):
+        for path in paths:
+            try:
+                yield path, convert_file(path, self.sigmaconfigs, self.rulefilter, self.backend), None
+            except Exception as e:
+                yield path, None, e
+
+    def convert(self, paths):
+        """
+        Generate (path, list of results, exception or None) for each path in input order. Output of backends to stdout
+        and stderr is written before the results of the file are returned. At most two chunks per worker are converted
+        in advance, callers that stop early wait only for these. Paths can be given by a generator, it is consumed
+        when chunks are submitted, which bounds the paths that are read ahead.
+        """
+        chunks = self.get_chunks(paths)
+        pending = collections.deque()
+        initargs = (type(self.backend), self.sigmaconfigs, self.backend_options, self.rulefilter, self.cache)
+        with ProcessPoolExecutor(self.jobs, initializer=init_worker, initargs=initargs) as executor:
+            def submit():
+                chunk = next(chunks, None)
+                if chunk is not None:
+                    pending.append((chunk, executor.submit(convert_chunk, chunk)))
+
+            for i in range(2 * self.jobs):
+                submit()
+            while pending:
+                chunk, future = pending.popleft()
+                submit()
+                outcomes, state = future.result()
+                if not self.backend.mergeState(state):
+                    yield from self.convert_sequential(chunk)
+                    continue
+                for path, (results, error, stdout, stderr) in zip(chunk, outcomes):
+                    sys.stdout.write(stdout)
+                    sys.stderr.write(stderr)
+                    yield path, results, error
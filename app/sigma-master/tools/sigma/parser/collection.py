@@ -14,6 +14,7 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import copy
 import yaml
 from .exceptions import SigmaCollectionParseError
 from .rule import SigmaParser
@@ -27,14 +28,77 @@ class SigmaCollectionParser:
     * global: merges attributes from document in all following documents. Accumulates attributes from previous set_global documents
     * reset: resets global attributes from previous set_global statements
     * repeat: takes attributes from this YAML document, merges into previous rule YAML and regenerates the rule
+
+    By default, all documents are parsed on construction and the first error is raised. With lazy=True, the
+    content is parsed document by document while iterating over iter_parsers() or iter_generate(). Only the
+    current document and the global and previous rule attributes are kept in memory and errors are reported
+    per document in the rule metadata instead of aborting the iteration. File-like content can only be
+    consumed once in this mode.
+
+    YAML documents already loaded with load_documents() can be passed as documents instead of content, e.g. to parse
+    the same file with different configurations. The documents are modified while parsing.
     """
-    def __init__(self, content, config=None, rulefilter=None, filename=None):
+    def __init__(self, content, config=None, rulefilter=None, filename=None, lazy=False, documents=None):
         if config is None:
             from sigma.configuration import SigmaConfiguration
             config = SigmaConfiguration()
-        self.yamls = yaml.safe_load_all(content)
+        if documents is not None:
+            content = None
+        elif rulefilter is not None and (not lazy or isinstance(content, str)):      # check metadata first and skip parsing of whole content if rule doesn't matches
+            if hasattr(content, "read"):
+                content = content.read()
+            if rulefilter.match_metadata(content) is False:
+                content = ""
+        self.config = config
+        self.rulefilter = rulefilter
+        self.filename = filename
+        self.content = None
+        self.yamls = None
+        self.rules = None
+        self._parsers = None
+        if documents is not None:
+            self.yamls = documents
+            self._load(enumerate(self.yamls))
+        elif lazy:
+            self.content = content
+        else:
+            self.yamls = yaml.safe_load_all(content)
+            self._load(enumerate(self.yamls))
+
+    @staticmethod
+    def load_documents(content, rulefilter=None):
+        """
+        Load all YAML documents from content given as string or file-like object. Returns an empty list if the rule
+        filter rejects the content by its metadata.
+        """
+        if hasattr(content, "read"):
+            content = content.read()
+        if rulefilter is not None and rulefilter.match_metadata(content) is False:
+            return list()
+        return list(yaml.safe_load_all(content))
+
+    def _load(self, documents):
+        """Parse all documents into self.rules and raise the first error."""
+        self.rules = list()
+        for meta, parser in self._parse(documents):
+            if meta["error"] is not None:
+                raise meta["error"]
+            self.rules.append((meta, parser))
+        self._parsers = [ parser for meta, parser in self.rules ]
+
+    def _documents(self):
+        """Split content into YAML documents and load them one by one. YAML errors are returned instead of raised."""
+        for index, (line, text) in enumerate(split_yaml_documents(self.content)):
+            try:
+                yield index, yaml.safe_load(text), line
+            except yaml.YAMLError as e:
+                yield index, e, line
+
+    def _parse(self, documents):
+        """Generate (rule metadata, parser) pairs for all rule documents. Errors are stored in the metadata."""
+        filename = self.filename
+        rulefilter = self.rulefilter
         globalyaml = dict()
-        self.parsers = list()
         prevrule = None
         if filename:
             try:
@@ -42,39 +106,93 @@ class SigmaCollectionParser:
                 globalyaml['yml_path']=str(filename.parent)
             except:
                 filename = None
-        
-        for yamldoc in self.yamls:
-            action = None
+
+        for index, yamldoc, *line in documents:
+            meta = { "index": index, "line": line[0] if line else None, "filename": filename, "title": None, "id": None, "error": None }
+            if isinstance(yamldoc, Exception):
+                meta["error"] = yamldoc
+                yield meta, None
+                continue
+
             try:
-                action = yamldoc['action']
-                del yamldoc['action']
-            except KeyError:
-                pass
-
-            if action == "global":
-                deep_update_dict(globalyaml, yamldoc)
-            elif action == "reset":
-                globalyaml = dict()
-                if filename:
-                    globalyaml['yml_filename']=str(filename.name)
-                    globalyaml['yml_path']=str(filename.parent) 
-            elif action == "repeat":
-                if prevrule is None:
-                    raise SigmaCollectionParseError("action 'repeat' is only applicable after first valid Sigma rule")
-                newrule = prevrule.copy()
-                deep_update_dict(newrule, yamldoc)
-                if rulefilter is None or rulefilter is not None and not rulefilter.match(newrule):
-                    self.parsers.append(SigmaParser(newrule, config))
-                    prevrule = newrule
+                action = None
+                try:
+                    action = yamldoc['action']
+                    del yamldoc['action']
+                except KeyError:
+                    pass
+
+                if action == "global":
+                    deep_update_dict(globalyaml, yamldoc)
+                    continue
+                elif action == "reset":
+                    globalyaml = dict()
+                    if filename:
+                        globalyaml['yml_filename']=str(filename.name)
+                        globalyaml['yml_path']=str(filename.parent)
+                    continue
+                elif action == "repeat":
+                    if prevrule is None:
+                        raise SigmaCollectionParseError("action 'repeat' is only applicable after first valid Sigma rule")
+                    rule = copy.deepcopy(prevrule)
+                    deep_update_dict(rule, yamldoc)
+                    if rulefilter is not None and rulefilter.match(rule):
+                        continue
+                else:
+                    rule = yamldoc
+                    deep_update_dict(rule, copy.deepcopy(globalyaml))      # later global documents must not change this rule
+                    if rulefilter is not None and not rulefilter.match(rule):
+                        continue
+                prevrule = rule
+                meta["title"] = rule.get("title")
+                meta["id"] = rule.get("id")
+                parser = SigmaParser(rule, self.config)
+            except Exception as e:
+                meta["error"] = e
+                yield meta, None
             else:
-                deep_update_dict(yamldoc, globalyaml)
-                if rulefilter is None or rulefilter is not None and rulefilter.match(yamldoc):
-                    self.parsers.append(SigmaParser(yamldoc, config))
-                    prevrule = yamldoc
-        self.config = config
+                yield meta, parser
+
+    @property
+    def parsers(self):
+        """List of all rule parsers. A lazy collection is parsed completely on first access."""
+        if self._parsers is None:
+            self._load(self._documents())
+        return self._parsers
+
+    def iter_parsers(self):
+        """
+        Generate (rule metadata, parser) pairs. The metadata is a dict with the keys index (number of the YAML
+        document), line (first line of the document, lazy collections only), filename, title, id and error. If
+        the document could not be parsed, error contains the exception and parser is None.
+        """
+        if self.rules is not None:
+            yield from self.rules
+        else:
+            yield from self._parse(self._documents())
+
+    def iter_generate(self, backend):
+        """
+        Generate (rule metadata, output) pairs for all rules with a non-empty backend output. Errors from parsing
+        or conversion of a rule are stored in the metadata with output None and the iteration continues.
+        """
+        for meta, parser in self.iter_parsers():
+            if parser is None:
+                yield meta, None
+                continue
+            try:
+                parser.condparsed
+                result = backend.generate(parser)
+            except Exception as e:
+                yield dict(meta, error=e), None
+            else:
+                if result:
+                    yield meta, result
 
     def generate(self, backend):
         """Calls backend for all parsed rules"""
+        for parser in self.parsers:     # parse all conditions before any rule is passed to the backend
+            parser.condparsed
         return filter(
                 lambda x: bool(x),      # filter None's and empty strings
                 [ backend.generate(parser) for parser in self.parsers ]
@@ -83,9 +201,64 @@ class SigmaCollectionParser:
     def __iter__(self):
         return iter([parser.parsedyaml for parser in self.parsers])
 
+def split_yaml_documents(content):
+    """
+    Split YAML content given as string or file-like object into the text of its documents at document start
+    markers without loading the whole content. Generates (first line number, document text) pairs.
+    """
+    if isinstance(content, str):
+        content = content.splitlines(keepends=True)
+    lines = list()
+    start = 1
+    explicit = False        # document started with ---
+    data = False            # document contains something else than comments, blank lines or directives
+    for lineno, line in enumerate(content, 1):
+        if line.startswith("---") and line[3:4] in ("", " ", "\t", "\r", "\n"):
+            if explicit or data:
+                yield start, "".join(lines)
+                lines = list()
+                start = lineno
+            explicit = True
+            data = False
+        elif not data and line.strip() and not line.startswith("#") and not line.startswith("%"):
+            data = True
+        lines.append(line)
+    if explicit or data:
+        yield start, "".join(lines)
+
 def deep_update_dict(dest, src):
     for key, value in src.items():
         if isinstance(value, dict) and key in dest and isinstance(dest[key], dict):     # source is dict, destination key already exists and is dict: merge
                 deep_update_dict(dest[key], value)
         else:
             dest[key] = value
+
+def load_yaml_attributes(content, keys):
+    """
+    Load only the given top-level attributes of a single YAML document from its text without parsing the
+    remaining content. Returns a dict with the found attributes or None if the content can't be handled this
+    way, e.g. multiple documents, unusual key syntax or invalid YAML.
+    """
+    lines = list()
+    take = False
+    for line in content.splitlines(keepends=True):
+        first = line[:1]
+        if first in ("", " ", "\t", "\r", "\n", "#") or line.startswith("-") and not line.startswith("---"):   # continuation of previous attribute
+            if take:
+                lines.append(line)
+            continue
+        if first in ("'", '"', "%", "?", "&", "*", "{", "[") or line.startswith("---") or line.startswith("..."):
+            return None         # unusual key syntax, directives or multiple documents
+        take = line.split(":", 1)[0].strip() in keys
+        if take:
+            lines.append(line)
+
+    try:
+        attributes = yaml.safe_load("".join(lines))
+    except yaml.YAMLError:
+        return None
+    if attributes is None:
+        return dict()
+    elif type(attributes) != dict:
+        return None
+    return attributes
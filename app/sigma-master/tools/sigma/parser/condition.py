@@ -273,6 +273,46 @@ class SigmaSearchValueAsIs:
         self.value = value
 
 
+def structuralKey(node, cache=None):
+    """
+    Return a hashable key for the AST rooted at *node*. Subtrees with equal keys are equal in
+    structure and values, even if they consist of different objects. Hashable leaves are their
+    own key. Keys of parse tree nodes are stored in the optional *cache* dict by object id.
+    """
+    nodetype = type(node)
+    if nodetype == tuple:
+        if all(type(item) in (str, int) or item is None for item in node):
+            return node
+        try:
+            hash(node)
+        except TypeError:           # definitions with value lists
+            return tuple(structuralKey(item, cache) for item in node)
+        return tuple((type(item), item) if type(item) in (bool, float) else item for item in node)
+    elif nodetype in (str, int) or node is None:
+        return node
+    elif nodetype in (bool, float):     # True == 1 == 1.0, but they are different values in Sigma rules
+        return (nodetype, node)
+    elif nodetype == list:
+        return (list, tuple(structuralKey(item, cache) for item in node))
+    elif isinstance(node, ParseTreeNode):
+        if cache is not None:
+            cached = cache.get(id(node))
+            if cached is not None:
+                return cached[1]
+        key = (nodetype, structuralKey(node.items, cache))
+        if cache is not None:
+            cache[id(node)] = (node, key)   # keep node referenced so its id is not reused
+        return key
+    elif hasattr(node, "value"):        # SigmaSearchValueAsIs and type modifiers
+        return (nodetype, structuralKey(node.value, cache))
+    else:
+        try:
+            hash(node)
+            return node
+        except TypeError:
+            return (nodetype, id(node))
+
+
 # Parse tree generators: generate parse tree nodes from extended conditions
 def generateXOf(sigma, val, condclass):
     """
@@ -319,7 +359,43 @@ def convertId(sigma, op):
 class SigmaConditionOptimizer:
     """
     Optimizer for the parsed AST.
+
+    Optional passes that are not plain boolean identities can be enabled by
+    name, see optionalPasses.
     """
+    optionalPasses = (
+            "subsume_wildcards",    # drop values that are matched by a more general wildcard value of the same field
+            "group_values",         # merge OR'ed values of the same field into one value list
+            "factor_common",        # factor out operands that are shared by some AND()s within an OR(), or vice versa
+            )
+    _wildcardAny = object()         # tokens of wildcards in values
+    _wildcardOne = object()
+
+    def __init__(self, passes=()):
+        unknown = set(passes) - set(self.optionalPasses)
+        if unknown:
+            raise ValueError("Unknown optimizer passes: " + ", ".join(sorted(unknown)))
+        self.passes = frozenset(passes)
+
+    @classmethod
+    def parsePasses(cls, value):
+        """
+        Return the set of optional passes selected by a configuration or backend option *value*.
+        The value may be a list or comma-separated string of pass names, 'all' or True.
+        """
+        if value is None or value is False:
+            return set()
+        if value is True or value == "all":
+            return set(cls.optionalPasses)
+        if type(value) == str:
+            value = [name.strip() for name in value.split(",") if name.strip()]
+        if type(value) != list or not all(type(name) == str for name in value):
+            raise ValueError("Optimizations must be a list of pass names, 'all' or a boolean")
+        unknown = set(value) - set(cls.optionalPasses)
+        if unknown:
+            raise ValueError("Unknown optimizer passes: %s. Valid choices are: %s" % (", ".join(sorted(unknown)), ", ".join(cls.optionalPasses)))
+        return set(value)
+
     def _stripSubexpressionNode(self, node):
         """
         Recursively strips all subexpressions (i.e. brackets) from the AST.
@@ -345,51 +421,119 @@ class SigmaConditionOptimizer:
         """
         Remove duplicate entries in list *l* while preserving order.
 
-        Used to be fast before it needed to work around list instead of
-        tuple being used for lists within definitions in the AST.
+        Entries are compared by their structural key, which also covers lists
+        within definitions without rebuilding the items. Keys of subtrees are
+        only computed if another subtree of the same shape precedes them.
         """
         seen = set()
-        #return [x for x in l if x not in seen and not seen.add(x)]
+        shapes = dict()
         uniq = []
         for x in l:
-            if type(x) == tuple and type(x[1]) == list:
-                x = (x[0], tuple(x[1]))
-            if x not in seen and not seen.add(x):
+            if isinstance(x, ParseTreeNode):
+                shape = type(x)
+                if shape not in shapes:
+                    shapes[shape] = x
+                    uniq.append(x)
+                    continue
+                first = shapes[shape]
+                if first is not None:
+                    seen.add(structuralKey(first, self._keys))
+                    shapes[shape] = None
+            key = structuralKey(x, self._keys)
+            if key not in seen:
+                seen.add(key)
                 uniq.append(x)
-        out = []
-        for x in uniq:
-            if type(x) == tuple and type(x[1]) == tuple:
-                out.append((x[0], list(x[1])))
-            else:
-                out.append(x)
-        return out
+        return uniq
 
-    def _optimizeNode(self, node, changes=False):
+    def _changed(self, node):
+        """Forget everything known about *node* after it was changed in place."""
+        self._clean.pop(id(node), None)
+        self._keys.pop(id(node), None)
+
+    def _optimizeNode(self, node):
         """
-        Recursively optimize the AST rooted at *node* once.  Returns the new
-        root node and a boolean indicating if the tree was changed in this
-        invocation or any of the recursive sub-invocations.
+        Optimize the AST rooted at *node* once.  Returns the new root node and
+        a boolean indicating if the subtree was changed in this invocation.
+
+        The rewrite rules are applied to a node until none of them matches
+        anymore, then its children are optimized.  Subtrees that were left
+        unchanged by a previous invocation are memoized as clean and skipped,
+        as no rule can match anywhere within them.
 
         You MUST remove all subexpression nodes from the AST before calling
         this function.  Subexpressions are implicit around AND/OR nodes.
         """
-        if type(node) in (ConditionOR, ConditionAND):
+        if type(node) not in (ConditionOR, ConditionAND, ConditionNOT) or id(node) in self._clean:
+            return node, False
+
+        newnode, changes = self._rewriteNode(node)
+        if newnode is not node:
+            newnode, _ = self._optimizeNode(newnode)
+            return newnode, True
+
+        items = list()
+        for item in node.items:
+            newitem, itemchanges = self._optimizeNode(item)
+            items.append(newitem)
+            changes = changes or itemchanges
+        if changes:
+            node.items = items
+            self._changed(node)
+        else:
+            self._clean[id(node)] = node        # keep node referenced so its id is not reused
+        return node, changes
+
+    def _rewriteNode(self, node):
+        """
+        Apply the rewrite rules to *node* until none of them matches anymore.
+        Returns the resulting node, which may be a different one or None, and
+        a boolean indicating if any rule matched.
+        """
+        if type(node) == ConditionNOT:
+            assert(len(node.items) == 1)
+            child = node.items[0]
+            # NOT(NOT(X))                   =>  X
+            if type(child) == ConditionNOT:
+                assert(len(child.items) == 1)
+                return child.items[0], True
+
+            # NOT(ConditionNULLValue)       =>  ConditionNotNULLValue
+            if type(child) == ConditionNULLValue:
+                return ConditionNotNULLValue(val=child.items[0]), True
+
+            # NOT(ConditionNotNULLValue)    =>  ConditionNULLValue
+            if type(child) == ConditionNotNULLValue:
+                return ConditionNULLValue(val=child.items[0]), True
+
+            return node, False
+
+        if type(node) == ConditionOR:
+            othertype = ConditionAND
+        else:
+            othertype = ConditionOR
+
+        changes = False
+        while True:
             # Remove empty OR(X), AND(X)
             if len(node.items) == 0:
                 return None, True
             if None in node.items:
-                node.items = [item for item in node.items if item != None]
-                return self._optimizeNode(node, changes=True)
+                node.items = [item for item in node.items if item is not None]
+                self._changed(node)
+                changes = True
+                continue
 
             # OR(X), AND(X)                 =>  X
             if len(node.items) == 1:
-                return self._optimizeNode(node.items[0], changes=True)
+                return node.items[0], True
 
             # OR(X, X, ...), AND(X, X, ...) =>  OR(X, ...), AND(X, ...)
             uniq_items = self._ordered_uniq(node.items)
             if len(uniq_items) < len(node.items):
                 node.items = uniq_items
-                return self._optimizeNode(node, changes=True)
+                self._changed(node)
+                changes = True
+                continue
 
             # OR(X, OR(Y))                  =>  OR(X, Y)
             if any(type(child) == type(node) for child in node.items) and \
@@ -401,13 +545,11 @@ class SigmaConditionOptimizer:
                     else:
                         newitems.append(child)
                 node.items = newitems
-                return self._optimizeNode(node, changes=True)
+                self._changed(node)
+                changes = True
+                continue
 
             # OR(AND(X, ...), AND(X, ...))  =>  AND(X, OR(AND(...), AND(...)))
-            if type(node) == ConditionOR:
-                othertype = ConditionAND
-            else:
-                othertype = ConditionOR
             if all(type(child) == othertype for child in node.items):
                 promoted = []
                 for cand in node.items[0]:
@@ -418,40 +560,230 @@ class SigmaConditionOptimizer:
                         for cand in promoted:
                             if cand in child.items:
                                 child.items.remove(cand)
+                        self._changed(child)
+                    self._changed(node)
                     newnode = othertype()
                     newnode.items = promoted
                     newnode.add(node)
-                    return self._optimizeNode(newnode, changes=True)
+                    return newnode, True
 
-            # fallthrough
+            # Optional passes
+            if "subsume_wildcards" in self.passes and self._subsumeWildcards(node):
+                changes = True
+                continue
 
-        elif type(node) == ConditionNOT:
-            assert(len(node.items) == 1)
-            # NOT(NOT(X))                   =>  X
-            if type(node.items[0]) == ConditionNOT:
-                assert(len(node.items[0].items) == 1)
-                return self._optimizeNode(node.items[0].items[0], changes=True)
+            if "group_values" in self.passes and type(node) == ConditionOR and self._groupValues(node):
+                changes = True
+                continue
 
-            # NOT(ConditionNULLValue)       =>  ConditionNotNULLValue
-            if type(node.items[0]) == ConditionNULLValue:
-                newnode = ConditionNotNULLValue(val=node.items[0].items[0])
-                return self._optimizeNode(newnode, changes=True)
+            if "factor_common" in self.passes and self._factorCommon(node, othertype):
+                changes = True
+                continue
 
-            # NOT(ConditionNotNULLValue)    =>  ConditionNULLValue
-            if type(node.items[0]) == ConditionNotNULLValue:
-                newnode = ConditionNULLValue(val=node.items[0].items[0])
-                return self._optimizeNode(newnode, changes=True)
+            return node, changes
 
-            # fallthrough
+    def _wildcardTokens(self, value):
+        """
+        Split value into a tuple of literal characters and wildcard tokens. Escaped wildcards
+        and backslashes are literals.
+        """
+        tokens = list()
+        i = 0
+        while i < len(value):
+            c = value[i]
+            if c == "\\" and value[i + 1:i + 2] in ("*", "?", "\\"):
+                tokens.append(value[i + 1])
+                i += 2
+                continue
+            if c == "*":
+                tokens.append(self._wildcardAny)
+            elif c == "?":
+                tokens.append(self._wildcardOne)
+            else:
+                tokens.append(c)
+            i += 1
+        return tuple(tokens)
 
+    def _subsumes(self, general, special):
+        """
+        Check if all strings matched by the tokenized value *special* are also matched by the
+        tokenized value *general*. Wildcards of *special* can only be covered by a '*' of
+        *general*, a '?' also by a '?'.
+        """
+        if general == special:
+            return True
+        if self._wildcardAny not in general and self._wildcardOne not in general:
+            return False
+        # Cheap test: each literal part of the general value must appear in the special one.
+        literals = "".join(token if type(token) == str else "\0" for token in special)
+        part = ""
+        for token in general + (self._wildcardAny,):
+            if type(token) == str:
+                part += token
+            elif part:
+                if part not in literals:
+                    return False
+                part = ""
+
+        # matched[j]: processed prefix of general matches special[:j]
+        matched = [True] + [False] * len(special)
+        for token in general:
+            if token is self._wildcardAny:
+                for j in range(1, len(special) + 1):
+                    matched[j] = matched[j] or matched[j - 1]
+            else:
+                for j in range(len(special), 0, -1):
+                    if token is self._wildcardOne:
+                        matched[j] = matched[j - 1] and special[j - 1] is not self._wildcardAny
+                    else:
+                        matched[j] = matched[j - 1] and special[j - 1] == token
+                matched[0] = False
+        return matched[-1]
+
+    def _subsumedValues(self, values):
+        """Return indices of string values in list *values* that are covered by another value of the list."""
+        tokens = { value: self._wildcardTokens(value) for value in values if type(value) == str }
+        subsumed = set()
+        for i, special in enumerate(values):
+            if type(special) != str:
+                continue
+            for j, general in enumerate(values):
+                if i == j or type(general) != str:
+                    continue
+                # from equivalent values the first one is kept
+                if self._subsumes(tokens[general], tokens[special]) and (j < i or not self._subsumes(tokens[special], tokens[general])):
+                    subsumed.add(i)
+                    break
+        return subsumed
+
+    def _subsumeWildcards(self, node):
+        """
+        Remove values that are already matched by a more general value. Within an OR() this
+        applies to all values of the same field, else only to the value lists of single fields.
+        """
+        if type(node) == ConditionOR:
+            fields = dict()     # field name -> list of (item index, value index or None, value)
+            for i, item in enumerate(node.items):
+                if type(item) == tuple and len(item) == 2 and type(item[0]) == str:
+                    if type(item[1]) == list:
+                        fields.setdefault(item[0], list()).extend((i, k, value) for k, value in enumerate(item[1]))
+                    else:
+                        fields.setdefault(item[0], list()).append((i, None, item[1]))
+            groups = [entries for entries in fields.values() if len(entries) > 1]
         else:
-            return node, changes
+            groups = [
+                    [(i, k, value) for k, value in enumerate(item[1])]
+                    for i, item in enumerate(node.items)
+                    if type(item) == tuple and len(item) == 2 and type(item[1]) == list and len(item[1]) > 1
+                    ]
+
+        dropped = set()
+        for entries in groups:
+            subsumed = self._subsumedValues([value for _, _, value in entries])
+            dropped.update((entries[n][0], entries[n][1]) for n in subsumed)
+        if not dropped:
+            return False
+
+        newitems = list()
+        for i, item in enumerate(node.items):
+            if (i, None) in dropped:
+                continue
+            if type(item) == tuple and len(item) == 2 and type(item[1]) == list and any((i, k) in dropped for k in range(len(item[1]))):
+                values = [value for k, value in enumerate(item[1]) if (i, k) not in dropped]
+                if len(values) == 0:
+                    continue
+                item = (item[0], values[0] if len(values) == 1 else values)
+            newitems.append(item)
+        node.items = newitems
+        self._changed(node)
+        return True
+
+    def _groupValues(self, node):
+        """
+        OR((F, X), (F, Y), ...)       =>  OR((F, [X, Y]), ...)
 
-        itemresults = [self._optimizeNode(item, changes) for item in node.items]
-        node.items = [res[0] for res in itemresults]
-        if any(res[1] for res in itemresults):
-            changes = True
-        return node, changes
+        Only plain string and integer values are grouped, the value list is placed at the
+        position of the first value of the field.
+        """
+        fields = dict()     # field name -> collected values
+        counts = dict()
+        for item in node.items:
+            if type(item) == tuple and len(item) == 2 and type(item[0]) == str:
+                values = item[1] if type(item[1]) == list else [item[1]]
+                if all(type(value) in (str, int) for value in values):
+                    fields.setdefault(item[0], list()).extend(values)
+                    counts[item[0]] = counts.get(item[0], 0) + 1
+        grouped = { field for field, count in counts.items() if count > 1 }
+        if not grouped:
+            return False
+
+        newitems = list()
+        for item in node.items:
+            if type(item) == tuple and len(item) == 2 and item[0] in grouped and item[0] in fields:
+                values = fields.pop(item[0])
+                uniq = list()
+                for value in values:
+                    if value not in uniq:
+                        uniq.append(value)
+                newitems.append((item[0], uniq[0] if len(uniq) == 1 else uniq))
+            elif not (type(item) == tuple and len(item) == 2 and item[0] in grouped):
+                newitems.append(item)
+        node.items = newitems
+        self._changed(node)
+        return True
+
+    def _factorCommon(self, node, othertype):
+        """
+        OR(AND(X, A), AND(X, B), C)   =>  OR(AND(X, OR(A, B)), C)
+
+        The operand contained in most of the child nodes is factored out of them. Applies
+        to AND(OR(...), ...) accordingly.
+        """
+        children = [child for child in node.items if type(child) == othertype]
+        if len(children) < 2:
+            return False
+
+        counts = dict()     # structural key -> number of children containing it
+        first = dict()      # structural key -> operand
+        for child in children:
+            for key in { structuralKey(item, self._keys) for item in child.items }:
+                counts[key] = counts.get(key, 0) + 1
+            for item in child.items:
+                first.setdefault(structuralKey(item, self._keys), item)
+        best = None
+        for key, item in first.items():
+            if counts[key] > 1 and (best is None or counts[key] > counts[best]):
+                best = key
+        if best is None:
+            return False
+
+        factor = first[best]
+        group = [child for child in children if any(structuralKey(item, self._keys) == best for item in child.items)]
+        rest = type(node)()
+        for child in group:
+            child.items = [item for item in child.items if structuralKey(item, self._keys) != best]
+            self._changed(child)
+            if len(child.items) == 0:       # X OR (X AND ...) => X
+                rest = None
+            elif rest is not None:
+                rest.add(child.items[0] if len(child.items) == 1 else child)
+
+        if rest is None:
+            factored = factor
+        else:
+            factored = othertype()
+            factored.add(factor)
+            factored.add(rest)
+
+        newitems = list()
+        for item in node.items:
+            if item is group[0]:
+                newitems.append(factored)
+            elif not any(item is child for child in group):
+                newitems.append(item)
+        node.items = newitems
+        self._changed(node)
+        return True
 
     def optimizeTree(self, tree):
         """
@@ -483,12 +815,23 @@ class SigmaConditionOptimizer:
         out common operands that are not in all, but only some AND()s within an
         OR(), or vice versa.  Nevertheless, it is safe to assume that this
         implementation performs poorly on very large expressions.
+
+        The optional passes given to the constructor additionally perform:
+        -   subsume_wildcards: OR((F, '*a*'), (F, '*a*b*'))  =>  OR((F, '*a*'))
+        -   group_values:      OR((F, X), (F, Y))            =>  OR((F, [X, Y]))
+        -   factor_common:     OR(AND(X, A), AND(X, B), C)   =>  OR(AND(X, OR(A, B)), C)
         """
-        tree = self._stripSubexpressionNode(tree)
-        changes = True
-        while changes:
-            tree, changes = self._optimizeNode(tree)
-        tree = self._unstripSubexpressionNode(tree)
+        self._clean = dict()
+        self._keys = dict()
+        try:
+            tree = self._stripSubexpressionNode(tree)
+            changes = True
+            while changes:
+                tree, changes = self._optimizeNode(tree)
+            tree = self._unstripSubexpressionNode(tree)
+        finally:
+            self._clean = None
+            self._keys = None
         return tree
 
 # Condition parser
@@ -506,7 +849,7 @@ class SigmaConditionParser:
     def __init__(self, sigmaParser, tokens):
         self.sigmaParser = sigmaParser
         self.config = sigmaParser.config
-        self._optimizer = SigmaConditionOptimizer()
+        self._optimizer = SigmaConditionOptimizer(self.config.get_optimizations())
 
         if SigmaConditionToken.TOKEN_PIPE in tokens:    # Condition contains atr least one aggregation expression
             pipepos = tokens.index(SigmaConditionToken.TOKEN_PIPE)
@@ -35,11 +35,14 @@ class SigmaModifier(object):
             backend must handle these modifiers accordingly. Base class: SigmaTypeModifier
     valid_input_types: list of valid input types. Can be expected Python type (like str, int) or
         modifier class. object = don't care about type.
+    cacheable: boolean if results of apply() only depend on the value and contain only immutable
+        values or lists of them. Results of such modifiers are memoized.
     """
     identifier = "base"
     active = False
     modifier_type = SigmaModifierTypes.NONE
     valid_input_types = (object,)
+    cacheable = False
 
     def __init__(self, value):
         """Initialize modifier class. Store value or result of value transformation."""
@@ -15,6 +15,8 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import os
+from collections.abc import Mapping
+from functools import lru_cache
 from sigma.tools import getAllSubclasses, getClassDict
 from .base import SigmaModifier
 
@@ -23,7 +25,68 @@ def getModifierList():
     path = os.path.dirname(__file__)
     return getAllSubclasses(path, "parser.modifiers", SigmaModifier)
 
-modifiers = getClassDict(getModifierList())
+class SigmaModifierRegistry(Mapping):
+    """Mapping from modifier identifiers to modifier classes. The modifiers are discovered on first access."""
+    def __init__(self):
+        self._modifiers = None
+
+    def _get_modifiers(self):
+        if self._modifiers is None:
+            self._modifiers = getClassDict(getModifierList())
+        return self._modifiers
+
+    def __getitem__(self, identifier):
+        return self._get_modifiers()[identifier]
+
+    def __iter__(self):
+        return iter(self._get_modifiers())
+
+    def __len__(self):
+        return len(self._get_modifiers())
+
+modifiers = SigmaModifierRegistry()
+
+class SigmaModifierChain:
+    """
+    Modifier chain compiled from a tuple of modifier identifiers. Calling it applies all modifiers in given order
+    to a value. Results of chains that consist only of cacheable modifiers are memoized.
+    """
+    def __init__(self, modifier_list):
+        self.modifiers = tuple(modifiers[modifier] for modifier in modifier_list)
+        self.cacheable = all(modifier.cacheable for modifier in self.modifiers)
+
+    def apply(self, value):
+        for modifier in self.modifiers:
+            value = modifier(value).apply()
+        return value
+
+    def __call__(self, value):
+        if self.cacheable:
+            if type(value) in (list, tuple):
+                key = (type(value), tuple(value))
+            else:
+                key = (type(value), value)
+            try:
+                result = _apply_cached(self, key)
+            except TypeError:       # unhashable value, e.g. nested list
+                return self.apply(value)
+            if type(result) == list:
+                return list(result)
+            return result
+        else:
+            return self.apply(value)
+
+@lru_cache(maxsize=4096)
+def _apply_cached(chain, key):
+    value_type, value = key
+    if value_type in (list, tuple):
+        value = value_type(value)
+    return chain.apply(value)
+
+@lru_cache(maxsize=None)
+def compile_modifiers(modifier_list):
+    """Return compiled modifier chain for a tuple of modifier identifiers."""
+    return SigmaModifierChain(modifier_list)
 
 def apply_modifiers(value, modifier_list):
     """
@@ -32,6 +95,4 @@ def apply_modifiers(value, modifier_list):
     value: value from Sigma rule
     modifiers: list of modifier names
     """
-    for modifier in modifier_list:      # apply modifiers in given order
-        value = modifiers[modifier](value).apply()
-    return value
+    return compile_modifiers(tuple(modifier_list))(value)
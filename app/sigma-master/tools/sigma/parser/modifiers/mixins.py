@@ -24,8 +24,12 @@ class ListOrStringModifierMixin(object):
     Default behaviors:
     * apply_list() calls apply_str(str) for each value and returns list with all results.
     * apply_str(str) returns string without modifications
+
+    Modifier results are memoized, apply_str() must return a string, bytes or a list of them that
+    only depend on the given value.
     """
     valid_input_types = (list, tuple, str, )
+    cacheable = True
 
     def apply(self):
         if type(self.value) in (list, tuple, ):
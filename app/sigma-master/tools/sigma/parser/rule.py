@@ -24,6 +24,7 @@ class SigmaParser:
     def __init__(self, sigma, config):
         self.definitions = dict()
         self.values = dict()
+        self.fieldmappingtargets = dict()       # memo of conditional field mapping targets, see ConditionalFieldMapping
         self.config = config
         self.parsedyaml = sigma
         self.parse_sigma()
@@ -48,10 +49,14 @@ class SigmaParser:
         except KeyError:
             raise SigmaParseError("No condition found")
 
-        self.condparsed = list()        # list of parsed conditions
-        for tokens in self.condtoken:
-            condparsed = SigmaConditionParser(self, tokens)
-            self.condparsed.append(condparsed)
+        self._condparsed = None         # list of parsed conditions, see condparsed
+
+    @property
+    def condparsed(self):
+        """List of parsed conditions. The conditions are parsed on first access."""
+        if self._condparsed is None:
+            self._condparsed = [ SigmaConditionParser(self, tokens) for tokens in self.condtoken ]
+        return self._condparsed
 
     def parse_definition_byname(self, definitionName, condOverride=None):
         try:
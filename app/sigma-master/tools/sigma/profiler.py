@@ -0,0 +1,208 @@
+# Per-phase conversion profiler
+# Copyright 2016-2019 Thomas Patzke, Florian Roth
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import collections
+import contextlib
+import cProfile
+import functools
+import io
+import pstats
+import time
+import yaml
+
+from sigma.config import mapping
+from sigma.configuration import SigmaConfiguration, SigmaConfigurationChain
+from sigma.parser.collection import SigmaCollectionParser
+from sigma.parser.condition import SigmaConditionTokenizer, SigmaConditionParser, SigmaConditionOptimizer
+from sigma.parser.rule import SigmaParser
+
+PROFILE_FORMAT = 1
+PHASES = ("read", "yaml", "merge", "tokenize", "parse", "optimize", "fieldmapping", "generate")
+PERCENTILES = (50, 90, 95, 99)
+
+def percentile(values, p):
+    """Return p-th percentile of sorted values (nearest rank)."""
+    if not values:
+        return 0.0
+    rank = max(1, -(-len(values) * p // 100))
+    return values[int(rank) - 1]
+
+def get_statistics(values):
+    values = sorted(values)
+    stats = {
+            "total": sum(values),
+            "mean": sum(values) / len(values) if values else 0.0,
+            "max": values[-1] if values else 0.0,
+            }
+    for p in PERCENTILES:
+        stats["p%d" % p] = percentile(values, p)
+    return stats
+
+class SigmaProfiler:
+    """
+    Measures the time of the conversion phases of each Sigma file. The methods of the parser, configurations and
+    field mappings that implement a phase are wrapped while the profiler is installed. The time of a phase excludes
+    the time of phases nested into it, e.g. field mapping while parsing a condition, so the phase times of a rule add
+    up to its conversion time except the time spent outside of the instrumented code.
+    """
+    def __init__(self):
+        self.records = list()           # per Sigma file: { "rule": path, "total": seconds, "phases": { phase: seconds } }
+        self.targets = collections.defaultdict(lambda: collections.defaultdict(float))      # target -> phase -> seconds
+        self.current = None
+        self.target = None
+        self.nested = list()            # time of nested phases of each running phase
+        self.patches = list()           # (object, attribute name, original value)
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Account the time of the block to a phase of the current rule."""
+        if self.current is None:
+            yield
+            return
+        start = time.perf_counter()
+        self.nested.append(0.0)
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            exclusive = elapsed - self.nested.pop()
+            if self.nested:
+                self.nested[-1] += elapsed
+            self.current["phases"][name] += exclusive
+            self.targets[self.target][name] += exclusive
+
+    def start_rule(self, sigmafile):
+        """Start recording the phases of a Sigma file."""
+        self.current = { "rule": str(sigmafile), "total": 0.0, "phases": collections.defaultdict(float), "start": time.perf_counter() }
+
+    def stop_rule(self):
+        if self.current is not None:
+            self.current["total"] = time.perf_counter() - self.current.pop("start")
+            self.records.append(self.current)
+            self.current = None
+
+    def set_target(self, target):
+        """Account the following phases to a conversion target, None for phases shared by all targets."""
+        self.target = target
+
+    def wrap(self, name, function):
+        profiler = self
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with profiler.phase(name):
+                return function(*args, **kwargs)
+        return wrapper
+
+    def wrap_iterator(self, name, function):
+        """Wrap a function that returns an iterator, the time of each step is accounted to the phase."""
+        profiler = self
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            iterator = iter(function(*args, **kwargs))
+            while True:
+                with profiler.phase(name):
+                    try:
+                        item = next(iterator)
+                    except StopIteration:
+                        return
+                yield item
+        return wrapper
+
+    def patch(self, obj, attribute, replacement):
+        self.patches.append((obj, attribute, obj.__dict__[attribute]))
+        setattr(obj, attribute, replacement)
+
+    def install(self, backend=None):
+        """Wrap the functions of all phases and the generate() method of the backend instance."""
+        self.patch(yaml, "safe_load_all", self.wrap_iterator("yaml", yaml.safe_load_all))
+        self.patch(yaml, "safe_load", self.wrap("yaml", yaml.safe_load))
+        self.patch(SigmaCollectionParser, "_parse", self.wrap_iterator("merge", SigmaCollectionParser._parse))
+        self.patch(SigmaConditionTokenizer, "__init__", self.wrap("tokenize", SigmaConditionTokenizer.__init__))
+        self.patch(SigmaParser, "__init__", self.wrap("parse", SigmaParser.__init__))
+        self.patch(SigmaConditionParser, "__init__", self.wrap("parse", SigmaConditionParser.__init__))
+        self.patch(SigmaConditionOptimizer, "optimizeTree", self.wrap("optimize", SigmaConditionOptimizer.optimizeTree))
+        for cls in (SigmaConfiguration, SigmaConfigurationChain, mapping.SimpleFieldMapping, mapping.MultiFieldMapping, mapping.ConditionalFieldMapping, mapping.FieldMappingChain):
+            for attribute in ("get_fieldmapping", "resolve", "resolve_fieldname"):
+                if attribute in cls.__dict__:
+                    self.patch(cls, attribute, self.wrap("fieldmapping", cls.__dict__[attribute]))
+        if backend is not None:
+            self.add_backend(backend)
+
+    def add_backend(self, backend):
+        self.patches.append((backend, "generate", None))
+        backend.generate = self.wrap("generate", backend.generate)
+
+    def uninstall(self):
+        for obj, attribute, original in reversed(self.patches):
+            if original is None:
+                delattr(obj, attribute)
+            else:
+                setattr(obj, attribute, original)
+        self.patches = list()
+
+    def get_slowest(self, top):
+        """Return (total time, rule) of the top slowest rules."""
+        return sorted(((record["total"], record["rule"]) for record in self.records), reverse=True)[:top]
+
+    def report(self, top=10):
+        """Return report with statistics of the rule conversion and all phases and the top slowest rules."""
+        report = {
+                "format": PROFILE_FORMAT,
+                "rules": len(self.records),
+                "total": get_statistics([ record["total"] for record in self.records ]),
+                "phases": {
+                    phase: get_statistics([ record["phases"].get(phase, 0.0) for record in self.records ])
+                    for phase in PHASES
+                    },
+                "targets": {
+                    target: { phase: phases.get(phase, 0.0) for phase in PHASES }
+                    for target, phases in self.targets.items()
+                    if target is not None
+                    },
+                "slowest": {
+                    "total": [ { "rule": rule, "time": elapsed } for elapsed, rule in self.get_slowest(top) ],
+                    },
+                }
+        for phase in PHASES:
+            records = sorted(self.records, key=lambda record: record["phases"].get(phase, 0.0), reverse=True)[:top]
+            report["slowest"][phase] = [ { "rule": record["rule"], "time": record["phases"][phase] } for record in records if record["phases"].get(phase) ]
+        return report
+
+def capture_cprofile(paths, targets, rulefilter, path, functions=25):
+    """
+    Convert the Sigma files again with fresh backends given as (backend, configuration chain) pairs under cProfile and
+    write the statistics to path. Returns the functions with the highest cumulative time.
+    """
+    profile = cProfile.Profile()
+    for sigmafile in paths:
+        for backend, sigmaconfigs in targets:
+            with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+                try:
+                    with open(sigmafile, encoding="utf-8") as f:
+                        profile.enable()
+                        try:
+                            parser = SigmaCollectionParser(f, sigmaconfigs, rulefilter, sigmafile)
+                            list(parser.generate(backend))
+                        finally:
+                            profile.disable()
+                except Exception:       # errors were reported in the conversion
+                    pass
+    profile.dump_stats(path)
+    stats = pstats.Stats(profile)
+    result = list()
+    for (filename, line, name), (primitive, calls, tottime, cumtime, callers) in sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:functions]:
+        result.append({ "function": "%s:%d(%s)" % (filename, line, name), "calls": calls, "tottime": tottime, "cumtime": cumtime })
+    return result
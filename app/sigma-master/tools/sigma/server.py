@@ -0,0 +1,291 @@
+# Conversion server for Sigma rules
+# Copyright 2016-2019 Thomas Patzke, Florian Roth
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import contextlib
+import copy
+import io
+import json
+import os
+import pathlib
+import socketserver
+import stat
+import threading
+import time
+import yaml
+
+import sigma.backends.discovery as backends
+from sigma.backends.base import BackendOptions
+from sigma.configuration import SigmaConfigurationChain
+from sigma.config.exceptions import SigmaConfigParseError, SigmaRuleFilterParseException
+from sigma.filter import SigmaRuleFilter
+from sigma.parser.collection import SigmaCollectionParser
+
+# Error codes of invalid requests are the exit codes of sigmac for the same errors
+ERR_UNKNOWN             = 1     # uncaught exception
+ERR_REQUEST             = 2     # invalid command line arguments
+ERR_OPEN_CONFIG_FILE    = 5
+ERR_CONFIG_PARSING      = 6
+ERR_NO_TARGET           = 10
+ERR_RULE_FILTER_PARSING = 11
+ERR_CONFIG_REQUIRED     = 20
+ERR_CONFIG_ORDER        = 21
+
+class SigmaRequestError(Exception):
+    """Invalid conversion request"""
+    def __init__(self, message, code=ERR_REQUEST):
+        super().__init__(message)
+        self.code = code
+
+class WarmBackend:
+    """
+    Backend instance with its own configuration chain. The state that the backend collects for finalize() is reset to
+    its initial values after each request. Backends that don't declare all of their state (see
+    BaseBackend.isMergeable()) are instantiated for each request.
+    """
+    def __init__(self, backend_class, sigmaconfigs, options):
+        self.backend_class = backend_class
+        self.sigmaconfigs = sigmaconfigs
+        self.options = options
+        self.backend = None
+        self.initial_state = None
+        if backend_class.isMergeable():
+            self.backend = backend_class(sigmaconfigs, copy.copy(options))
+            self.initial_state = { name: copy.deepcopy(getattr(self.backend, name)) for name in backend_class.stateAttributes }
+
+    def get(self):
+        if self.backend is None:
+            return self.backend_class(self.sigmaconfigs, copy.copy(self.options))
+        return self.backend
+
+    def reset(self):
+        if self.backend is not None:
+            for name, value in self.initial_state.items():
+                setattr(self.backend, name, copy.deepcopy(value))
+
+class SigmaConversionServer:
+    """
+    Converts Sigma rules from JSON requests and keeps the configuration manager, loaded configurations and backend
+    instances for further requests. A request is a JSON object with the Sigma rule as YAML text in 'rule' or a path in
+    'path' and optional 'id', 'target', 'config' (list of configuration names), 'options' (object or list of
+    key=value strings), 'filter' and 'ignore_backend_errors'. Missing target, configurations and options are taken
+    from the defaults. The response contains the 'id', the list of 'results', the 'final' output of the backend, the
+    error 'code' that sigmac would return, the error message in 'error' and the output of the backend to 'stdout' and
+    'stderr' if there was any. The request {"command": "stats"} returns statistics of the server.
+
+    Errors are described by describe_error(exception, source), which returns a (message, description, code, backend
+    error, abort) tuple or None for unknown errors.
+    """
+    def __init__(self, scm, describe_error, target=None, config=None, options=None, rulefilter=None, ignore_backend_errors=False):
+        self.scm = scm
+        self.describe_error = describe_error
+        self.default_target = target
+        self.default_config = config or list()
+        self.default_options = options or dict()
+        self.default_filter = rulefilter
+        self.default_ignore_backend_errors = ignore_backend_errors
+        self.backends = dict()          # (target, configuration fingerprint, options) -> WarmBackend
+        self.filters = dict()           # filter expression -> SigmaRuleFilter
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.duration = 0.0
+
+    def get_options(self, request):
+        options = request.get("options")
+        if options is None:
+            return self.default_options
+        result = BackendOptions(None, None)
+        result.update(self.default_options)
+        if isinstance(options, dict):
+            result.update(options)
+        elif isinstance(options, list):
+            result.update(BackendOptions(options, None))
+        else:
+            raise SigmaRequestError("Backend options must be an object or a list of key=value strings")
+        return result
+
+    def get_configs(self, target, backend_class, request):
+        configs = request.get("config", self.default_config)
+        if isinstance(configs, str):
+            configs = [ configs ]
+        if not isinstance(configs, list):
+            raise SigmaRequestError("Configurations must be a list of configuration names")
+        if not configs:
+            if backend_class.default_config is not None:
+                configs = list(backend_class.default_config)
+            elif backend_class.config_required:
+                raise SigmaRequestError("The backend %s requires a configuration" % target, ERR_CONFIG_REQUIRED)
+        return configs
+
+    def get_backend(self, target, configs, options):
+        """Return warm backend for target, configuration chain and options."""
+        backend_class = backends.getBackend(target)
+        try:
+            fingerprint = self.scm.get_fingerprint(configs)
+        except OSError as e:
+            raise SigmaRequestError("Failed to open Sigma configuration: %s" % str(e), ERR_OPEN_CONFIG_FILE)
+        key = (target, fingerprint, json.dumps(options, sort_keys=True, default=str))
+        warm = self.backends.get(key)
+        if warm is None:
+            sigmaconfigs = SigmaConfigurationChain()
+            order = 0
+            for name in configs:
+                try:
+                    sigmaconfig = self.scm.get(name)
+                except OSError as e:
+                    raise SigmaRequestError("Failed to open Sigma configuration %s: %s" % (name, str(e)), ERR_OPEN_CONFIG_FILE)
+                except (yaml.YAMLError, SigmaConfigParseError) as e:
+                    raise SigmaRequestError("Sigma configuration parse error in %s: %s" % (name, str(e)), ERR_CONFIG_PARSING)
+                if sigmaconfig.order is not None:
+                    if sigmaconfig.order <= order:
+                        raise SigmaRequestError("The configurations were provided in the wrong order (order key check in config file)", ERR_CONFIG_ORDER)
+                    order = sigmaconfig.order
+                if target not in sigmaconfig.config.get("backends", [ target ]):
+                    raise SigmaRequestError("The configuration '%s' is not valid for backend '%s'" % (name, target), ERR_CONFIG_ORDER)
+                sigmaconfigs.append(sigmaconfig)
+            try:
+                sigmaconfigs.compile()
+                warm = WarmBackend(backend_class, sigmaconfigs, options)
+                sigmaconfigs.get_optimizations()
+            except SigmaConfigParseError as e:
+                raise SigmaRequestError("Sigma configuration parse error: %s" % str(e), ERR_CONFIG_PARSING)
+            self.backends[key] = warm
+        return warm
+
+    def get_filter(self, expression):
+        if not expression:
+            return None
+        if expression not in self.filters:
+            try:
+                self.filters[expression] = SigmaRuleFilter(expression)
+            except SigmaRuleFilterParseException as e:
+                raise SigmaRequestError("Parse error in Sigma rule filter expression: %s" % str(e), ERR_RULE_FILTER_PARSING)
+        return self.filters[expression]
+
+    def convert(self, request):
+        """Convert the rule of a request given as dict and return the response dict."""
+        if not isinstance(request, dict):
+            raise SigmaRequestError("Request must be a JSON object")
+        target = request.get("target", self.default_target)
+        if target is None:
+            raise SigmaRequestError("No target selected", ERR_NO_TARGET)
+        if target not in backends.getRegistry():
+            raise SigmaRequestError("Unknown target '%s'" % target)
+        backend_class = backends.getBackend(target)
+        configs = self.get_configs(target, backend_class, request)
+        options = self.get_options(request)
+        rulefilter = self.get_filter(request.get("filter", self.default_filter))
+        if "rule" in request:
+            content = request["rule"]
+            path = None
+            if not isinstance(content, str):
+                raise SigmaRequestError("Rule must be given as YAML text")
+        elif isinstance(request.get("path"), str):
+            path = pathlib.Path(request["path"])
+            content = None
+        else:
+            raise SigmaRequestError("Request contains no rule or path")
+
+        warm = self.get_backend(target, configs, options)
+        response = { "id": request.get("id"), "results": list(), "final": None, "code": 0, "error": None }
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        backend = warm.get()
+        try:
+            with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+                if content is None:
+                    with path.open(encoding="utf-8") as f:
+                        parser = SigmaCollectionParser(f, warm.sigmaconfigs, rulefilter, path)
+                else:
+                    parser = SigmaCollectionParser(content, warm.sigmaconfigs, rulefilter)
+                response["results"] = list(parser.generate(backend))
+                response["final"] = backend.finalize()
+        except Exception as e:
+            error = self.describe_error(e, path or "request")
+            if error is None:
+                response["code"] = ERR_UNKNOWN
+                response["error"] = "%s: %s" % (type(e).__name__, str(e))
+            else:
+                message, description, code, backend_error, abort = error
+                response["code"] = 0 if backend_error and request.get("ignore_backend_errors", self.default_ignore_backend_errors) else code
+                response["error"] = message
+        finally:
+            warm.reset()
+        if stdout.getvalue():
+            response["stdout"] = stdout.getvalue()
+        if stderr.getvalue():
+            response["stderr"] = stderr.getvalue()
+        return response
+
+    def handle(self, line):
+        """Handle a request given as JSON line and return the response as JSON line."""
+        start = time.perf_counter()
+        try:
+            request = json.loads(line)
+            if isinstance(request, dict) and request.get("command") == "stats":
+                return json.dumps({ "id": request.get("id"), "stats": self.get_stats() }) + "\n"
+            with self.lock:         # backends aren't thread-safe
+                response = self.convert(request)
+        except json.JSONDecodeError as e:
+            response = { "id": None, "results": list(), "final": None, "code": ERR_REQUEST, "error": "Invalid JSON request: %s" % str(e) }
+        except SigmaRequestError as e:
+            response = { "id": request.get("id") if isinstance(request, dict) else None, "results": list(), "final": None, "code": e.code, "error": str(e) }
+        except Exception as e:      # keep serving if a backend fails while it is set up
+            response = { "id": request.get("id") if isinstance(request, dict) else None, "results": list(), "final": None, "code": ERR_UNKNOWN, "error": "%s: %s" % (type(e).__name__, str(e)) }
+        duration = time.perf_counter() - start
+        with self.lock:
+            self.requests += 1
+            self.errors += response["code"] != 0
+            self.duration += duration
+        return json.dumps(response, default=str) + "\n"
+
+    def serve_stream(self, instream, outstream):
+        """Answer JSON line requests from instream on outstream until the end of the input."""
+        for line in instream:
+            if line.strip():
+                outstream.write(self.handle(line))
+                outstream.flush()
+
+    def serve_socket(self, path):
+        """Answer JSON line requests from connections to a Unix socket at path until interrupted."""
+        try:
+            if stat.S_ISSOCK(os.stat(path).st_mode):       # left over from a previous server
+                os.unlink(path)
+        except FileNotFoundError:
+            pass
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    line = line.decode("utf-8")
+                    if line.strip():
+                        self.wfile.write(server.handle(line).encode("utf-8"))
+                        self.wfile.flush()
+
+        with socketserver.ThreadingUnixStreamServer(path, Handler) as socket_server:
+            try:
+                socket_server.serve_forever()
+            finally:
+                os.unlink(path)
+
+    def get_stats(self):
+        return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "backends": len(self.backends),
+                "mean": self.duration / self.requests if self.requests else 0.0,
+                }
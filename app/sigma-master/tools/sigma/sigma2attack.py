@@ -8,6 +8,8 @@ import sys
 
 import yaml
 
+from sigma.index import SigmaRuleIndex
+
 level_eq = {
     "informational" : 1,
     "low"           : 2,
@@ -32,6 +34,7 @@ def main():
     parser.add_argument("--status-start", "-s",dest="status_start", default="unsupported", help="Check rule with minimun status")
     parser.add_argument("--status-end", "-se",dest="status_end", default="stable", help="Check rule with maximun status")
     parser.add_argument("--level-score", "-l",dest="level_score", action="store_true", help="Score depand form rule level")
+    parser.add_argument("--index", "-i", dest="index", default=None, help="Read rule metadata from this rule index, only rules that aren't indexed are loaded completely")
 
 
     args = parser.parse_args()
@@ -46,9 +49,14 @@ def main():
     num_rules_used = 0
     num_rules_no_tags = 0
     num_rules_no_techniques = 0
+    rule_index = SigmaRuleIndex(args.index) if args.index else None
     for rule_file in rule_files:
+        metadata = rule_index.get(rule_file) if rule_index is not None else None
         with open(rule_file,encoding='utf-8') as f:
-            docs = yaml.load_all(f, Loader=yaml.FullLoader)
+            if metadata is not None:
+                docs = [ metadata ]
+            else:
+                docs = yaml.load_all(f, Loader=yaml.FullLoader)
             double = False
             for rule in docs:
                 if "tags" not in rule :
@@ -87,6 +95,9 @@ def main():
                     sys.stderr.write(f"Ignoring rule {rule_file} no Techniques in {tags} \n")
                     num_rules_no_techniques += 1
 
+    if rule_index is not None:
+        rule_index.save()
+
     scores = []
     for technique in techniques_to_rules:
         if args.level_score == True:
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# Measures the time that backends need for query generation from parsed Sigma rules. Rule
+# parsing is not included in the measurement.
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import argparse
+import sys
+import time
+
+import sigma.backends.discovery as backends
+from sigma.backends.base import BackendOptions
+from sigma.parser.collection import SigmaCollectionParser
+from sigma.configuration import SigmaConfigurationChain
+from sigma.config.collection import SigmaConfigurationManager
+from sigma.tools import getRulePaths
+
+def set_argparser():
+    argparser = argparse.ArgumentParser(description="Measure query generation time of Sigma backends over a rule set.")
+    argparser.add_argument("--recurse", "-r", action="store_true", help="Recurse into subdirectories")
+    argparser.add_argument("--target", "-t", action="append", help="Backend with optional comma-separated configurations as TARGET[:CONFIG,...]. Can be given multiple times. Default: all backends with their default configuration")
+    argparser.add_argument("--backend-option", "-O", action="append", help="Options and switches that are passed to all backends")
+    argparser.add_argument("--repeat", "-n", type=int, default=3, help="Number of measurements per backend, the fastest is reported (default: 3)")
+    argparser.add_argument("inputs", nargs="+", help="Sigma input files or directories")
+    return argparser
+
+def parse_target(target):
+    """Return (backend identifier, list of configurations) from TARGET[:CONFIG,...] specification."""
+    identifier, _, configs = target.partition(":")
+    return identifier, [ config for config in configs.split(",") if config ]
+
+def get_parsers(contents, config):
+    """Parse all rules with configuration chain and return list of parsers. Rules that can't be parsed are skipped."""
+    parsers = list()
+    for content in contents:
+        try:
+            collection = SigmaCollectionParser(content, config)
+            for parser in collection.parsers:
+                parser.condparsed
+                parsers.append(parser)
+        except Exception:
+            pass
+    return parsers
+
+def measure(identifier, configs, contents, backend_options, repeat, scm):
+    """
+    Return (number of rules, number of generation errors, fastest generation time in seconds, generation cache
+    statistics or None) of a backend.
+    """
+    backend_class = backends.getBackend(identifier)
+    if not configs and backend_class.default_config is not None:
+        configs = backend_class.default_config
+    times = list()
+    for i in range(repeat):
+        config = SigmaConfigurationChain([ scm.get(config) for config in configs ])
+        backend = backend_class(config, BackendOptions(backend_options, None))
+        parsers = get_parsers(contents, config)
+        errors = 0
+        elapsed = 0
+        for parser in parsers:
+            start = time.perf_counter()
+            try:
+                backend.generate(parser)
+            except Exception:
+                errors += 1
+            elapsed += time.perf_counter() - start
+        times.append(elapsed)
+    return len(parsers), errors, min(times), backend.getGenerationCacheStats()
+
+def main():
+    argparser = set_argparser()
+    args = argparser.parse_args()
+
+    contents = list()
+    for path in getRulePaths(args.inputs, args.recurse):
+        with path.open(encoding="utf-8") as f:
+            contents.append(f.read())
+
+    if args.target:
+        targets = [ parse_target(target) for target in args.target ]
+    else:
+        targets = [ (identifier, list()) for identifier in sorted(backends.getRegistry()) ]
+
+    scm = SigmaConfigurationManager()
+    print("{:<25} {:>6} {:>6} {:>10} {:>10} {:>10}".format("Backend", "Rules", "Errors", "Total ms", "us/rule", "Cache hits"))
+    for identifier, configs in targets:
+        try:
+            rules, errors, elapsed, cachestats = measure(identifier, configs, contents, args.backend_option, args.repeat, scm)
+        except Exception as e:
+            print("{:<25} error: {}".format(identifier, str(e)), file=sys.stderr)
+            continue
+        hitrate = "{:.1%}".format(cachestats["hitrate"]) if cachestats is not None else "-"
+        print("{:<25} {:>6} {:>6} {:>10.1f} {:>10.1f} {:>10}".format(identifier, rules, errors, elapsed * 1000, elapsed * 1000000 / rules if rules else 0, hitrate))
+
+if __name__ == "__main__":
+    main()
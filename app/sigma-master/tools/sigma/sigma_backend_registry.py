@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# Generates the backend registry manifest sigma/backends/registry.py that is used by sigmac to
+# look up backends without import of all backend modules.
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import argparse
+import os
+import sys
+from collections import Counter
+
+import sigma.backends.discovery as backends
+
+header = """# Sigma backend registry
+# Generated by sigma_backend_registry from the backend modules, don't edit. Rebuild it after adding,
+# renaming or removing backends.
+
+backends = {
+"""
+
+def build_registry():
+    """Return source code of the registry manifest from all discovered backends."""
+    backend_list = backends.getBackendList()
+    duplicates = [ identifier for identifier, count in Counter(backend.identifier for backend in backend_list).items() if count > 1 ]
+    if duplicates:
+        raise ValueError("Backend identifiers are not unique: " + ", ".join(sorted(duplicates)))
+    registry = header
+    for backend in sorted(backend_list, key=lambda backend: backend.identifier):
+        registry += "    {!r}: ({!r}, {!r}, {!r}),\n".format(backend.identifier, backend.__module__, backend.__name__, backend.__doc__)
+    registry += "}\n"
+    return registry
+
+def main():
+    argparser = argparse.ArgumentParser(description="Generate the Sigma backend registry manifest.")
+    argparser.add_argument("--check", "-c", action="store_true", help="Don't write the manifest, exit with error code 1 if it is outdated")
+    argparser.add_argument("--output", "-o", default=os.path.join(os.path.dirname(backends.__file__), "registry.py"), help="Output file (default: %(default)s)")
+    args = argparser.parse_args()
+
+    try:
+        registry = build_registry()
+    except ValueError as e:
+        print("Error: " + str(e), file=sys.stderr)
+        sys.exit(2)
+
+    if args.check:
+        try:
+            with open(args.output, encoding="utf-8") as f:
+                current = f.read()
+        except OSError:
+            current = None
+        if current != registry:
+            print("Backend registry %s is outdated, rebuild it with sigma_backend_registry" % args.output, file=sys.stderr)
+            sys.exit(1)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(registry)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# Evaluates Sigma rules on events given as JSON lines and outputs the matching events with the
+# rules that matched.
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import argparse
+import json
+import sys
+
+from sigma.config.collection import SigmaConfigurationManager
+from sigma.configuration import SigmaConfigurationChain
+from sigma.engine import SigmaEngine
+from sigma.filter import SigmaRuleFilter
+from sigma.tools import getRulePaths
+
+def set_argparser():
+    argparser = argparse.ArgumentParser(description="Evaluate Sigma rules on events given as JSON lines.")
+    argparser.add_argument("--recurse", "-r", action="store_true", help="Recurse into subdirectories")
+    argparser.add_argument("--config", "-c", action="append", help="Configurations with field mappings and log source conditions, can be given multiple times")
+    argparser.add_argument("--filter", "-f", help="Evaluate only rules that match the filter, see sigmac")
+    argparser.add_argument("--events", "-e", action="append", help="File with one JSON event per line, can be given multiple times (default: standard input)")
+    argparser.add_argument("--verbose", "-v", action="store_true", help="Report rules that can't be evaluated and event statistics")
+    argparser.add_argument("inputs", nargs="+", help="Sigma input files or directories")
+    return argparser
+
+def get_lines(events):
+    if not events:
+        yield from sys.stdin
+        return
+    for path in events:
+        with open(path, encoding="utf-8") as f:
+            yield from f
+
+def main():
+    argparser = set_argparser()
+    args = argparser.parse_args()
+
+    scm = SigmaConfigurationManager()
+    try:
+        config = SigmaConfigurationChain([ scm.get(config) for config in args.config or list() ])
+    except Exception as e:
+        print("Failed to load configuration: %s" % str(e), file=sys.stderr)
+        sys.exit(3)
+    rulefilter = SigmaRuleFilter(args.filter) if args.filter else None
+
+    engine = SigmaEngine(config, rulefilter)
+    skipped = 0
+    for path in getRulePaths(args.inputs, args.recurse):
+        try:
+            engine.add_file(path)
+        except Exception as e:
+            skipped += 1
+            if args.verbose:
+                print("Skipping %s: %s" % (str(path), str(e)), file=sys.stderr)
+    if args.verbose:
+        print("Evaluating %d rules, %d files skipped" % (len(engine.rules), skipped), file=sys.stderr)
+
+    events = matches = 0
+    for number, line in enumerate(get_lines(args.events), 1):
+        if not line.strip():
+            continue
+        try:
+            event = json.loads(line)
+        except ValueError as e:
+            print("Invalid event in line %d: %s" % (number, str(e)), file=sys.stderr)
+            continue
+        if type(event) != dict:
+            print("Invalid event in line %d: not an object" % number, file=sys.stderr)
+            continue
+        events += 1
+        rules = engine.match(event)
+        if rules:
+            matches += 1
+            print(json.dumps({
+                "rules": [ { "title": rule.title, "id": rule.id, "level": rule.level, "file": str(rule.filename) } for rule in rules ],
+                "event": event,
+                }), flush=True)
+    if args.verbose:
+        print("%d of %d events matched" % (matches, events), file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
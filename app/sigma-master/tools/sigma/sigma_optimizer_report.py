@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# Reports the effect of the optional condition optimizer passes on the number
+# of predicates in the parsed conditions of Sigma rules.
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import argparse
+import copy
+import sys
+
+from sigma.parser.collection import SigmaCollectionParser
+from sigma.parser.condition import SigmaConditionOptimizer, NodeSubexpression, ConditionNULLValue
+from sigma.configuration import SigmaConfigurationChain
+from sigma.config.collection import SigmaConfigurationManager
+from sigma.tools import getRulePaths
+
+def set_argparser():
+    argparser = argparse.ArgumentParser(description="Report predicate counts of Sigma rule conditions before and after the optional optimizer passes.")
+    argparser.add_argument("--recurse", "-r", action="store_true", help="Recurse into subdirectories")
+    argparser.add_argument("--config", "-c", action="append", help="Configurations with field name and index mapping applied before counting")
+    argparser.add_argument("--passes", "-p", default="all", help="Comma-separated list of optional passes or 'all' (default). Available: " + ", ".join(SigmaConditionOptimizer.optionalPasses))
+    argparser.add_argument("--top", "-t", type=int, default=10, help="Number of rules with the largest reduction that are listed (default: 10)")
+    argparser.add_argument("--verbose", "-v", action="store_true", help="List predicate counts of all rules")
+    argparser.add_argument("inputs", nargs="+", help="Sigma input files or directories")
+    return argparser
+
+def countPredicates(node):
+    """
+    Count the predicates and values in the AST rooted at *node*. A field with a value list is one
+    predicate (a set membership test), but each value of the list is counted.
+    """
+    if type(node) == NodeSubexpression:
+        return countPredicates(node.items)
+    elif isinstance(node, ConditionNULLValue):
+        return (1, 1)
+    elif hasattr(node, "items"):
+        counts = [ countPredicates(item) for item in node.items ]
+        return (sum(count[0] for count in counts), sum(count[1] for count in counts))
+    elif type(node) == tuple and type(node[1]) == list:
+        return (1, len(node[1]))
+    elif node is None:
+        return (0, 0)
+    else:
+        return (1, 1)
+
+def main():
+    argparser = set_argparser()
+    args = argparser.parse_args()
+
+    try:
+        passes = SigmaConditionOptimizer.parsePasses(args.passes)
+    except ValueError as e:
+        argparser.error(str(e))
+
+    config = SigmaConfigurationChain()
+    if args.config:
+        scm = SigmaConfigurationManager()
+        for conf_name in args.config:
+            config.append(scm.get(conf_name))
+
+    results = list()
+    errors = 0
+    for path in getRulePaths(args.inputs, args.recurse):
+        try:
+            with path.open(encoding="utf-8") as f:
+                collection = SigmaCollectionParser(f.read(), config)
+            before = [0, 0]
+            after = [0, 0]
+            for parser in collection.parsers:
+                for condparsed in parser.condparsed:
+                    optimizer = SigmaConditionOptimizer(passes | config.get_optimizations())
+                    optimized = optimizer.optimizeTree(copy.deepcopy(condparsed.parsedSearch))
+                    for counts, tree in ((before, condparsed.parsedSearch), (after, optimized)):
+                        predicates, values = countPredicates(tree)
+                        counts[0] += predicates
+                        counts[1] += values
+        except Exception as e:
+            print("Error: %s: %s" % (path, str(e)), file=sys.stderr)
+            errors += 1
+            continue
+        results.append((str(path), before, after))
+        if args.verbose:
+            print("{:>6} {:>6} {:>6} {:>6}  {}".format(*before, *after, path))
+
+    total_before = [ sum(result[1][i] for result in results) for i in (0, 1) ]
+    total_after = [ sum(result[2][i] for result in results) for i in (0, 1) ]
+    changed = [ result for result in results if result[1] != result[2] ]
+    print("Passes:             %s" % ", ".join(sorted(passes)))
+    print("Rule files:         %d (%d with errors)" % (len(results), errors))
+    print("Changed rule files: %d" % len(changed))
+    for i, name in ((0, "Predicates"), (1, "Values")):
+        print("%-20s%d" % (name + " before:", total_before[i]))
+        print("%-20s%d" % (name + " after:", total_after[i]))
+        if total_before[i]:
+            print("%-20s%d (%.2f%%)" % ("Reduction:", total_before[i] - total_after[i], 100 * (total_before[i] - total_after[i]) / total_before[i]))
+
+    if args.top and changed:
+        print()
+        print("Largest predicate reductions:")
+        for path, before, after in sorted(changed, key=lambda result: result[1][0] - result[2][0], reverse=True)[:args.top]:
+            print("{:>6} -> {:<6} {}".format(before[0], after[0], path))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# Compares the per-rule latency of sigmac started for each rule with requests to a running
+# conversion server (sigmac --serve).
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import argparse
+import json
+import os
+import pathlib
+import statistics
+import subprocess
+import sys
+import time
+
+from sigma.tools import getRulePaths
+
+sigmac = str(pathlib.Path(__file__).parent.parent / "sigmac")
+
+def set_argparser():
+    argparser = argparse.ArgumentParser(description="Compare per-rule conversion latency of sigmac subprocesses with a sigmac conversion server.")
+    argparser.add_argument("--recurse", "-r", action="store_true", help="Recurse into subdirectories")
+    argparser.add_argument("--target", "-t", required=True, help="Output target format")
+    argparser.add_argument("--config", "-c", action="append", help="Configurations passed to sigmac")
+    argparser.add_argument("--backend-option", "-O", action="append", help="Options and switches that are passed to the backend")
+    argparser.add_argument("--limit", "-n", type=int, default=50, help="Number of rules that are converted (default: 50)")
+    argparser.add_argument("inputs", nargs="+", help="Sigma input files or directories")
+    return argparser
+
+def get_env():
+    """Environment of sigmac subprocesses that imports the sigma package of these tools."""
+    pythonpath = os.path.dirname(sigmac)
+    if os.environ.get("PYTHONPATH"):
+        pythonpath += os.pathsep + os.environ["PYTHONPATH"]
+    return dict(os.environ, PYTHONPATH=pythonpath)
+
+def get_arguments(args):
+    arguments = [ "-t", args.target ]
+    for config in args.config or []:
+        arguments += [ "-c", config ]
+    for option in args.backend_option or []:
+        arguments += [ "-O", option ]
+    return arguments
+
+def measure_subprocess(paths, arguments):
+    """Return list of latencies of sigmac started for each rule in seconds."""
+    latencies = list()
+    for path in paths:
+        start = time.perf_counter()
+        subprocess.run([ sys.executable, sigmac ] + arguments + [ str(path) ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=get_env())
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+def measure_server(paths, arguments):
+    """Return list of request latencies of a conversion server in seconds. The startup of the server isn't measured."""
+    latencies = list()
+    server = subprocess.Popen([ sys.executable, sigmac, "--serve" ] + arguments, stdin=subprocess.PIPE, stdout=subprocess.PIPE, universal_newlines=True, env=get_env())
+    try:
+        for path in paths:
+            request = json.dumps({ "id": str(path), "path": str(path) }) + "\n"
+            start = time.perf_counter()
+            server.stdin.write(request)
+            server.stdin.flush()
+            server.stdout.readline()
+            latencies.append(time.perf_counter() - start)
+    finally:
+        server.stdin.close()
+        server.wait()
+    return latencies
+
+def get_statistics(latencies):
+    latencies = sorted(latencies)
+    return {
+            "mean": statistics.mean(latencies),
+            "median": statistics.median(latencies),
+            "p95": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+            }
+
+def main():
+    argparser = set_argparser()
+    args = argparser.parse_args()
+
+    paths = list(getRulePaths(args.inputs, args.recurse))[:args.limit]
+    if not paths:
+        argparser.error("No Sigma rules found")
+    arguments = get_arguments(args)
+
+    results = [
+            ("sigmac", get_statistics(measure_subprocess(paths, arguments))),
+            ("sigmac --serve", get_statistics(measure_server(paths, arguments))),
+            ]
+    print("{:<16} {:>6} {:>10} {:>10} {:>10}".format("Mode", "Rules", "Mean ms", "Median ms", "p95 ms"))
+    for mode, stats in results:
+        print("{:<16} {:>6} {:>10.1f} {:>10.1f} {:>10.1f}".format(mode, len(paths), stats["mean"] * 1000, stats["median"] * 1000, stats["p95"] * 1000))
+    print("Speedup of mean latency: {:.1f}x".format(results[0][1]["mean"] / results[1][1]["mean"]))
+
+if __name__ == "__main__":
+    main()
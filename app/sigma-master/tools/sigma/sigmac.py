@@ -16,25 +16,38 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import sys
+import os
 import argparse
 import yaml
-import ruamel.yaml
-import json
 import pathlib
 import itertools
+import fnmatch
 import logging, traceback
 from sigma.parser.collection import SigmaCollectionParser
 from sigma.parser.exceptions import SigmaCollectionParseError, SigmaParseError
+from sigma.parser.condition import SigmaConditionOptimizer
 from sigma.configuration import SigmaConfiguration, SigmaConfigurationChain
 from sigma.config.collection import SigmaConfigurationManager
+from sigma.config.cache import SigmaConfigurationCache
 from sigma.config.exceptions import SigmaConfigParseError, SigmaRuleFilterParseException
 from sigma.filter import SigmaRuleFilter
 import sigma.backends.discovery as backends
 from sigma.backends.base import BackendOptions
 from sigma.backends.exceptions import BackendError, NotSupportedError, PartialMatchError, FullMatchError
 from sigma.parser.modifiers import modifiers
+from sigma.parallel import SigmaParallelConverter, picklable_exception
+from sigma.cache import SigmaResultCache, CachedResult, collect_garbage, get_options_fingerprint, open_content
+from sigma.output import SigmaOutputWriter, SigmaOutputError, get_rule_metadata
+from sigma.server import SigmaConversionServer
+from sigma.profiler import SigmaProfiler, capture_cprofile
+from sigma.index import SigmaRuleIndex
 import codecs
+import collections
+import contextlib
 import copy
+import io
+import json
+import time
 
 sys.stdout = codecs.getwriter('utf-8')(sys.stdout.detach())
 
@@ -62,21 +75,37 @@ ERR_FULL_FIELD_MATCH    = 90
 # Allowed fields in output
 allowed_fields = ["title", "id", "status", "description", "author", "references", "fields", "falsepositives", "level", "tags", "filename"]
 
-def alliter(path):
-    for sub in path.iterdir():
-        if sub.name.startswith("."):
+def match_globs(name, relpath, patterns):
+    """Return True if the file name or the relative path matches one of the glob patterns"""
+    return any([ fnmatch.fnmatchcase(name, pattern) or fnmatch.fnmatchcase(relpath, pattern) for pattern in patterns ])
+
+def walk_directory(path, include=None, exclude=None, sort=False, relpath=""):
+    """
+    Generate the files below a directory while it is traversed with os.scandir. Hidden files and directories are
+    skipped, as well as files and directories matching an exclude pattern and files that don't match any include
+    pattern. Patterns are matched against the name and the path relative to the walked directory. The entries of each
+    directory are returned in directory order or sorted by name.
+    """
+    with os.scandir(str(path)) as it:
+        entries = [ entry for entry in it if not entry.name.startswith(".") ]
+    if sort:
+        entries.sort(key=lambda entry: entry.name)
+    for entry in entries:
+        entrypath = relpath + entry.name
+        if exclude and match_globs(entry.name, entrypath, exclude):
             continue
-        if sub.is_dir():
-            yield from alliter(sub)
-        else:
-            yield sub
+        if entry.is_dir():
+            yield from walk_directory(entry.path, include, exclude, sort, entrypath + "/")
+        elif not include or match_globs(entry.name, entrypath, include):
+            yield pathlib.Path(entry.path)
 
-def get_inputs(paths, recursive):
+def get_inputs(paths, recursive, include=None, exclude=None, sort=False):
+    """Return Sigma input files, directories are walked lazily while the files are converted"""
     if paths == ['-']:
         return [sys.stdin]
 
     if recursive:
-        return list(itertools.chain.from_iterable([list(alliter(pathlib.Path(p))) for p in paths]))
+        return itertools.chain.from_iterable([ walk_directory(pathlib.Path(p), include, exclude, sort) for p in paths ])
     else:
         return [pathlib.Path(p) for p in paths]
 
@@ -96,6 +125,9 @@ def set_argparser():
     Returns the argparser"""
     argparser = argparse.ArgumentParser(description="Convert Sigma rules into SIEM signatures.")
     argparser.add_argument("--recurse", "-r", action="store_true", help="Use directory as input (recurse into subdirectories is not implemented yet)")
+    argparser.add_argument("--include", action="append", metavar="GLOB", help="Only convert files in input directories whose name or relative path matches the glob pattern, e.g. '*.yml'. Can be given multiple times")
+    argparser.add_argument("--exclude", action="append", metavar="GLOB", help="Skip files and subdirectories of input directories whose name or relative path matches the glob pattern. Can be given multiple times")
+    argparser.add_argument("--sort", action="store_true", help="Convert the files of input directories sorted by name instead of directory order")
     argparser.add_argument("--filter", "-f", help="""
     Define comma-separated filters that must match (AND-linked) to rule to be processed.
     Valid filters: level<=x, level>=x, level=x, status=y, logsource=z, tag=t, target=o.
@@ -109,22 +141,30 @@ def set_argparser():
     inlastday=X rule create or modified in the last X days period
     tlp=valid_tlp if rule have no tlp set to WHITE 
             """)
-    argparser.add_argument("--target", "-t", choices=backends.getBackendDict().keys(), help="Output target format")
+    argparser.add_argument("--target", "-t", action="append", type=parse_targets, help="Output target format. Multiple targets can be given as comma-separated list or by repetition of the option, the YAML of each Sigma file is then loaded once for all targets. The output of each target is written into a subdirectory of the --output path named after the target and a summary of the conversion errors is printed at the end")
     argparser.add_argument("--lists", "-l", action="store_true", help="List available output target formats and configurations")
-    argparser.add_argument("--config", "-c", action="append", help="Configurations with field name and index mapping for target environment. Multiple configurations are merged into one. Last config is authoritative in case of conflicts.")
+    argparser.add_argument("--config", "-c", action="append", help="Configurations with field name and index mapping for target environment. Multiple configurations are merged into one. Last config is authoritative in case of conflicts. Configurations prefixed with a target and colon (e.g. splunk:splunk-windows) are only used for this target.")
+    argparser.add_argument("--cache-dir", default=None, help="Directory where compiled configuration chains and conversion results are cached for further conversions. Unchanged Sigma files are not converted again if the backend, its options and the configurations are the same. Must not be writable by untrusted users.")
+    argparser.add_argument("--cache-gc", type=float, metavar="DAYS", default=None, help="Remove entries from the cache directory that weren't used in the last DAYS days before conversion")
+    argparser.add_argument("--rule-index", default=None, metavar="FILE", help="Index of the rule metadata used by --filter (default: index.json in the --cache-dir). Sigma files that are rejected by the filter from their indexed metadata aren't read. The index is updated for new and changed files.")
     argparser.add_argument("--output", "-o", default=None, help="Output file or filename prefix (if end with a '_','/' or '\\')")
     argparser.add_argument("--output-fields", "-of", help="""Enhance your output with additional fields from the Sigma rule (not only the converted rule itself). 
     Select the fields you want by providing their list delimited with commas (no space). Only work with the '--output-format' option and with 'json' or 'yaml' value.
     available additional fields : title, id, status, description, author, references, fields, falsepositives, level, tags.
     This option do not have any effect for backends that already format output : elastalert, kibana, splukxml etc. """)
-    argparser.add_argument("--output-format", "-oF", choices=["json", "yaml"], help="Use only if you want to have JSON or YAML output (default is raw text)")
+    argparser.add_argument("--output-format", "-oF", choices=["json", "ndjson", "yaml"], help="Use only if you want to have JSON, NDJSON (one JSON object per line) or YAML output (default is raw text)")
     argparser.add_argument("--output-extention", "-e", default=None, help="Extension of Output file for filename prefix use")
     argparser.add_argument("--print0", action="store_true", help="Delimit results by NUL-character")
-    argparser.add_argument("--backend-option", "-O", action="append", help="Options and switches that are passed to the backend")
+    argparser.add_argument("--backend-option", "-O", action="append", help="Options and switches that are passed to the backend. The option optimizations=pass1,pass2,... (or 'all') enables optional condition optimizer passes (%s) for all backends" % ", ".join(SigmaConditionOptimizer.optionalPasses))
     argparser.add_argument("--backend-config", "-C", help="Configuration file (YAML format) containing options to pass to the backend")
     argparser.add_argument("--backend-help", action=ActionBackendHelp, help="Print backend options")
     argparser.add_argument("--defer-abort", "-d", action="store_true", help="Don't abort on parse or conversion errors, proceed with next rule. The exit code from the last error is returned")
     argparser.add_argument("--ignore-backend-errors", "-I", action="store_true", help="Only return error codes for parse errors and ignore errors for rules that cause backend errors. Useful, when you want to get as much queries as possible.")
+    argparser.add_argument("--serve", nargs="?", const="-", metavar="SOCKET", help="Run as conversion server that keeps configurations and backends loaded. Answers requests given as JSON lines on standard input or on connections to the Unix socket SOCKET with one JSON line per request. Target, configurations, backend options and filter from the command line are the defaults of the requests")
+    argparser.add_argument("--jobs", "-j", type=int, default=1, help="Convert Sigma files in N parallel processes (0: number of CPUs). Output order, error messages and exit codes are the same as for sequential conversion. Backends that generate one output from all rules and don't support merging of their state convert sequentially.")
+    argparser.add_argument("--profile", nargs="?", const="-", metavar="FILE", help="Measure the time of the conversion phases (file read, YAML load, collection merge, condition tokenization, parsing, optimization, field mapping and backend generation) of each Sigma file and write a JSON report with totals, percentiles and the slowest rules per phase to FILE or stderr. Sigma files are converted sequentially")
+    argparser.add_argument("--profile-top", type=int, default=10, metavar="N", help="Number of slowest rules per phase in the profile report (default: 10)")
+    argparser.add_argument("--profile-cprofile", metavar="FILE", help="Convert the slowest rules of the profile again under cProfile and write the statistics to FILE (pstats format)")
     argparser.add_argument("--shoot-yourself-in-the-foot", action="store_true", help=argparse.SUPPRESS)
     argparser.add_argument("--verbose", "-v", action="store_true", help="Be verbose")
     argparser.add_argument("--debug", "-D", action="store_true", help="Debugging output")
@@ -133,11 +173,11 @@ def set_argparser():
     return argparser
 
 def list_backends(debug):
-    for backend in sorted(backends.getBackendList(), key=lambda backend: backend.identifier):
+    for identifier, (module, classname, description) in sorted(backends.getRegistry().items()):
         if debug:
-            print("{:>15} : {} ({})".format(backend.identifier, backend.__doc__, backend.__name__))
+            print("{:>15} : {} ({})".format(identifier, description, classname))
         else:
-            print("{:>15} : {}".format(backend.identifier, backend.__doc__))
+            print("{:>15} : {}".format(identifier, description))
 
 def list_configurations(backend=None, scm=None):
     for conf_id, title, backends in sorted(scm.list(), key=lambda config: config[0]):
@@ -148,6 +188,248 @@ def list_modifiers(modifiers):
     for modifier_id, modifier in modifiers.items():
         print("{:>10} : {}".format(modifier_id, modifier.__doc__))
 
+class ConversionTarget:
+    """Backend, configuration chain, output and error accounting of a target of the conversion"""
+    def __init__(self, identifier, sigmaconfigs, backend):
+        self.identifier = identifier
+        self.sigmaconfigs = sigmaconfigs
+        self.backend = backend
+        self.writer = None
+        self.cache = None                           # result cache if backend results can be cached
+        self.converted = 0                          # number of successfully converted Sigma files
+        self.failures = collections.Counter()       # error description -> number of Sigma files
+        self.error = 0                              # error code of last error that is not ignored
+
+def parse_targets(value):
+    """Parse comma-separated list of targets"""
+    targets = value.split(",")
+    for target in targets:
+        if target not in backends.getRegistry():
+            raise argparse.ArgumentTypeError("invalid choice: '%s' (choose from %s)" % (target, ", ".join(sorted(backends.getRegistry()))))
+    return targets
+
+def get_target_configs(configs, target):
+    """
+    Return names of configurations used for target: configurations without target prefix and the ones with prefix
+    'target:' in the given order.
+    """
+    target_configs = list()
+    for name in configs:
+        prefix, sep, config = name.partition(":")
+        if sep and prefix in backends.getRegistry():
+            if prefix == target:
+                target_configs.append(config)
+        else:
+            target_configs.append(name)
+    return target_configs
+
+def get_target_output(output, target):
+    """Return output file name or prefix of target in the subdirectory named after the target."""
+    head, tail = os.path.split(output)
+    directory = os.path.join(head, target)
+    os.makedirs(directory, exist_ok=True)
+    if tail:
+        return os.path.join(directory, tail)
+    else:
+        return directory + os.sep
+
+def load_configurations(target, config_names, cmdargs, scm, logger):
+    """Load configuration chain for target from configuration names or the configuration cache. Exits on errors."""
+    sigmaconfigs = SigmaConfigurationChain()
+    config_cache = None
+    cached_configs = None
+    if cmdargs.cache_dir:
+        config_cache = SigmaConfigurationCache(pathlib.Path(cmdargs.cache_dir) / "config")
+        try:
+            cached_configs = config_cache.load(scm.get_fingerprint(config_names))
+        except OSError:     # errors are reported below while loading the configurations
+            pass
+        logger.debug("* Compiled configuration chain %s in cache" % ("found" if cached_configs is not None else "not found"))
+
+    order = 0
+    for position, conf_name in enumerate(config_names):
+        try:
+            if cached_configs is not None:
+                sigmaconfig = cached_configs[position]
+            else:
+                sigmaconfig = scm.get(conf_name)
+            if sigmaconfig.order is not None:
+                if sigmaconfig.order <= order and not cmdargs.shoot_yourself_in_the_foot:
+                    print("The configurations were provided in the wrong order (order key check in config file)", file=sys.stderr)
+                    sys.exit(ERR_CONFIG_ORDER)
+                order = sigmaconfig.order
+
+            try:
+                if target not in sigmaconfig.config["backends"]:
+                    print("The configuration '{}' is not valid for backend '{}'. Valid choices are: {}".format(conf_name, target, ", ".join(sigmaconfig.config["backends"])), file=sys.stderr)
+                    sys.exit(ERR_CONFIG_ORDER)
+            except KeyError:
+                pass
+
+            sigmaconfigs.append(sigmaconfig)
+        except OSError as e:
+            print("Failed to open Sigma configuration file %s: %s" % (conf_name, str(e)), file=sys.stderr)
+            exit(ERR_OPEN_CONFIG_FILE)
+        except (yaml.parser.ParserError, yaml.scanner.ScannerError) as e:
+            print("Sigma configuration file %s is no valid YAML: %s" % (conf_name, str(e)), file=sys.stderr)
+            exit(ERR_CONFIG_INVALID_YAML)
+        except SigmaConfigParseError as e:
+            print("Sigma configuration parse error in %s: %s" % (conf_name, str(e)), file=sys.stderr)
+            exit(ERR_CONFIG_PARSING)
+
+    if cached_configs is not None:
+        sigmaconfigs = cached_configs
+    elif config_cache is not None:
+        try:
+            sigmaconfigs.compile()
+        except SigmaConfigParseError as e:
+            print("Sigma configuration parse error: %s" % str(e), file=sys.stderr)
+            exit(ERR_CONFIG_PARSING)
+        try:
+            config_cache.store(sigmaconfigs)
+        except OSError as e:
+            print("Failed to store compiled configuration in cache: %s" % str(e), file=sys.stderr)
+    return sigmaconfigs
+
+def replay_cached(result):
+    """Replay output of the backend from a cached result and return its results and metadata or raise its error."""
+    sys.stdout.write(result.stdout)
+    sys.stderr.write(result.stderr)
+    if result.error is not None:
+        raise result.error
+    return result.results, result.metadata
+
+def convert_cached(target, sigmafile, content, convert):
+    """
+    Call convert() while capturing the output of the backend and store its outcome in the result cache of the target.
+    Returns the results and metadata returned by convert() or raises its error.
+    """
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+    results = None
+    metadata = None
+    error = None
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+        try:
+            results, metadata = convert()
+        except Exception as e:
+            error = e
+    duration = time.perf_counter() - start
+    sys.stdout.write(stdout.getvalue())
+    sys.stderr.write(stderr.getvalue())
+    try:
+        target.cache.store(sigmafile, content, CachedResult(results, picklable_exception(error) if error is not None else None, stdout.getvalue(), stderr.getvalue(), metadata, duration))
+    except Exception as e:
+        if target.cache.errors == 0:
+            print("Failed to store conversion result of %s in cache: %s" % (sigmafile, str(e)), file=sys.stderr)
+        target.cache.errors += 1
+    if error is not None:
+        raise error
+    return results, metadata
+
+def describe_error(e, sigmafile, prefix=""):
+    """
+    Return (message, description, error code, backend error, abort) of an error that occurred while converting a Sigma
+    file or None if the error is unknown. Backend errors can be ignored, abort is False if the conversion should
+    proceed with the next file.
+    """
+    backend_error = True
+    abort = True
+    if isinstance(e, OSError):
+        message = "%sFailed to open Sigma file %s: %s" % (prefix, sigmafile, str(e))
+        description, code, backend_error, abort = "failed to open", ERR_OPEN_SIGMA_RULE, False, False
+    elif isinstance(e, (yaml.parser.ParserError, yaml.scanner.ScannerError)):
+        message = "%sError: Sigma file %s is no valid YAML: %s" % (prefix, sigmafile, str(e))
+        description, code, backend_error = "invalid YAML", ERR_INVALID_YAML, False
+    elif isinstance(e, (SigmaParseError, SigmaCollectionParseError)):
+        message = "%sError: Sigma parse error in %s: %s" % (prefix, sigmafile, str(e))
+        description, code, backend_error = "parse error", ERR_SIGMA_PARSING, False
+    elif isinstance(e, NotSupportedError):
+        message = prefix + "Error: The Sigma rule requires a feature that is not supported by the target system: " + str(e)
+        description, code = "not supported", ERR_NOT_SUPPORTED
+    elif isinstance(e, BackendError):
+        message = "%sError: Backend error in %s: %s" % (prefix, sigmafile, str(e))
+        description, code = "backend error", ERR_BACKEND
+    elif isinstance(e, (NotImplementedError, TypeError)):
+        message = prefix + "An unsupported feature is required for this Sigma rule (%s): " % (sigmafile) + str(e)
+        description, code = "unsupported feature", ERR_NOT_IMPLEMENTED
+    elif isinstance(e, PartialMatchError):
+        message = "%sError: Partial field match error: %s" % (prefix, str(e))
+        description, code = "partial field match", ERR_PARTIAL_FIELD_MATCH
+    elif isinstance(e, FullMatchError):
+        message = "%sError: Full field match error" % prefix
+        description, code = "full field match", ERR_FULL_FIELD_MATCH
+    else:
+        return None
+    return message, description, code, backend_error, abort
+
+def report_error(targets, e, sigmafile, cmdargs, logger, prefix=""):
+    """
+    Print error that occurred while converting a Sigma file for the targets and account it. Exits if the conversion
+    should be aborted. Returns the error code, 0 if the error is ignored, or None if the error is unknown.
+    """
+    error = describe_error(e, sigmafile, prefix)
+    if error is None:
+        return None
+    message, description, code, backend_error, abort = error
+    print(message, file=sys.stderr)
+    logger.debug("* Convertion Sigma input %s FAILURE" % (sigmafile))
+
+    if backend_error and cmdargs.ignore_backend_errors:
+        code = 0
+    for target in targets:
+        target.failures[description] += 1
+        if code:
+            target.error = code
+    if code and abort and not cmdargs.defer_abort:
+        sys.exit(code)
+    return code
+
+def write_profile(profiler, cmdargs, targets, backend_options, rulefilter):
+    """Write the profile report and optionally the cProfile statistics of the slowest rules."""
+    report = profiler.report(cmdargs.profile_top)
+    if cmdargs.profile_cprofile:
+        paths = [ rule for elapsed, rule in profiler.get_slowest(cmdargs.profile_top) if os.path.isfile(rule) ]
+        backends = [ (type(target.backend)(sigmaconfigs, copy.copy(backend_options)), sigmaconfigs) for target, sigmaconfigs in ((target, copy.deepcopy(target.sigmaconfigs)) for target in targets) ]
+        report["cprofile"] = {
+                "file": cmdargs.profile_cprofile,
+                "rules": paths,
+                "functions": capture_cprofile(paths, backends, rulefilter, cmdargs.profile_cprofile),
+                }
+    try:
+        if cmdargs.profile == "-":
+            json.dump(report, sys.stderr, indent=2)
+            print(file=sys.stderr)
+        else:
+            with open(cmdargs.profile, "w") as f:
+                json.dump(report, f, indent=2)
+    except OSError as e:
+        print("Failed to write profile report: %s" % str(e), file=sys.stderr)
+        sys.exit(ERR_OUTPUT)
+
+def serve(cmdargs, argparser, scm, targets):
+    """Run conversion server with the command line arguments as defaults of the requests."""
+    if len(targets) > 1:
+        argparser.error("The conversion server accepts only one default target")
+    if cmdargs.inputs:
+        argparser.error("The conversion server reads the Sigma rules from the requests, no input files are allowed")
+    target = targets[0] if targets else None
+    config = cmdargs.config or []
+    if target is not None:
+        config = get_target_configs(config, target)
+    server = SigmaConversionServer(scm, describe_error, target, config, BackendOptions(cmdargs.backend_option, cmdargs.backend_config), cmdargs.filter, cmdargs.ignore_backend_errors)
+    try:
+        if cmdargs.serve == "-":
+            server.serve_stream(sys.stdin, sys.stdout)
+        else:
+            server.serve_socket(cmdargs.serve)
+    except KeyboardInterrupt:
+        pass
+    if cmdargs.verbose:
+        stats = server.get_stats()
+        print("Conversion server: %d requests, %d errors, %d backends, %.1f ms mean duration" % (stats["requests"], stats["errors"], stats["backends"], stats["mean"] * 1000), file=sys.stderr)
+
 def main():
     argparser = set_argparser()
     cmdargs = argparser.parse_args()
@@ -158,29 +440,53 @@ def main():
         logging.basicConfig(filename='sigmac.log', filemode='w', level=logging.DEBUG)
         logger.setLevel(logging.DEBUG)
 
+    targets = list()
+    for target in itertools.chain.from_iterable(cmdargs.target or []):
+        if target not in targets:
+            targets.append(target)
+
     if cmdargs.lists:
         print("Backends (Targets):")
         list_backends(cmdargs.debug)
 
         print()
         print("Configurations (Sources):")
-        list_configurations(backend=cmdargs.target, scm=scm)
+        list_configurations(backend=targets[0] if len(targets) == 1 else None, scm=scm)
 
         print()
         print("Modifiers:")
         list_modifiers(modifiers=modifiers)
         sys.exit(0)
-    elif len(cmdargs.inputs) == 0:
+
+    if cmdargs.cache_gc is not None:
+        if not cmdargs.cache_dir:
+            argparser.error("--cache-gc requires a cache directory given with --cache-dir")
+        removed, size = collect_garbage(cmdargs.cache_dir, cmdargs.cache_gc)
+        logger.debug("* Removed %d cache entries with %d bytes" % (removed, size))
+        if cmdargs.verbose or len(cmdargs.inputs) == 0:
+            print("Removed %d cache entries (%.1f MB) that weren't used in the last %g days" % (removed, size / 1048576, cmdargs.cache_gc), file=sys.stderr)
+        if len(cmdargs.inputs) == 0:
+            sys.exit(0)
+
+    if cmdargs.serve is not None:
+        serve(cmdargs, argparser, scm, targets)
+        sys.exit(0)
+
+    if len(cmdargs.inputs) == 0:
         print("Nothing to do!")
         argparser.print_usage()
         sys.exit(0)
 
-    if cmdargs.target is None:
+    if not targets:
         print("No target selected, select one with -t/--target")
         argparser.print_usage()
         sys.exit(ERR_NO_TARGET)
+    multiple = len(targets) > 1
+    if multiple and not cmdargs.output:
+        print("Conversion into multiple targets requires an output directory or file name given with --output/-o. The output of each target is written into a subdirectory named after the target.", file=sys.stderr)
+        sys.exit(ERR_OUTPUT)
 
-    logger.debug("* Target selected %s" % (cmdargs.target))
+    logger.debug("* Target selected %s" % (", ".join(targets)))
 
     rulefilter = None
     if cmdargs.filter:
@@ -190,45 +496,40 @@ def main():
             print("Parse error in Sigma rule filter expression: %s" % str(e), file=sys.stderr)
             sys.exit(ERR_RULE_FILTER_PARSING)
 
-    sigmaconfigs = SigmaConfigurationChain()
-    backend_class = backends.getBackend(cmdargs.target)
-    if cmdargs.config is None:
-        if backend_class.config_required and not cmdargs.shoot_yourself_in_the_foot:
-            print("The backend you want to use usually requires a configuration to generate valid results. Please provide one with --config/-c.", file=sys.stderr)
-            print("Available choices for this backend (get complete list with --lists/-l):")
-            list_configurations(backend=cmdargs.target, scm=scm)
-            sys.exit(ERR_CONFIG_REQUIRED)
-        if backend_class.default_config is not None:
-            cmdargs.config = backend_class.default_config
-
-    if cmdargs.config:
-        order = 0
-        for conf_name in cmdargs.config:
-            try:
-                sigmaconfig = scm.get(conf_name)
-                if sigmaconfig.order is not None:
-                    if sigmaconfig.order <= order and not cmdargs.shoot_yourself_in_the_foot:
-                        print("The configurations were provided in the wrong order (order key check in config file)", file=sys.stderr)
-                        sys.exit(ERR_CONFIG_ORDER)
-                    order = sigmaconfig.order
-
-                try:
-                    if cmdargs.target not in sigmaconfig.config["backends"]:
-                        print("The configuration '{}' is not valid for backend '{}'. Valid choices are: {}".format(conf_name, cmdargs.target, ", ".join(sigmaconfig.config["backends"])), file=sys.stderr)
-                        sys.exit(ERR_CONFIG_ORDER)
-                except KeyError:
-                    pass
+    backend_options = BackendOptions(cmdargs.backend_option, cmdargs.backend_config)
+    options_fingerprint = get_options_fingerprint(backend_options)
+    conversion_targets = list()
+    for target in targets:
+        backend_class = backends.getBackend(target)
+        config_names = get_target_configs(cmdargs.config or [], target)
+        if not config_names:
+            if backend_class.config_required and not cmdargs.shoot_yourself_in_the_foot:
+                print("The backend you want to use usually requires a configuration to generate valid results. Please provide one with --config/-c.", file=sys.stderr)
+                print("Available choices for this backend (get complete list with --lists/-l):")
+                list_configurations(backend=target, scm=scm)
+                sys.exit(ERR_CONFIG_REQUIRED)
+            if backend_class.default_config is not None:
+                config_names = backend_class.default_config
+
+        if config_names:
+            sigmaconfigs = load_configurations(target, config_names, cmdargs, scm, logger)
+        else:
+            sigmaconfigs = SigmaConfigurationChain()
 
-                sigmaconfigs.append(sigmaconfig)
-            except OSError as e:
-                print("Failed to open Sigma configuration file %s: %s" % (conf_name, str(e)), file=sys.stderr)
-                exit(ERR_OPEN_CONFIG_FILE)
-            except (yaml.parser.ParserError, yaml.scanner.ScannerError) as e:
-                print("Sigma configuration file %s is no valid YAML: %s" % (conf_name, str(e)), file=sys.stderr)
-                exit(ERR_CONFIG_INVALID_YAML)
-            except SigmaConfigParseError as e:
-                print("Sigma configuration parse error in %s: %s" % (conf_name, str(e)), file=sys.stderr)
-                exit(ERR_CONFIG_PARSING)
+        backend = backend_class(sigmaconfigs, copy.copy(backend_options) if multiple else backend_options)
+        try:
+            sigmaconfigs.get_optimizations()
+        except SigmaConfigParseError as e:
+            print("Sigma configuration parse error: %s" % str(e), file=sys.stderr)
+            exit(ERR_CONFIG_PARSING)
+
+        conversion_target = ConversionTarget(target, sigmaconfigs, backend)
+        if cmdargs.cache_dir and cmdargs.inputs != ['-']:
+            if SigmaResultCache.is_cacheable(backend_class):
+                conversion_target.cache = SigmaResultCache(pathlib.Path(cmdargs.cache_dir) / "results", target, backend_class, sigmaconfigs.get_fingerprint(), options_fingerprint, cmdargs.filter)
+            elif cmdargs.verbose:
+                print("Backend %s doesn't support caching of conversion results, all Sigma files are converted" % (target), file=sys.stderr)
+        conversion_targets.append(conversion_target)
 
     if cmdargs.output_fields:
         if cmdargs.output_format: 
@@ -242,175 +543,252 @@ def main():
             print("The '--output-fields' or '-of' arguments must be used with '--output-format' or '-oF' equal to 'json' or 'yaml'", file=sys.stderr)
             exit(ERR_OUTPUT_FORMAT)
 
-    backend_options = BackendOptions(cmdargs.backend_option, cmdargs.backend_config)
-    backend = backend_class(sigmaconfigs, backend_options)
-    
     filename_ext = cmdargs.output_extention
-    filename = cmdargs.output
-    fileprefix = None
-    if filename:
-        if filename_ext:
-            if filename_ext[0] == '.':
-                pass
-            else:
-                filename_ext = '.' + filename_ext
-        else:
-            filename_ext = '.rule'
-    
-        if filename[-1:] in ['_','/','\\']:
-            fileprefix = filename
-        else:
-            try:
-                out = open(filename, "w", encoding='utf-8')
-            except (IOError, OSError) as e:
-                print("Failed to open output file '%s': %s" % (filename, str(e)), file=sys.stderr)
-                exit(ERR_OUTPUT)
+    if filename_ext:
+        if filename_ext[0] != '.':
+            filename_ext = '.' + filename_ext
     else:
-        out = sys.stdout
+        filename_ext = '.rule'
+    output_format = cmdargs.output_format if cmdargs.output_fields else None
+    for target in conversion_targets:
+        try:
+            output = get_target_output(cmdargs.output, target.identifier) if multiple else cmdargs.output
+            target.writer = SigmaOutputWriter(output, filename_ext, '\0' if cmdargs.print0 else '\n', output_format, target.identifier)
+        except SigmaOutputError as e:
+            print(str(e), file=sys.stderr)
+            exit(ERR_OUTPUT)
+        except OSError as e:
+            print("Failed to create output directory for target %s: %s" % (target.identifier, str(e)), file=sys.stderr)
+            exit(ERR_OUTPUT)
+
+    def message_prefix(targets):
+        """Error messages are prefixed with the targets if multiple targets are converted"""
+        if multiple:
+            return ", ".join([ target.identifier for target in targets ]) + ": "
+        else:
+            return ""
+
+    inputs = get_inputs(cmdargs.inputs, cmdargs.recurse, cmdargs.include, cmdargs.exclude, cmdargs.sort)
+    caching = any([ target.cache is not None for target in conversion_targets ])
+    jobs = cmdargs.jobs if cmdargs.jobs > 0 else os.cpu_count()
+    rule_index = None
+    index_path = cmdargs.rule_index or (os.path.join(cmdargs.cache_dir, "index.json") if cmdargs.cache_dir else None)
+    if index_path and rulefilter is not None and output_format is None and cmdargs.inputs != ['-']:
+        rule_index = SigmaRuleIndex(index_path)
+
+    profiler = None
+    if cmdargs.profile is not None:
+        if jobs > 1 and cmdargs.verbose:
+            print("Sigma files are converted sequentially while profiling", file=sys.stderr)
+        jobs = 1
+        profiler = SigmaProfiler()
+        profiler.install()
+        for target in conversion_targets:
+            profiler.add_backend(target.backend)
+    parallel = None         # target that is converted in parallel processes
+    if jobs > 1 and cmdargs.inputs != ['-'] and output_format is None:
+        target = conversion_targets[0]
+        if multiple:
+            if cmdargs.verbose:
+                print("Sigma files are converted sequentially for multiple targets", file=sys.stderr)
+        elif type(target.backend).isMergeable():
+            parallel = target
+        elif cmdargs.verbose:
+            print("Backend %s doesn't support parallel conversion, Sigma files are converted sequentially" % (target.identifier), file=sys.stderr)
+
+    counts = collections.Counter()
+    def classify(inputs):
+        """
+        Generate (Sigma file, rejected by rule index, cached result of the parallel target) for the inputs. The
+        cached results are looked up before the parallel conversion of the other files.
+        """
+        for sigmafile in inputs:
+            counts["inputs"] += 1
+            skipped = False
+            if rule_index is not None:
+                try:
+                    skipped = rule_index.match(sigmafile, rulefilter) is False
+                except OSError:         # reported while converting
+                    pass
+                counts["skipped"] += skipped
+            result = None
+            if parallel is not None and parallel.cache is not None and not skipped:
+                try:
+                    result = parallel.cache.load(sigmafile, sigmafile.read_bytes())
+                except OSError:         # reported while converting
+                    pass
+            yield sigmafile, skipped, result
+
+    # The main loop and the parallel converter consume the same classified inputs, the converter runs at most two
+    # chunks per process ahead, which bounds the files buffered between both.
+    files = classify(inputs)
+    converted = None
+    if parallel is not None:
+        files, pending = itertools.tee(files)
+        paths = ( sigmafile for sigmafile, skipped, result in pending if not skipped and result is None )
+        converted = SigmaParallelConverter(jobs, parallel.backend, parallel.sigmaconfigs, backend_options, rulefilter, cache=parallel.cache).convert(paths)
 
     error = 0
-    output_array = []
-    for sigmafile in get_inputs(cmdargs.inputs, cmdargs.recurse):
+    for sigmafile, skipped, cached_result in files:
         logger.debug("* Processing Sigma input %s" % (sigmafile))
+        if skipped:
+            for target in conversion_targets:
+                try:
+                    target.writer.write_results(sigmafile, [])
+                except SigmaOutputError as e:
+                    print(str(e), file=sys.stderr)
+                    exit(ERR_OUTPUT)
+                target.converted += 1
+            continue
+        if profiler is not None:
+            profiler.start_rule(sigmafile)
         success = True
+        cached_results = dict()         # target -> cached result
+        if cached_result is not None:
+            cached_results[conversion_targets[0]] = cached_result
+        elif converted is not None:
+            _, converted_results, conversion_error = next(converted)
+        f = None
+        content = None
         try:
             if cmdargs.inputs == ['-']:
                 f = sigmafile
+            elif (caching or profiler is not None) and converted is None:
+                with profiler.phase("read") if profiler is not None else contextlib.nullcontext():
+                    content = sigmafile.read_bytes()
+                for target in conversion_targets:
+                    if target.cache is not None:
+                        result = target.cache.load(sigmafile, content, output_format is not None)
+                        if result is not None:
+                            cached_results[target] = result
+                f = open_content(content)
             else:
                 f = sigmafile.open(encoding='utf-8')
-            parser = SigmaCollectionParser(f, sigmaconfigs, rulefilter, sigmafile)
-            results = parser.generate(backend)
-
-            nb_result = len(list(copy.deepcopy(results)))
-            inc_filenane = None if nb_result < 2 else 0
-            
-            newline_separator = '\0' if cmdargs.print0 else '\n'
-
-            results = list(results) # Since results is an iterator and used twice we convert it a list
-            for result in results:
-                if not fileprefix == None and not inc_filenane == None: #yml action
-                    try:
-                        filename = fileprefix + str(sigmafile.name)
-                        filename = filename.replace('.yml','_' + str(inc_filenane) + filename_ext)
-                        inc_filenane += 1
-                        out = open(filename, "w", encoding='utf-8')
-                    except (IOError, OSError) as e:
-                        print("Failed to open output file '%s': %s" % (filename, str(e)), file=sys.stderr)
-                        exit(ERR_OUTPUT)
-                elif  not fileprefix == None and inc_filenane == None: # a simple yml
-                    try:
-                        filename = fileprefix + str(sigmafile.name)
-                        filename = filename.replace('.yml',filename_ext) 
-                        out = open(filename, "w", encoding='utf-8')
-                    except (IOError, OSError) as e:
-                        print("Failed to open output file '%s': %s" % (filename, str(e)), file=sys.stderr)
-                        exit(ERR_OUTPUT)
-                if not cmdargs.output_fields:
-                    print(result, file=out, end=newline_separator)
-
-            if cmdargs.output_fields: # Handle output fields
-                output={}
-                f.seek(0)
-                docs = yaml.load_all(f, Loader=yaml.FullLoader)
-                for doc in docs:
-                    for k,v in doc.items():
-                        if k in output_fields_filtered:
-                            output[k] = v
-                output['rule'] = [result for result in results]
-                if "filename" in output_fields_filtered:
-                    output['filename'] = str(sigmafile.name)
-                output_array.append(output)
-
-            if nb_result == 0: # backend get only 1 output
-                if not fileprefix == None: # want a prefix anyway
-                    try:
-                        filename = "%s%s_mono_output%s" % (fileprefix,cmdargs.target,filename_ext)
-                        out = open(filename, "w", encoding='utf-8')
-                        fileprefix = None  # no need to open the same file many time
-                    except (IOError, OSError) as e:
-                        print("Failed to open output file '%s': %s" % (filename, str(e)), file=sys.stderr)
-                        exit(ERR_OUTPUT) 
-
-        except OSError as e:
-            print("Failed to open Sigma file %s: %s" % (sigmafile, str(e)), file=sys.stderr)
-            logger.debug("* Convertion Sigma input %s FAILURE" % (sigmafile))
-            success = False
-            error = ERR_OPEN_SIGMA_RULE
-        except (yaml.parser.ParserError, yaml.scanner.ScannerError) as e:
-            print("Error: Sigma file %s is no valid YAML: %s" % (sigmafile, str(e)), file=sys.stderr)
-            logger.debug("* Convertion Sigma input %s FAILURE" % (sigmafile))
-            success = False
-            error = ERR_INVALID_YAML
-            if not cmdargs.defer_abort:
-                sys.exit(error)
-        except (SigmaParseError, SigmaCollectionParseError) as e:
-            print("Error: Sigma parse error in %s: %s" % (sigmafile, str(e)), file=sys.stderr)
-            logger.debug("* Convertion Sigma input %s FAILURE" % (sigmafile))
-            success = False
-            error = ERR_SIGMA_PARSING
-            if not cmdargs.defer_abort:
-                sys.exit(error)
-        except NotSupportedError as e:
-            print("Error: The Sigma rule requires a feature that is not supported by the target system: " + str(e), file=sys.stderr)
-            logger.debug("* Convertion Sigma input %s FAILURE" % (sigmafile))
-            success = False
-            if not cmdargs.ignore_backend_errors:
-                error = ERR_NOT_SUPPORTED
-                if not cmdargs.defer_abort:
-                    sys.exit(error)
-        except BackendError as e:
-            print("Error: Backend error in %s: %s" % (sigmafile, str(e)), file=sys.stderr)
-            logger.debug("* Convertion Sigma input %s FAILURE" % (sigmafile))
-            success = False
-            if not cmdargs.ignore_backend_errors:
-                error = ERR_BACKEND
-                if not cmdargs.defer_abort:
-                    sys.exit(error)
-        except (NotImplementedError, TypeError) as e:
-            print("An unsupported feature is required for this Sigma rule (%s): " % (sigmafile) + str(e), file=sys.stderr)
-            # traceback.print_exc()
-            logger.debug("* Convertion Sigma input %s FAILURE" % (sigmafile))
-            success = False
-            if not cmdargs.ignore_backend_errors:
-                error = ERR_NOT_IMPLEMENTED
-                if not cmdargs.defer_abort:
-                    sys.exit(error)
-        except PartialMatchError as e:
-            print("Error: Partial field match error: %s" % str(e), file=sys.stderr)
-            logger.debug("* Convertion Sigma input %s FAILURE" % (sigmafile))
-            success = False
-            if not cmdargs.ignore_backend_errors:
-                error = ERR_PARTIAL_FIELD_MATCH
-                if not cmdargs.defer_abort:
-                    sys.exit(error)
-        except FullMatchError as e:
-            print("Error: Full field match error", file=sys.stderr)
-            logger.debug("* Convertion Sigma input %s FAILURE" % (sigmafile))
+            documents = None
+            if not multiple and cmdargs.inputs == ['-'] and conversion_targets[0].writer.fileprefix is None and output_format is None:     # stream rules from stdin one by one
+                target = conversion_targets[0]
+                parser = SigmaCollectionParser(f, target.sigmaconfigs, rulefilter, sigmafile, lazy=True)
+                for meta, result in parser.iter_generate(target.backend):
+                    if meta["error"] is not None:
+                        raise meta["error"]
+                    target.writer.write(result)
+                target.converted += 1
+                targets_to_convert = list()
+            elif multiple:
+                if len(cached_results) < len(conversion_targets):
+                    documents = SigmaCollectionParser.load_documents(f, rulefilter)
+                targets_to_convert = conversion_targets
+            else:
+                targets_to_convert = conversion_targets
+        except SigmaOutputError as e:
+            print(str(e), file=sys.stderr)
+            exit(ERR_OUTPUT)
+        except Exception as e:
+            code = report_error(conversion_targets, e, sigmafile, cmdargs, logger, message_prefix(conversion_targets))
+            if code is None:
+                raise
+            error = code or error
             success = False
-            if not cmdargs.ignore_backend_errors:
-                error = ERR_FULL_FIELD_MATCH
-                if not cmdargs.defer_abort:
-                    sys.exit(error)                
-        finally:
+            targets_to_convert = list()
+
+        # Loading YAML is the expensive part of parsing, for multiple targets the documents are loaded once. Backends
+        # may modify the parsed rules, therefore each target parses its own copy of the documents, except the last one.
+        for index, target in enumerate(targets_to_convert):
+            if profiler is not None:
+                profiler.set_target(target.identifier)
+
+            def convert():
+                if documents is None:
+                    parser = SigmaCollectionParser(f, target.sigmaconfigs, rulefilter, sigmafile)
+                else:
+                    parser = SigmaCollectionParser(None, target.sigmaconfigs, rulefilter, sigmafile, documents=copy.deepcopy(documents) if index < len(targets_to_convert) - 1 else documents)
+                results = list(parser.generate(target.backend))
+                if output_format is not None or target.cache is not None:
+                    return results, get_rule_metadata(parser, allowed_fields)
+                else:
+                    return results, None
+
             try:
-                f.close()
-            except:
-                pass
-        
+                if target in cached_results:
+                    results, metadata = replay_cached(cached_results[target])
+                elif converted is not None:
+                    if conversion_error is not None:
+                        raise conversion_error
+                    results, metadata = converted_results, None
+                elif target.cache is not None and content is not None:
+                    results, metadata = convert_cached(target, sigmafile, content, convert)
+                else:
+                    results, metadata = convert()
+
+                if output_format is not None:
+                    metadata = { key: value for key, value in metadata.items() if key in output_fields_filtered }
+                    target.writer.write_record(metadata, results, str(sigmafile.name) if "filename" in output_fields_filtered else None)
+                else:
+                    target.writer.write_results(sigmafile, results)
+                target.converted += 1
+            except SigmaOutputError as e:
+                print(str(e), file=sys.stderr)
+                exit(ERR_OUTPUT)
+            except Exception as e:
+                code = report_error([target], e, sigmafile, cmdargs, logger, message_prefix([target]))
+                if code is None:
+                    raise
+                error = code or error
+                success = False
+
+        try:
+            f.close()
+        except:
+            pass
+
+        if profiler is not None:
+            profiler.set_target(None)
+            profiler.stop_rule()
+
         if success :
             logger.debug("* Convertion Sigma input %s SUCCESS" % (sigmafile)) 
- 
-    result = backend.finalize()
-    if result:
-        print(result, file=out)
 
-    if cmdargs.output_fields:
-        if cmdargs.output_format == 'json':
-            print(json.dumps(output_array, indent=4, ensure_ascii=False), file=out)
-        elif cmdargs.output_format == 'yaml':
-            print(ruamel.yaml.round_trip_dump(output_array), file=out)
+    if rule_index is not None:
+        try:
+            rule_index.save()
+        except OSError as e:
+            print("Failed to write rule index %s: %s" % (index_path, str(e)), file=sys.stderr)
+        logger.debug("* Rule index: %d Sigma files rejected by filter, %d entries updated" % (counts["skipped"], rule_index.updates))
+        if cmdargs.verbose:
+            print("Rule index: %d of %d Sigma files rejected by the filter, %d entries updated" % (counts["skipped"], counts["inputs"], rule_index.updates), file=sys.stderr)
+
+    for target in conversion_targets:
+        result = target.backend.finalize()
+        if result:
+            try:
+                target.writer.write_final(result)
+            except SigmaOutputError as e:
+                print(str(e), file=sys.stderr)
+                exit(ERR_OUTPUT)
 
-    out.close()
+        cachestats = target.backend.getGenerationCacheStats()
+        if cachestats is not None:
+            logger.debug("* Generation cache: %(hits)d hits, %(misses)d misses, %(size)d entries" % cachestats)
+            if cmdargs.verbose:
+                print("Generation cache of backend %s: %d hits, %d misses, hit rate %.1f%%" % (target.identifier, cachestats["hits"], cachestats["misses"], cachestats["hitrate"] * 100), file=sys.stderr)
+
+        if target.cache is not None:
+            cachestats = target.cache.get_stats()
+            logger.debug("* Result cache: %(hits)d hits, %(misses)d misses, %(saved).3fs saved, %(errors)d errors" % cachestats)
+            if cmdargs.verbose:
+                print("Result cache of backend %s: %d hits, %d misses, hit rate %.1f%%, %.1fs conversion time saved" % (target.identifier, cachestats["hits"], cachestats["misses"], cachestats["hitrate"] * 100, cachestats["saved"]), file=sys.stderr)
+
+        target.writer.close()
+
+    if profiler is not None:
+        profiler.uninstall()
+        write_profile(profiler, cmdargs, conversion_targets, backend_options, rulefilter)
+
+    if multiple:
+        print("Conversion summary:", file=sys.stderr)
+        for target in conversion_targets:
+            failures = ", ".join([ "%s: %d" % (description, count) for description, count in sorted(target.failures.items()) ])
+            print("{:>15} : {} Sigma files converted, {} failed{}, exit code {}".format(target.identifier, target.converted, sum(target.failures.values()), " (%s)" % failures if failures else "", target.error), file=sys.stderr)
 
     sys.exit(error)
 
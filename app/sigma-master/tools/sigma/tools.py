@@ -14,6 +14,7 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import pathlib
 import pkgutil
 import importlib
 
@@ -30,3 +31,13 @@ def getAllSubclasses(path, import_base, base_class):
 def getClassDict(clss):
     """Return a dictionary: class.identifier -> class"""
     return {cls.identifier: cls for cls in clss }
+
+def getRulePaths(inputs, recurse=False):
+    """Generate paths of the given files and the Sigma files in the given directories, sorted per directory."""
+    for pathname in inputs:
+        path = pathlib.Path(pathname)
+        if path.is_dir():
+            pattern = "**/*.yml" if recurse else "*.yml"
+            yield from sorted(path.glob(pattern))
+        else:
+            yield path
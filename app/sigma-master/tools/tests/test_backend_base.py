@@ -0,0 +1,228 @@
+# Test generic backend base classes
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+
+import re
+
+from sigma.backends.base import SingleTextQueryBackend
+from sigma.backends.hawk import HAWKBackend
+from sigma.backends.mixins import EscapeTranslator
+from sigma.backends.qradar import QRadarBackend
+from sigma.backends.sql import SQLBackend
+from sigma.backends.sqlite import SQLiteBackend
+from sigma.configuration import SigmaConfiguration
+from sigma.parser.condition import ConditionAND, ConditionOR, NodeSubexpression
+from sigma.parser.modifiers.type import SigmaRegularExpressionModifier
+
+class DummyBackend(SingleTextQueryBackend):
+    andToken = " and "
+    orToken = " or "
+    subExpression = "(%s)"
+    mapExpression = "%s=%s"
+    valueExpression = "%s"
+    typedValueExpression = { SigmaRegularExpressionModifier: "/%s/" }
+
+class OverridingBackend(DummyBackend):
+    def generateANDNode(self, node):
+        return "overridden"
+
+class TestNodeDispatch(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = DummyBackend(SigmaConfiguration())
+
+    def test_dispatch(self):
+        node = ConditionAND()
+        node.add(("a", "1"))
+        node.add(("b", "2"))
+        self.assertEqual(self.backend.generateNode(node), "a=1 and b=2")
+
+    def test_subclass_override(self):
+        node = ConditionAND()
+        node.add(("a", "1"))
+        self.assertEqual(OverridingBackend(SigmaConfiguration()).generateNode(node), "overridden")
+        self.assertEqual(self.backend.generateNode(node), "a=1")
+        self.assertIsNot(OverridingBackend.nodeDispatch, DummyBackend.nodeDispatch)
+
+    def test_subclass_fallback(self):
+        self.assertNotIn(SigmaRegularExpressionModifier, DummyBackend.nodeDispatch)
+        self.assertEqual(self.backend.generateNode(SigmaRegularExpressionModifier("a.*")), "/a.*/")
+        self.assertIn(SigmaRegularExpressionModifier, DummyBackend.nodeDispatch)
+
+    def test_unexpected_type(self):
+        with self.assertRaises(TypeError):
+            self.backend.generateNode(True)
+        with self.assertRaises(TypeError):
+            self.backend.generateNode(ConditionOR)
+
+    def test_keyword_generators(self):
+        self.assertEqual(QRadarBackend(SigmaConfiguration()).generateNode([ "a", 1 ]), "UTF8(payload) ilike '%a%' UTF8(payload) ilike '%1%'")
+        backend = HAWKBackend(SigmaConfiguration())
+        self.assertEqual(backend.generateNode("a*b")["args"]["str"]["value"], "a.*b")
+        with self.assertRaises(TypeError):
+            backend.generateNode(SigmaRegularExpressionModifier("a.*"))
+
+class TestOverrides(unittest.TestCase):
+
+    config = """
+overrides:
+  - field: x
+    value: y
+    regexes:
+      - ^a=1$
+  - field: c
+    value: d
+    literals:
+      - b=2
+"""
+
+    def generate(self, backend_options=dict()):
+        backend = DummyBackend(SigmaConfiguration(self.config), dict(backend_options))
+        node = ConditionAND()
+        node.add(("a", "1"))
+        node.add(("b", "2"))
+        return backend, backend.generateNode(node)
+
+    def test_query_root(self):
+        backend, query = self.generate()
+        self.assertEqual(query, "a=1 and c=d")
+        self.assertEqual(len(backend.overrideSteps), 2)
+        self.assertFalse(backend.overridesActive)
+
+    def test_per_node(self):
+        backend, query = self.generate({ "overrides_per_node": True })
+        self.assertEqual(query, "x=y and c=d")
+
+    def test_invalid(self):
+        self.config = "overrides:\n  - field: x\n    value: y\n    regexes: [ '(' ]\n  - field: c\n    value: d\n    literals: [ b=2 ]\n"
+        backend, query = self.generate()
+        self.assertEqual(backend.overrideSteps, [])
+        self.assertEqual(query, "a=1 and b=2")
+
+class TestEscapeTranslator(unittest.TestCase):
+
+    def sequential(self, rules, value):
+        for pattern, substitution in rules:
+            value = re.sub(pattern, substitution, value)
+        return value
+
+    def test_merge(self):
+        rules = (("_", r"\_"), ("%", r"\%"), ('"', '""'))
+        translator = EscapeTranslator(rules)
+        self.assertEqual(len(translator.steps), 1)
+        self.assertEqual(translator('a_b%"c'), self.sequential(rules, 'a_b%"c'))
+
+    def test_no_merge_of_dependent_rules(self):
+        rules = (("a", "b"), ("b", "c"), ("c", "cc"))
+        translator = EscapeTranslator(rules)
+        self.assertEqual(len(translator.steps), 3)
+        self.assertEqual(translator("abc"), self.sequential(rules, "abc"))
+
+    def test_sql_rules(self):
+        for backend_class in (SQLBackend, SQLiteBackend):
+            translator = EscapeTranslator(backend_class.escapeRules)
+            for value in ("\\", "\\*", "a\\\\?b", "\\\\\\*_%", 'x"y*z?', "c:\\windows\\*.exe"):
+                self.assertEqual(translator(value), self.sequential(backend_class.escapeRules, value))
+
+    def test_cache(self):
+        translator = EscapeTranslator(((r"(\\)", r"\\\g<1>"),), cachesize=2)
+        for i in range(3):
+            self.assertEqual(translator("a\\b"), "a\\\\b")
+        info = translator.translate.cache_info()
+        self.assertEqual((info.hits, info.misses, info.maxsize), (2, 1, 2))
+
+    def test_changed_rules(self):
+        backend = DummyBackend(SigmaConfiguration())
+        backend.reEscape = re.compile("(a)")
+        self.assertEqual(backend.cleanValue("ab"), "\\ab")
+        backend.reEscape = re.compile("(b)")
+        self.assertEqual(backend.cleanValue("ab"), "a\\b")
+        self.assertEqual(backend.cleanValue(1), 1)
+
+class CachingBackend(DummyBackend):
+    notToken = "not "
+    generationCacheState = ("negated",)
+    negated = False
+
+class TestGenerationCache(unittest.TestCase):
+
+    def tree(self, value):
+        node = ConditionAND()
+        node.add(NodeSubexpression(ConditionOR(None, None, ("a", "1"), ("b", "2"))))
+        node.add(("c", value))
+        return node
+
+    def test_disabled(self):
+        backend = CachingBackend(SigmaConfiguration())
+        self.assertIsNone(backend.getGenerationCacheStats())
+        backend = DummyBackend(SigmaConfiguration(), { "generation_cache": True })
+        self.assertIsNone(backend.getGenerationCacheStats())
+
+    def test_hits(self):
+        backend = CachingBackend(SigmaConfiguration(), { "generation_cache": True })
+        self.assertEqual(backend.generateNode(self.tree("3")), "(a=1 or b=2) and c=3")
+        self.assertEqual(backend.generateNode(self.tree("4")), "(a=1 or b=2) and c=4")
+        self.assertEqual(backend.generateNode(self.tree("3")), "(a=1 or b=2) and c=3")
+        stats = backend.getGenerationCacheStats()
+        self.assertEqual((stats["hits"], stats["misses"]), (2, 4))
+
+    def test_values_of_different_types(self):
+        backend = CachingBackend(SigmaConfiguration(), { "generation_cache": True })
+        self.assertEqual(backend.generateNode(self.tree(1)), "(a=1 or b=2) and c=1")
+        with self.assertRaises(TypeError):      # not a cached query with value 1
+            backend.generateNode(self.tree(True))
+
+    def test_state(self):
+        backend = CachingBackend(SigmaConfiguration(), { "generation_cache": True })
+        backend.generateNode(self.tree("3"))
+        backend.negated = True
+        backend.generateNode(self.tree("3"))
+        self.assertEqual(backend.getGenerationCacheStats()["hits"], 0)
+
+class StatefulBackend(DummyBackend):
+    stateAttributes = ("items", "text", "names", "table")
+    uniqueStateAttributes = ("names",)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.items = [1]
+        self.text = "a"
+        self.names = {"x"}
+        self.table = {"k": 1}
+
+    def finalize(self):
+        return self.items
+
+class TestMergeState(unittest.TestCase):
+
+    def test_mergeable(self):
+        self.assertFalse(DummyBackend.isMergeable())
+        self.assertTrue(type("StatelessBackend", (DummyBackend,), { "stateAttributes": tuple() }).isMergeable())
+        self.assertTrue(StatefulBackend.isMergeable())
+        self.assertFalse(type("UndeclaredBackend", (StatefulBackend,), { "stateAttributes": tuple() }).isMergeable())
+
+    def test_merge(self):
+        backend = StatefulBackend(SigmaConfiguration())
+        self.assertTrue(backend.mergeState({ "items": [2], "text": "b", "names": {"y"}, "table": {"l": 2} }))
+        self.assertEqual(backend.getState(), { "items": [1, 2], "text": "ab", "names": {"x", "y"}, "table": {"k": 1, "l": 2} })
+
+    def test_unique_conflict(self):
+        backend = StatefulBackend(SigmaConfiguration())
+        self.assertFalse(backend.mergeState({ "items": [2], "names": {"x"} }))
+        self.assertEqual(backend.items, [1])
+
+if __name__ == '__main__':
+    unittest.main()
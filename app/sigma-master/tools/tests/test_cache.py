@@ -0,0 +1,133 @@
+# Test cache of conversion results
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import pathlib
+import tempfile
+import time
+import unittest
+
+import sigma.backends.discovery as backends
+from sigma.backends.base import BackendOptions
+from sigma.backends.exceptions import NotSupportedError
+from sigma.backends.splunk import SplunkBackend, SplunkXMLBackend
+from sigma.backends.mdatp import WindowsDefenderATPBackend
+from sigma.backends.elasticsearch import ElasticsearchQuerystringBackend, ElasticSearchRuleQsBackend
+from sigma.cache import SigmaResultCache, CachedResult, collect_garbage, get_options_fingerprint
+from sigma.configuration import SigmaConfigurationChain
+from sigma.parallel import SigmaParallelConverter
+from sigma.parser.collection import SigmaCollectionParser
+
+rules = pathlib.Path(__file__).parent.parent.parent / "rules"
+
+content = b"""
+title: Rule
+logsource:
+    product: test
+detection:
+    selection:
+        field: value
+    condition: selection
+"""
+
+class TestResultCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = pathlib.Path(self.tmpdir.name)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def get_cache(self, options=dict(), config="config"):
+        return SigmaResultCache(self.path, "splunk", SplunkBackend, config, get_options_fingerprint(options))
+
+    def test_store_load(self):
+        cache = self.get_cache()
+        self.assertIsNone(cache.load("rule.yml", content))
+        cache.store("rule.yml", content, CachedResult([ "query" ], None, "out", "", { "title": "Rule" }, 0.5))
+        result = self.get_cache().load("rule.yml", content)
+        self.assertEqual(result, CachedResult([ "query" ], None, "out", "", { "title": "Rule" }, 0.5))
+        self.assertIsNone(cache.load("other.yml", content))
+        self.assertIsNone(cache.load("rule.yml", content + b"\n"))
+        self.assertEqual(cache.get_stats(), { "hits": 0, "misses": 3, "hitrate": 0.0, "saved": 0.0, "errors": 0 })
+
+    def test_error(self):
+        cache = self.get_cache()
+        cache.store("rule.yml", content, CachedResult(None, NotSupportedError("feature"), "", "", None, 0.1))
+        result = cache.load("rule.yml", content, metadata=True)
+        self.assertIsInstance(result.error, NotSupportedError)
+        self.assertEqual(cache.hits, 1)
+
+    def test_metadata_required(self):
+        cache = self.get_cache()
+        cache.store("rule.yml", content, CachedResult([ "query" ], None, "", "", None, 0.1))
+        self.assertIsNone(cache.load("rule.yml", content, metadata=True))
+        self.assertIsNotNone(cache.load("rule.yml", content))
+
+    def test_key(self):
+        self.get_cache().store("rule.yml", content, CachedResult([ "query" ], None, "", "", None, 0.1))
+        self.assertIsNone(self.get_cache(options={ "rulecomment": True }).load("rule.yml", content))
+        self.assertIsNone(self.get_cache(config="other").load("rule.yml", content))
+        self.assertIsNone(SigmaResultCache(self.path, "splunk", SplunkBackend, "config", get_options_fingerprint(dict()), "level>=high").load("rule.yml", content))
+        self.assertIsNotNone(self.get_cache().load("rule.yml", content))
+        self.assertEqual(get_options_fingerprint({ "a": 1, "b": "x" }), get_options_fingerprint({ "b": "x", "a": 1 }))
+
+    def test_cacheable(self):
+        self.assertTrue(SigmaResultCache.is_cacheable(SplunkBackend))
+        self.assertFalse(SigmaResultCache.is_cacheable(SplunkXMLBackend))           # collects output for finalize()
+        self.assertFalse(SigmaResultCache.is_cacheable(WindowsDefenderATPBackend))  # carries state between rules
+        self.assertTrue(SigmaResultCache.is_cacheable(ElasticsearchQuerystringBackend))
+        self.assertFalse(SigmaResultCache.is_cacheable(ElasticSearchRuleQsBackend))  # generates UUIDs, no own declaration
+
+    def test_cacheable_order_independent(self):
+        # each rule is converted by the same backend instance after the previous rules and by a new one
+        config = SigmaConfigurationChain()
+        contents = [ path.read_text(encoding="utf-8") for path in sorted((rules / "linux").rglob("*.yml")) ]     # many keyword rules
+        def convert(backend, content):
+            try:
+                return [ backend.generate(parser) for parser in SigmaCollectionParser(content, config).parsers ]
+            except Exception as e:
+                return type(e)
+        for target in backends.getBackendDict():
+            backend_class = backends.getBackend(target)
+            if SigmaResultCache.is_cacheable(backend_class):
+                backend = backend_class(config, BackendOptions(None, None))
+                for content in contents:
+                    self.assertEqual(convert(backend, content), convert(backend_class(config, BackendOptions(None, None)), content), target)
+
+    def test_parallel(self):
+        rulefile = self.path / "rule.yml"
+        rulefile.write_bytes(content)
+        cache = self.get_cache()
+        config = SigmaConfigurationChain()
+        converter = SigmaParallelConverter(2, SplunkBackend(config, BackendOptions(None, None)), config, BackendOptions(None, None), cache=cache)
+        results = list(converter.convert([ rulefile ]))
+        self.assertEqual(cache.load(rulefile, content).results, results[0][1])
+
+    def test_collect_garbage(self):
+        cache = self.get_cache()
+        cache.store("old.yml", content, CachedResult([ "old" ], None, "", "", None, 0.1))
+        cache.store("new.yml", content, CachedResult([ "new" ], None, "", "", None, 0.1))
+        old = str(cache.get_path(cache.get_key("old.yml", content)))
+        os.utime(old, (time.time() - 3 * 86400, time.time() - 3 * 86400))
+        self.assertEqual(collect_garbage(self.path, 2)[0], 1)
+        self.assertFalse(os.path.exists(old))
+        self.assertIsNotNone(cache.load("new.yml", content))
+        self.assertEqual(collect_garbage(self.path, 0)[0], 1)
+        self.assertEqual(list(self.path.iterdir()), [])
+
+if __name__ == '__main__':
+    unittest.main()
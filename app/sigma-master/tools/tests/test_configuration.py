@@ -0,0 +1,187 @@
+# Test configurations and configuration chains
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import pathlib
+import tempfile
+import unittest
+
+from sigma.configuration import SigmaConfiguration, SigmaConfigurationChain
+from sigma.config.collection import SigmaConfigurationManager
+from sigma.config.cache import SigmaConfigurationCache
+from sigma.config.exceptions import FieldMappingError, SigmaConfigParseError
+from sigma.parser.rule import SigmaParser
+from sigma.backends.base import SingleTextQueryBackend
+
+class TestFieldMappingTable(unittest.TestCase):
+
+    def setUp(self):
+        self.chain = SigmaConfigurationChain()
+        self.chain.append(SigmaConfiguration("fieldmappings:\n  a: b\n  c: [ d, e ]\n  x: y"))
+        self.chain.append(SigmaConfiguration("fieldmappings:\n  b: f\n  y:\n    EventID=1: z\n    default: w"))
+
+    def test_compiled(self):
+        mapping = self.chain.get_fieldmapping("a")
+        self.assertIs(self.chain.get_fieldmapping("a"), mapping)
+        self.assertEqual(mapping.resolve_fieldname("a"), "f")
+        self.assertEqual(sorted(self.chain.get_fieldmapping("c").resolve_fieldname("c")), [ "d", "e" ])
+        self.assertEqual(self.chain.get_fieldmapping("unmapped").resolve_fieldname("unmapped"), "unmapped")
+        self.assertNotIn("unmapped", self.chain.fieldmappingtable)
+
+    def test_append(self):
+        self.assertEqual(self.chain.get_fieldmapping("f").resolve_fieldname("f"), "f")
+        self.chain.append(SigmaConfiguration("fieldmappings:\n  f: g"))
+        self.assertEqual(self.chain.get_fieldmapping("a").resolve_fieldname("a"), "g")
+        self.assertEqual(self.chain.get_fieldmapping("f").resolve_fieldname("f"), "g")
+
+    def test_conditional(self):
+        parser = SigmaParser({ "detection": { "selection": { "EventID": 1, "x": "v" }, "condition": "selection" } }, self.chain)
+        self.assertEqual(self.chain.get_fieldmapping("x").resolve_fieldname("x", parser), "z")
+        self.assertEqual(self.chain.get_fieldmapping("x").resolve_fieldname("x", parser), "z")
+        self.assertEqual(len(parser.fieldmappingtargets), 1)
+
+    def test_conditional_not_last(self):
+        self.chain.append(SigmaConfiguration("fieldmappings:\n  z: z"))
+        self.assertEqual(self.chain.get_fieldmapping("a").resolve_fieldname("a"), "f")
+        with self.assertRaises((FieldMappingError, TypeError)):
+            self.chain.get_fieldmapping("x")
+
+class TestLogsourceIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.chain = SigmaConfigurationChain()
+        self.chain.append(SigmaConfiguration("""
+logsources:
+    windows:
+        product: windows
+        index: win
+    sysmon:
+        product: windows
+        service: sysmon
+        conditions:
+            EventLog: Sysmon
+    process_creation:
+        category: process_creation
+        product: windows
+        rewrite:
+            product: windows
+            service: sysmon
+"""))
+        self.chain.append(SigmaConfiguration("""
+logsources:
+    sysmon:
+        product: windows
+        service: sysmon
+        index: sysmon
+"""))
+        self.chain.set_backend(SingleTextQueryBackend(self.chain, {}))
+
+    def test_wildcard(self):
+        self.assertEqual(self.chain.get_logsource(None, "windows", "security").index, [ "win" ])
+        self.assertEqual(sorted(self.chain.get_logsource(None, "windows", "sysmon").index), [ "sysmon", "win" ])
+        self.assertEqual(self.chain.get_logsource(None, None, "sysmon").index, [])
+        self.assertEqual(self.chain.get_logsource("process_creation", None, None).index, [])
+
+    def test_rewrite(self):
+        logsource = self.chain.get_logsource("process_creation", "windows", None)
+        self.assertEqual(sorted(logsource.index), [ "sysmon", "win" ])
+        self.assertEqual(logsource.conditions, [])     # sysmon definition of first config precedes the rewrite
+        self.assertEqual(logsource.rewrite, (None, "windows", "sysmon"))
+
+    def test_set_backend_repeated(self):
+        self.chain.set_backend(SingleTextQueryBackend(self.chain, {}))
+        self.assertEqual([ len(config.logsources) for config in self.chain ], [ 3, 1 ])
+        self.assertEqual(sorted(self.chain.get_logsource(None, "windows", "sysmon").index), [ "sysmon", "win" ])
+
+    def test_cache(self):
+        logsource = self.chain.get_logsource(None, "windows", None)
+        self.assertIs(self.chain.get_logsource(None, "windows", None), logsource)
+        self.chain.append(SigmaConfiguration("logsources:\n  windows:\n    product: windows\n    index: other"))
+        self.chain.set_backend(SingleTextQueryBackend(self.chain, {}))
+        self.assertEqual(sorted(self.chain.get_logsource(None, "windows", None).index), [ "other", "win" ])
+
+    def test_unhashable(self):
+        self.assertEqual(self.chain.get_logsource(None, "windows", [ "sysmon" ]).index, [ "win" ])
+
+class TestConfigurationManager(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        path = pathlib.Path(self.tmpdir.name)
+        (path / "valid.yml").write_text("title: Valid\norder: 10\nbackends:\n  - splunk\nfieldmappings:\n  a: b\n")
+        (path / "invalid.yml").write_text("title: Invalid\nbackends: [ splunk ]\noptimizations: foo\n")
+        (path / "sub").mkdir()
+        (path / "sub" / "quoted.yml").write_text("'title': Quoted\n")
+        self.scm = SigmaConfigurationManager([ self.tmpdir.name ])
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_lazy(self):
+        self.assertEqual(self.scm.configs, {})
+        self.assertEqual(sorted(self.scm.list()), [ ("invalid", "Invalid", [ "splunk" ]), ("quoted", "Quoted", []), ("valid", "Valid", [ "splunk" ]) ])
+        self.assertEqual(self.scm.header("valid")["order"], 10)
+        self.assertEqual(self.scm.configs, {})
+        config = self.scm.get("valid")
+        self.assertEqual(config.order, 10)
+        self.assertIs(self.scm.get("valid"), config)
+
+    def test_error(self):
+        with self.assertRaises(SigmaConfigParseError):
+            self.scm.get("invalid")
+        self.assertEqual(len(self.scm.errors), 1)
+
+class TestConfigurationCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        path = pathlib.Path(self.tmpdir.name)
+        (path / "first.yml").write_text("fieldmappings:\n  a: b\nlogsources:\n  windows:\n    product: windows\n    index: win\n")
+        (path / "second.yml").write_text("fieldmappings:\n  b: c\n")
+        self.scm = SigmaConfigurationManager([ self.tmpdir.name ])
+        self.cache = SigmaConfigurationCache(path / "cache")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def get_chain(self, names):
+        return SigmaConfigurationChain([ self.scm.get(name) for name in names ])
+
+    def test_fingerprint(self):
+        fingerprint = self.scm.get_fingerprint([ "first", "second" ])
+        self.assertEqual(self.get_chain([ "first", "second" ]).get_fingerprint(), fingerprint)
+        self.assertNotEqual(self.scm.get_fingerprint([ "second", "first" ]), fingerprint)
+        self.assertNotEqual(self.scm.get_fingerprint([ "first" ]), fingerprint)
+
+    def test_store_load(self):
+        chain = self.get_chain([ "first", "second" ])
+        self.assertIsNone(self.cache.load(chain.get_fingerprint()))
+        fingerprint = self.cache.store(chain)
+        cached = self.cache.load(fingerprint)
+        self.assertEqual(len(cached), 2)
+        self.assertIsNone(cached.backend)
+        self.assertIsNotNone(cached.fieldmappingtable)
+        cached.set_backend(SingleTextQueryBackend(cached, {}))
+        self.assertIsNotNone(cached.logsourceindex)
+        self.assertEqual(cached.get_fieldmapping("a").resolve_fieldname("a"), "c")
+        self.assertEqual(cached.get_logsource(None, "windows", None).index, [ "win" ])
+
+    def test_outdated(self):
+        chain = self.get_chain([ "first" ])
+        fingerprint = self.cache.store(chain)
+        self.cache.get_path(fingerprint).write_bytes(b"garbage")
+        self.assertIsNone(self.cache.load(fingerprint))
+
+if __name__ == '__main__':
+    unittest.main()
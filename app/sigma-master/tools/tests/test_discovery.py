@@ -0,0 +1,62 @@
+# Test backend and modifier discovery
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+
+import sigma.backends.discovery as backends
+from sigma.sigma_backend_registry import build_registry
+from sigma.parser.modifiers.discovery import apply_modifiers, compile_modifiers
+
+class TestBackendDiscovery(unittest.TestCase):
+
+    def test_registry_current(self):
+        with open(backends.__file__.replace("discovery.py", "registry.py"), encoding="utf-8") as f:
+            self.assertEqual(f.read(), build_registry(), "Backend registry is outdated, rebuild it with tools/sigma_backend_registry")
+
+    def test_get_backend(self):
+        backend = backends.getBackend("splunk")
+        self.assertEqual(backend.identifier, "splunk")
+        self.assertIs(backends.getBackend("splunk"), backend)
+        with self.assertRaises(LookupError):
+            backends.getBackend("not_existing")
+
+    def test_registry(self):
+        self.assertEqual(set(backends.getRegistry()), set(backends.getBackendDict()))
+
+class TestModifierChains(unittest.TestCase):
+
+    def test_compiled_once(self):
+        self.assertIs(compile_modifiers(("base64offset", "contains")), compile_modifiers(("base64offset", "contains")))
+        self.assertTrue(compile_modifiers(("base64offset", "contains")).cacheable)
+        self.assertFalse(compile_modifiers(("contains", "all")).cacheable)
+
+    def test_memoized_equal(self):
+        for modifier_list, value in (
+                (("contains",), "foo"),
+                (("utf16le", "base64offset", "contains"), "cmd.exe"),
+                (("base64offset", "contains"), ["foo", "bar"]),
+                (("endswith",), ("a", "b")),
+                ):
+            chain = compile_modifiers(modifier_list)
+            self.assertEqual(apply_modifiers(value, modifier_list), chain.apply(value))
+            self.assertEqual(apply_modifiers(value, modifier_list), chain.apply(value))
+
+    def test_result_not_shared(self):
+        result = apply_modifiers(["foo", "bar"], ["contains"])
+        result.append("baz")
+        self.assertEqual(apply_modifiers(["foo", "bar"], ["contains"]), ["*foo*", "*bar*"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,374 @@
+# Test in-process evaluation of Sigma rules
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import json
+import os
+import pathlib
+import re
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from sigma.backends.exceptions import NotSupportedError
+from sigma.config.collection import SigmaConfigurationManager
+from sigma.configuration import SigmaConfigurationChain
+from sigma.engine import SigmaEngine, wildcard_pattern
+from sigma.parser.condition import ConditionAND, ConditionOR, ConditionNOT, ConditionNULLValue, ConditionNotNULLValue, NodeSubexpression
+from sigma.parser.modifiers.type import SigmaRegularExpressionModifier
+
+tools = pathlib.Path(__file__).parent.parent
+
+rule = """
+title: Test
+logsource:
+    product: windows
+    service: sysmon
+detection:
+%s
+"""
+
+def wildcard_tokens(value):
+    """Split Sigma string value into characters and wildcards (None for *, False for ?)."""
+    tokens = list()
+    i = 0
+    while i < len(value):
+        if value[i] == "\\" and value[i + 1:i + 2] in ("*", "?", "\\"):
+            tokens.append(value[i + 1])
+            i += 2
+            continue
+        tokens.append({ "*": None, "?": False }.get(value[i], value[i]))
+        i += 1
+    return tokens
+
+def wildcard_match(tokens, string):
+    """Reference wildcard matching by dynamic programming over the tokens and the string."""
+    string = string.lower()
+    matched = [ True ] + [ False ] * len(string)
+    for token in tokens:
+        if token is None:
+            for i in range(1, len(string) + 1):
+                matched[i] = matched[i] or matched[i - 1]
+        else:
+            matched = [ False ] + [ matched[i] and (token is False or token.lower() == string[i]) for i in range(len(string)) ]
+    return matched[-1]
+
+def string_value(value):
+    if type(value) == bool:
+        return str(value).lower()
+    elif type(value) in (str, int, float):
+        return str(value)
+    return None
+
+def leaf_values(value):
+    if type(value) == dict:
+        return [ leaf for item in value.values() for leaf in leaf_values(item) ]
+    elif type(value) == list:
+        return [ leaf for item in value for leaf in leaf_values(item) ]
+    string = string_value(value)
+    return [ string ] if string is not None else []
+
+def lookup(event, field):
+    if field in event:
+        return event[field]
+    value = event
+    for key in field.split("."):
+        if type(value) != dict or key not in value:
+            return None
+        value = value[key]
+    return value
+
+def evaluate(node, event):
+    """Reference interpreter of condition parse trees, independent from the compiled engine."""
+    if isinstance(node, NodeSubexpression):
+        return evaluate(node.items, event)
+    elif isinstance(node, ConditionAND):
+        return all(evaluate(item, event) for item in node.items)
+    elif isinstance(node, ConditionOR):
+        return any(evaluate(item, event) for item in node.items)
+    elif isinstance(node, ConditionNOT):
+        return not evaluate(node.item, event)
+    elif isinstance(node, (ConditionNULLValue, ConditionNotNULLValue)):
+        return (lookup(event, node.item) in (None, "", [])) == isinstance(node, ConditionNULLValue)
+    elif type(node) == tuple:
+        field, values = node
+        eventvalue = lookup(event, field)
+        eventvalues = eventvalue if type(eventvalue) == list and eventvalue else [ eventvalue ]
+        for value in (values if type(values) == list else [ values ]):
+            for item in eventvalues:
+                if value is None:
+                    if item in (None, "", []):
+                        return True
+                elif string_value(item) is None:
+                    continue
+                elif isinstance(value, SigmaRegularExpressionModifier):
+                    if re.search(value.value, string_value(item)):
+                        return True
+                elif wildcard_match(wildcard_tokens(string_value(value)), string_value(item)):
+                    return True
+        return False
+    else:
+        tokens = [ None ] + wildcard_tokens(string_value(node)) + [ None ]
+        return any(wildcard_match(tokens, leaf) for leaf in leaf_values(event))
+
+def sample(value):
+    """Return a string that matches a Sigma string value."""
+    return "".join({ None: "x", False: "y" }.get(token, token) for token in wildcard_tokens(string_value(value)))
+
+def synthesize(node, event):
+    """Add field values to event that should make the condition true."""
+    if isinstance(node, NodeSubexpression):
+        synthesize(node.items, event)
+    elif isinstance(node, ConditionAND):
+        for item in node.items:
+            synthesize(item, event)
+    elif isinstance(node, ConditionOR):
+        for item in node.items:         # first alternative that can be synthesized
+            candidate = dict(event)
+            synthesize(item, candidate)
+            if evaluate(item, candidate):
+                break
+        event.update(candidate)
+    elif isinstance(node, ConditionNotNULLValue):
+        event.setdefault(node.item, "x")
+    elif type(node) == tuple:
+        field, value = node
+        if type(value) == list:
+            value = value[0] if value else None
+        if value is not None and not isinstance(value, SigmaRegularExpressionModifier):
+            value = string_value(value)
+            if field in event and value.startswith("*"):        # further restrictions of the same field
+                event[field] += sample(value)
+            elif field in event and value.endswith("*"):
+                event[field] = sample(value) + event[field]
+            else:
+                event[field] = sample(value)
+    elif type(node) in (str, int):
+        event.setdefault("keywords", list()).append(sample(node))
+
+def variants(event):
+    """Generate events derived from a synthesized event that exercise different matching paths."""
+    yield event
+    yield dict()
+    yield { field: value.upper() if type(value) == str else value for field, value in event.items() }
+    yield { field: [ "other", value ] for field, value in event.items() }
+    yield { field: value[1:] if type(value) == str else value for field, value in event.items() }
+    for field in event:
+        yield { key: value for key, value in event.items() if key != field }
+
+class TestEngine(unittest.TestCase):
+
+    def setUp(self):
+        scm = SigmaConfigurationManager([ str(tools / "config") ])
+        self.scm = scm
+
+    def compile(self, detection, config=None):
+        engine = SigmaEngine(config)
+        return engine.add_rules(rule % detection)[0]
+
+    def test_wildcards(self):
+        compiled = self.compile("""
+    selection:
+        Image:
+            - '*\\cmd.exe'
+            - 'C:\\Tools\\t?.exe'
+            - 'C:\\Temp\\\\*'
+            - 'literal\\*star'
+            - 'Question\\?'
+    condition: selection""")
+        for value, expected in (
+                ("C:\\Windows\\System32\\CMD.EXE", True),
+                ("C:\\Windows\\System32\\cmd.exe.bak", False),
+                ("C:\\Tools\\t1.exe", True),
+                ("C:\\Tools\\t12.exe", False),
+                ("c:\\temp\\x", True),            # escaped backslash followed by wildcard
+                ("c:\\temp", False),
+                ("literal*star", True),
+                ("literalXstar", False),
+                ("question?", True),
+                ("questionX", False),
+                ):
+            self.assertEqual(compiled({ "Image": value }), expected, value)
+        self.assertEqual(wildcard_pattern("a\\b"), (re.escape("a\\b"), "a\\b"))
+
+    def test_modifiers(self):
+        compiled = self.compile("""
+    selection:
+        CommandLine|contains|all:
+            - ' -enc '
+            - 'powershell'
+        Image|endswith: '.exe'
+        ParentImage|startswith: 'C:\\Windows\\'
+        User|re: '^[A-Z]+\\\\adm'
+    condition: selection""")
+        event = { "CommandLine": "PowerShell.exe -enc AAA", "Image": "p.exe", "ParentImage": "c:\\windows\\explorer.exe", "User": "CORP\\admin" }
+        self.assertTrue(compiled(event))
+        self.assertFalse(compiled(dict(event, CommandLine="powershell -e AAA")))
+        self.assertFalse(compiled(dict(event, Image="p.exe.txt")))
+        self.assertFalse(compiled(dict(event, ParentImage="D:\\Windows\\explorer.exe")))
+        self.assertFalse(compiled(dict(event, User="corp\\admin")))          # regular expressions are case-sensitive
+
+    def test_null_and_not(self):
+        compiled = self.compile("""
+    selection:
+        EventID: 4688
+    filter:
+        User: null
+    optional:
+        Domain: ''
+    condition: selection and not filter and not optional""")
+        self.assertTrue(compiled({ "EventID": 4688, "User": "a", "Domain": "b" }))
+        self.assertTrue(compiled({ "EventID": "4688", "User": "a" }))
+        self.assertFalse(compiled({ "EventID": 4688, "User": "a", "Domain": "" }))
+        self.assertFalse(compiled({ "EventID": 4688, "User": None }))
+        self.assertFalse(compiled({ "EventID": 4688, "User": "" }))
+        self.assertFalse(compiled({ "EventID": 4689, "User": "a" }))
+
+    def test_quantifiers(self):
+        detection = """
+    selection_a:
+        EventID: 1
+    selection_b:
+        EventID: 2
+    other:
+        Image: 'x.exe'
+    condition: %s"""
+        one = self.compile(detection % "1 of selection_* and other")
+        every = self.compile(detection % "all of them")
+        self.assertTrue(one({ "EventID": 2, "Image": "X.exe" }))
+        self.assertFalse(one({ "EventID": 3, "Image": "x.exe" }))
+        self.assertFalse(every({ "EventID": 2, "Image": "x.exe" }))
+
+    def test_keywords(self):
+        compiled = self.compile("""
+    keywords:
+        - 'mimikatz'
+        - 'sekurlsa::*pth'
+        - 1337
+    condition: keywords""")
+        self.assertTrue(compiled({ "message": "Started MIMIKATZ.exe" }))
+        self.assertTrue(compiled({ "data": { "args": [ "x", "sekurlsa::logonpasswords pth" ] } }))
+        self.assertTrue(compiled({ "port": 1337 }))
+        self.assertFalse(compiled({ "message": "benign", "mimikatz": 1 }))       # field names are not searched
+
+    def test_event_values(self):
+        compiled = self.compile("""
+    selection:
+        process.name: 'cmd.exe'
+        Hashes|contains: 'MD5=ABC'
+        Enabled: true
+    condition: selection""")
+        self.assertTrue(compiled({ "process": { "name": "cmd.exe" }, "Hashes": [ "SHA1=1", "MD5=abc" ], "Enabled": True }))
+        self.assertTrue(compiled({ "process.name": "cmd.exe", "Hashes": "MD5=abc", "Enabled": "true" }))
+        self.assertFalse(compiled({ "process": "cmd.exe", "Hashes": "MD5=abc", "Enabled": True }))
+        self.assertFalse(compiled({ "process.name": "cmd.exe", "Hashes": [], "Enabled": True }))
+
+    def test_config(self):
+        # field mappings and log source conditions of the configuration are evaluated
+        config = SigmaConfigurationChain([ self.scm.get("splunk-windows") ])
+        compiled = self.compile("""
+    selection:
+        EventID: 1
+    condition: selection""", config)
+        self.assertFalse(compiled({ "EventCode": 1 }))
+        self.assertFalse(compiled({ "EventID": 1, "source": "WinEventLog:Microsoft-Windows-Sysmon/Operational" }))
+        self.assertTrue(compiled({ "EventCode": 1, "source": "WinEventLog:Microsoft-Windows-Sysmon/Operational" }))
+
+        config = SigmaConfigurationChain([ self.scm.get("ecs-proxy") ])
+        compiled = self.compile("""
+    selection:
+        c-uri: '*/admin*'
+    condition: selection""", config)
+        fields = set(re.findall(r"'([^']+)'", str(compiled.parser.condparsed[0].parsedSearch)))
+        self.assertNotIn("c-uri", fields)
+        self.assertTrue(compiled({ "url": { "original": "http://x/admin/" } }))
+
+    def test_unsupported(self):
+        engine = SigmaEngine()
+        with self.assertRaises(NotSupportedError):
+            engine.add_rules(rule % """
+    selection:
+        EventID: 1
+    condition: selection | count() by User > 3""")
+        self.assertEqual(engine.rules, [])
+
+    def test_multiple_conditions(self):
+        engine = SigmaEngine()
+        engine.add_rules(rule % """
+    first:
+        EventID: 1
+    second:
+        EventID: 2
+    condition:
+        - first
+        - second""")
+        engine.add_rules(rule.replace("Test", "Other") % """
+    selection:
+        EventID: 2
+    condition: selection""")
+        self.assertEqual([ compiled.title for compiled in engine.match({ "EventID": 2 }) ], [ "Test", "Other" ])
+        self.assertEqual([ compiled.title for compiled in engine.match({ "EventID": 1 }) ], [ "Test" ])
+        self.assertEqual(engine.match({ "EventID": 3 }), [])
+
+    def test_rule_set(self):
+        # compiled rules evaluate synthesized events like the reference interpreter of the parse tree
+        configs = (SigmaConfigurationChain(), SigmaConfigurationChain([ self.scm.get("sysmon") ]))
+        for config in configs:
+            engine = SigmaEngine(config)
+            compiled = positives = 0
+            for path in sorted((tools.parent / "rules").rglob("*.yml")):
+                try:
+                    rules = engine.add_file(path)
+                except NotSupportedError:
+                    continue
+                for rule in rules:
+                    compiled += 1
+                    matched = False
+                    for condition in rule.parser.condparsed:
+                        event = dict()
+                        synthesize(condition.parsedSearch, event)
+                        for variant in variants(event):
+                            expected = any(evaluate(condition.parsedSearch, variant) for condition in rule.parser.condparsed)
+                            self.assertEqual(rule(variant), expected, "%s: %s" % (path, json.dumps(variant)))
+                        matched = matched or rule(event)
+                    positives += matched
+            self.assertGreater(compiled, 1000)
+            self.assertGreater(positives, compiled * 0.9)
+
+    def test_sigma_match(self):
+        sigma_match = str(tools / "sigma_match")
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = pathlib.Path(tmpdir)
+            (path / "rule.yml").write_text(rule % """
+    selection:
+        Image|endswith: '\\whoami.exe'
+    condition: selection""")
+            (path / "aggregation.yml").write_text(rule % """
+    selection:
+        EventID: 1
+    condition: selection | count() > 1""")
+            events = "\n".join([ json.dumps({ "Image": "C:\\Windows\\whoami.exe" }), "", "not json", json.dumps({ "Image": "cmd.exe" }) ])
+            process = subprocess.run([ sys.executable, sigma_match, "-v", str(path) ], input=events, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, env=dict(os.environ, PYTHONPATH=str(tools)))
+        self.assertEqual(process.returncode, 0)
+        output = [ json.loads(line) for line in process.stdout.splitlines() ]
+        self.assertEqual(len(output), 1)
+        self.assertEqual(output[0]["rules"][0]["title"], "Test")
+        self.assertEqual(output[0]["event"]["Image"], "C:\\Windows\\whoami.exe")
+        self.assertIn("Invalid event in line 3", process.stderr)
+        self.assertIn("1 files skipped", process.stderr)
+        self.assertIn("1 of 2 events matched", process.stderr)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+# Test persistent rule metadata index
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import pathlib
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from sigma.filter import SigmaRuleFilter
+from sigma.index import SigmaRuleIndex
+
+tools = pathlib.Path(__file__).parent.parent
+sigmac = str(tools / "sigmac")
+sigma2attack = str(tools / "sigma2attack")
+
+rule = """
+title: Rule {0}
+status: {1}
+level: {2}
+tags:
+    - attack.execution
+    - attack.t1059
+logsource:
+    product: test
+detection:
+    selection:
+        field: value{0}
+    condition: selection
+"""
+
+collection = """
+action: global
+title: Collection
+level: high
+logsource:
+    product: test
+detection:
+    condition: selection
+---
+detection:
+    selection:
+        field: value
+"""
+
+class TestRuleIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = pathlib.Path(self.tmpdir.name)
+        self.rules = self.path / "rules"
+        self.rules.mkdir()
+        (self.rules / "high.yml").write_text(rule.format(1, "stable", "high"))
+        (self.rules / "low.yml").write_text(rule.format(2, "experimental", "low"))
+        (self.rules / "collection.yml").write_text(collection)
+        self.index = self.path / "index.json"
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_match(self):
+        index = SigmaRuleIndex(self.index)
+        rulefilter = SigmaRuleFilter("level>=high")
+        self.assertTrue(index.match(self.rules / "high.yml", rulefilter))
+        self.assertFalse(index.match(self.rules / "low.yml", rulefilter))
+        self.assertIsNone(index.match(self.rules / "collection.yml", rulefilter))
+        self.assertEqual(index.get(self.rules / "low.yml")["status"], "experimental")
+        self.assertIsNone(index.match(self.rules / "low.yml", SigmaRuleFilter("condition=Rule")))
+
+    def test_incremental(self):
+        index = SigmaRuleIndex(self.index)
+        index.get(self.rules / "high.yml")
+        index.save()
+
+        index = SigmaRuleIndex(self.index)
+        self.assertEqual(index.get(self.rules / "high.yml")["level"], "high")
+        self.assertEqual((index.hits, index.updates), (1, 0))
+
+        stat = os.stat(str(self.rules / "high.yml"))
+        os.utime(str(self.rules / "high.yml"), ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        index.get(self.rules / "high.yml")
+        self.assertEqual((index.hits, index.updates), (2, 0))           # touched, unchanged hash
+
+        (self.rules / "high.yml").write_text(rule.format(1, "stable", "critical"))
+        self.assertEqual(index.get(self.rules / "high.yml")["level"], "critical")
+        self.assertEqual((index.hits, index.updates), (2, 1))
+
+    def test_prune(self):
+        index = SigmaRuleIndex(self.index)
+        index.get(self.rules / "high.yml")
+        index.get(self.rules / "low.yml")
+        (self.rules / "low.yml").unlink()
+        index.save()
+        self.assertEqual(list(SigmaRuleIndex(self.index).entries), [ os.path.abspath(str(self.rules / "high.yml")) ])
+
+    def test_broken_index(self):
+        self.index.write_text("{")
+        index = SigmaRuleIndex(self.index)
+        self.assertEqual(index.entries, dict())
+        self.assertTrue(index.match(self.rules / "high.yml", SigmaRuleFilter("level>=high")))
+
+    def test_sigmac(self):
+        env = dict(os.environ, PYTHONPATH=os.path.dirname(sigmac))
+        command = [ sys.executable, sigmac, "-r", "-t", "grep", "-f", "level>=high", str(self.rules) ]
+        expected = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, env=env)
+        for i in range(2):
+            process = subprocess.run(command + [ "--rule-index", str(self.index) ], stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, env=env)
+            self.assertEqual((process.returncode, process.stdout), (expected.returncode, expected.stdout))
+        self.assertEqual(process.stdout.count("grep -P"), 2)
+        self.assertEqual(len(SigmaRuleIndex(self.index).entries), 3)
+
+    def test_sigma2attack(self):
+        (self.rules / "collection.yml").unlink()
+        env = dict(os.environ, PYTHONPATH=os.path.dirname(sigmac))
+        outputs = list()
+        for args in ([], [ "--index", str(self.index) ], [ "--index", str(self.index) ]):
+            out = self.path / ("heatmap%d.json" % len(outputs))
+            process = subprocess.run([ sys.executable, sigma2attack, "-d", str(self.rules), "-o", str(out) ] + args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, env=env)
+            self.assertEqual(process.returncode, 0)
+            outputs.append(out.read_text())
+        self.assertEqual(outputs[0], outputs[1])
+        self.assertEqual(outputs[0], outputs[2])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+# Test intermediate representation of parsed Sigma rules
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import copy
+import datetime
+import json
+import pathlib
+import pickle
+import unittest
+
+import yaml
+
+from sigma.backends.base import BackendOptions
+from sigma.backends.elasticsearch import ElasticsearchQuerystringBackend
+from sigma.backends.splunk import SplunkBackend
+from sigma.config.collection import SigmaConfigurationManager
+from sigma.configuration import SigmaConfigurationChain
+from sigma.ir import SigmaIRError, SigmaIRParser, decode_value, dumps, encode_value, loads
+from sigma.parser.collection import SigmaCollectionParser
+from sigma.parser.modifiers.type import SigmaRegularExpressionModifier
+
+tools = pathlib.Path(__file__).parent.parent
+
+rule = """
+title: Rule %d
+date: 2021-02-03
+logsource:
+    product: windows
+    service: sysmon
+detection:
+    selection:
+        EventID: 1
+        CommandLine|contains|all:
+            - ' -enc '
+            - 'powershell'
+        Image|re: '.*\\\\temp\\\\.*'
+    filter:
+        User: null
+    keywords:
+        - 'keyword'
+        - 42
+    first:
+        Image: 'a.exe'
+    second:
+        Image: 'b.exe'
+    condition: %s
+"""
+rules = "---".join([ rule % (i, condition) for i, condition in enumerate(("(selection and not filter) or keywords", "selection | count(Image) by User > 3", "first | near second")) ])
+
+class TestIntermediateRepresentation(unittest.TestCase):
+
+    def setUp(self):
+        scm = SigmaConfigurationManager([ str(tools / "config") ])
+        self.config = SigmaConfigurationChain([ scm.get("splunk-windows") ])
+
+    def generate(self, backend_class, parsers):
+        backend = backend_class(self.config, BackendOptions(None, None))
+        results = list()
+        for parser in parsers:
+            try:
+                results.append(backend.generate(parser))
+            except Exception as e:
+                results.append((type(e), str(e)))
+        return results
+
+    def parse(self, content):
+        parsers = SigmaCollectionParser(content, self.config).parsers
+        for parser in parsers:
+            parser.condparsed
+        return parsers
+
+    def test_roundtrip(self):
+        expected = self.generate(ElasticsearchQuerystringBackend, self.parse(rules))
+        for binary in (False, True):
+            loaded = loads(dumps(self.parse(rules), binary), self.config)
+            self.assertIsInstance(loaded[0], SigmaIRParser)
+            self.assertEqual(self.generate(ElasticsearchQuerystringBackend, loaded), expected)
+            self.assertEqual(loaded[0].parsedyaml["date"], datetime.date(2021, 2, 3))
+            aggregation = loaded[1].condparsed[0].parsedAgg
+            self.assertEqual((aggregation.aggfunc_notrans, aggregation.aggfield, aggregation.groupfield, aggregation.cond_op, aggregation.condition), ("count", "Image", "User", ">", "3"))
+            self.assertEqual(loaded[2].condparsed[0].parsedAgg.include, [ "second" ])
+            self.assertEqual(len(loaded[2].condtoken), 1)
+        self.assertLess(len(dumps(self.parse(rules), True)), len(pickle.dumps(self.parse(rules))))
+
+    def test_json(self):
+        document = json.loads(dumps(self.parse(rules)))
+        search = document["rules"][0]["conditions"][0]["search"]
+        self.assertEqual(search[0], "sub")
+        self.assertIn('["field","Image",{"!type":"re","value":".*\\\\\\\\temp\\\\\\\\.*"}]', json.dumps(search, separators=(",", ":")))
+
+    def test_values(self):
+        values = [ "a", 1, 1.5, True, None, [ "a", [ 1 ] ], { "a": 1, "!b": 2 }, { 1: "one" }, ("field", "value"), b"\x00\xff", datetime.date(2021, 1, 2), datetime.datetime(2021, 1, 2, 3, 4, 5) ]
+        decoded = decode_value(json.loads(json.dumps(encode_value(values))))
+        self.assertEqual(decoded, values)
+        regex = decode_value(encode_value(SigmaRegularExpressionModifier("a.*")))
+        self.assertIsInstance(regex, SigmaRegularExpressionModifier)
+        self.assertEqual(regex.value, "a.*")
+        with self.assertRaises(SigmaIRError):
+            encode_value(object())
+
+    def test_config_check(self):
+        data = dumps(self.parse(rules))
+        with self.assertRaises(SigmaIRError):
+            loads(data, SigmaConfigurationChain())
+        self.assertEqual(len(loads(data, SigmaConfigurationChain(), check_config=False)), 3)
+
+    def test_invalid(self):
+        for data in ("{", '{"format": 0, "config": null, "rules": []}', '{"format": 1}', b"SIGMAIR\x00", b"SIGMAIR\x01\x00"):
+            with self.assertRaises(SigmaIRError):
+                loads(data, self.config)
+
+    def test_rule_set(self):
+        # rules loaded from the representation of all rules are converted like the parsed rules
+        parsers = list()
+        loadable = list()
+        for path in sorted((tools.parent / "rules").rglob("*.yml")):
+            documents = list(yaml.safe_load_all(path.read_text(encoding="utf-8")))
+            for parser, loadable_parser in zip(SigmaCollectionParser(None, self.config, documents=copy.deepcopy(documents)).parsers, SigmaCollectionParser(None, self.config, documents=documents).parsers):
+                try:
+                    loadable_parser.condparsed
+                except Exception:       # rules with parse errors have no representation
+                    continue
+                parsers.append(parser)
+                loadable.append(loadable_parser)
+        loaded = loads(dumps(loadable, True), self.config)
+        self.assertGreater(len(loaded), 1000)
+        for backend_class in (ElasticsearchQuerystringBackend, SplunkBackend):
+            self.assertEqual(self.generate(backend_class, loaded), self.generate(backend_class, parsers))
+
+if __name__ == '__main__':
+    unittest.main()
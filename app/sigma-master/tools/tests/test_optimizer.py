@@ -0,0 +1,164 @@
+# Test condition optimizer
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+
+from sigma.parser.condition import ConditionAND, ConditionOR, ConditionNOT, NodeSubexpression, \
+    SigmaConditionOptimizer, structuralKey
+from sigma.configuration import SigmaConfiguration, SigmaConfigurationChain
+from sigma.config.exceptions import SigmaConfigParseError
+from sigma.backends.base import SingleTextQueryBackend
+
+def AND(*items):
+    node = ConditionAND()
+    for item in items:
+        node.add(item)
+    return node
+
+def OR(*items):
+    node = ConditionOR()
+    for item in items:
+        node.add(item)
+    return node
+
+def NOT(item):
+    return ConditionNOT(None, None, item)
+
+def SUB(item):
+    return NodeSubexpression(item)
+
+class TestConditionOptimizer(unittest.TestCase):
+
+    def optimize(self, tree):
+        return structuralKey(SigmaConditionOptimizer().optimizeTree(NodeSubexpression(tree)))
+
+    def assertOptimized(self, tree, expected):
+        """Compare with the literal expected tree, which is not optimized."""
+        self.assertEqual(self.optimize(tree), structuralKey(expected))
+
+    def test_single_item(self):
+        self.assertOptimized(AND(OR(("a", "1"))), ("a", "1"))
+        self.assertEqual(self.optimize(AND(OR(("a", "1")))), ("a", "1"))
+
+    def test_empty(self):
+        self.assertOptimized(AND(OR(), ("a", "1")), ("a", "1"))
+
+    def test_double_negation(self):
+        self.assertOptimized(NOT(NOT(("a", "1"))), ("a", "1"))
+
+    def test_flatten(self):
+        self.assertOptimized(
+            OR(("a", "1"), OR(("b", "2"), OR(("c", "3")))),
+            SUB(OR(("a", "1"), ("b", "2"), ("c", "3"))),
+            )
+
+    def test_dedup_values(self):
+        self.assertOptimized(
+            OR(("a", ["1", "2"]), ("a", ["1", "2"]), ("b", "2")),
+            SUB(OR(("a", ["1", "2"]), ("b", "2"))),
+            )
+
+    def test_dedup_subtrees(self):
+        self.assertOptimized(
+            AND(NOT(("a", "1")), NOT(("a", "1")), ("b", "2")),
+            SUB(AND(NOT(("a", "1")), ("b", "2"))),
+            )
+
+    def test_promote(self):
+        self.assertOptimized(
+            OR(AND(("a", "1"), ("b", "2")), AND(("a", "1"), ("c", "3"))),
+            SUB(AND(("a", "1"), SUB(OR(("b", "2"), ("c", "3"))))),
+            )
+
+    def test_keep_optimized_subtree(self):
+        tree = OR(("a", "1"), ("b", "2"))
+        optimizer = SigmaConditionOptimizer()
+        before = structuralKey(tree)
+        result = optimizer.optimizeTree(NodeSubexpression(tree))
+        self.assertIs(result.items, tree)
+        self.assertEqual(structuralKey(result.items), before)
+
+class TestOptionalPasses(unittest.TestCase):
+
+    def optimize(self, tree, passes=SigmaConditionOptimizer.optionalPasses):
+        return structuralKey(SigmaConditionOptimizer(passes).optimizeTree(NodeSubexpression(tree)))
+
+    def assertOptimized(self, tree, expected, passes=SigmaConditionOptimizer.optionalPasses):
+        """Compare with the literal expected tree, which is not optimized."""
+        self.assertEqual(self.optimize(tree, passes), structuralKey(expected))
+
+    def test_disabled(self):
+        tree = OR(("a", "1"), ("a", "2"))
+        self.assertEqual(self.optimize(tree, ()), structuralKey(NodeSubexpression(OR(("a", "1"), ("a", "2")))))
+
+    def test_group_values(self):
+        self.assertOptimized(
+            OR(("a", "1"), ("b", "2"), ("a", ["3", "1"]), NOT(("a", "4"))),
+            SUB(OR(("a", ["1", "3"]), ("b", "2"), NOT(("a", "4")))),
+            ("group_values",))
+
+    def test_group_values_and(self):
+        tree = AND(("a", "1"), ("a", "2"))
+        self.assertOptimized(tree, SUB(AND(("a", "1"), ("a", "2"))), ("group_values",))
+
+    def test_subsume_wildcards(self):
+        self.assertOptimized(
+            OR(("a", "*foo*bar*"), ("b", "*foo*bar*"), ("a", ["*foo*", "foo?"]), ("a", "*fo\\*o*")),
+            SUB(OR(("b", "*foo*bar*"), ("a", "*foo*"), ("a", "*fo\\*o*"))),
+            ("subsume_wildcards",))
+
+    def test_subsume_wildcards_and(self):
+        self.assertOptimized(
+            AND(("a", ["*\\cmd.exe", "*.exe"]), ("a", "*\\cmd.exe")),
+            SUB(AND(("a", "*.exe"), ("a", "*\\cmd.exe"))),
+            ("subsume_wildcards",))
+
+    def test_subsume_wildcards_not_covered(self):
+        tree = OR(("a", "*foo*"), ("a", "*f*o"), ("a", "?oo"), ("a", "*oo"))
+        self.assertOptimized(tree, SUB(OR(("a", "*foo*"), ("a", "*f*o"), ("a", "*oo"))), ("subsume_wildcards",))
+
+    def test_factor_common(self):
+        self.assertOptimized(
+            OR(AND(("a", "1"), ("b", "2")), ("c", "3"), AND(("a", "1"), ("d", "4"))),
+            SUB(OR(SUB(AND(("a", "1"), SUB(OR(("b", "2"), ("d", "4"))))), ("c", "3"))),
+            ("factor_common",))
+
+    def test_factor_common_absorb(self):
+        self.assertOptimized(
+            AND(OR(("a", "1"), ("b", "2")), ("c", "3"), OR(("a", "1"), ("d", "4"), ("e", "5"))),
+            SUB(AND(SUB(OR(("a", "1"), SUB(AND(("b", "2"), SUB(OR(("d", "4"), ("e", "5"))))))), ("c", "3"))),
+            ("factor_common",))
+
+    def test_parse_passes(self):
+        self.assertEqual(SigmaConditionOptimizer.parsePasses(None), set())
+        self.assertEqual(SigmaConditionOptimizer.parsePasses(True), set(SigmaConditionOptimizer.optionalPasses))
+        self.assertEqual(SigmaConditionOptimizer.parsePasses("all"), set(SigmaConditionOptimizer.optionalPasses))
+        self.assertEqual(SigmaConditionOptimizer.parsePasses("group_values, factor_common"), { "group_values", "factor_common" })
+        self.assertEqual(SigmaConditionOptimizer.parsePasses(["group_values"]), { "group_values" })
+        with self.assertRaises(ValueError):
+            SigmaConditionOptimizer.parsePasses("group_values,foo")
+
+    def test_configuration(self):
+        config = SigmaConfiguration("optimizations: [ group_values ]")
+        chain = SigmaConfigurationChain()
+        chain.append(config)
+        self.assertEqual(chain.get_optimizations(), { "group_values" })
+        chain.set_backend(SingleTextQueryBackend(chain, { "optimizations": "factor_common" }))
+        self.assertEqual(chain.get_optimizations(), { "group_values", "factor_common" })
+        with self.assertRaises(SigmaConfigParseError):
+            SigmaConfiguration("optimizations: foo")
+
+if __name__ == '__main__':
+    unittest.main()
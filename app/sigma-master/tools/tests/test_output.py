@@ -0,0 +1,99 @@
+# Test output of conversion results
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import io
+import json
+import pathlib
+import tempfile
+import unittest
+
+import ruamel.yaml
+
+from sigma.output import SigmaOutputWriter, SigmaOutputError, get_rule_metadata
+
+records = [
+        ({ "title": "First", "level": "high" }, [ "query 1" ], "first.yml"),
+        ({ "title": "Second ä", "tags": [ "attack.t1000" ] }, [ "query 2", "query 3" ], "second.yml"),
+        ]
+
+class TestOutputWriter(unittest.TestCase):
+
+    def write_records(self, output_format):
+        stream = io.StringIO()
+        stream.close = lambda: None
+        writer = SigmaOutputWriter(output_format=output_format, stream=stream)
+        for metadata, results, filename in records:
+            writer.write_record(metadata, results, filename)
+        writer.close()
+        return stream.getvalue()
+
+    def expected_records(self):
+        return [ dict(metadata, rule=results, filename=filename) for metadata, results, filename in records ]
+
+    def test_json(self):
+        self.assertEqual(self.write_records("json"), json.dumps(self.expected_records(), indent=4, ensure_ascii=False) + "\n")
+
+    def test_json_empty(self):
+        stream = io.StringIO()
+        stream.close = lambda: None
+        SigmaOutputWriter(output_format="json", stream=stream).close()
+        self.assertEqual(stream.getvalue(), "[]\n")
+
+    def test_ndjson(self):
+        self.assertEqual([ json.loads(line) for line in self.write_records("ndjson").splitlines() ], self.expected_records())
+
+    def test_yaml(self):
+        self.assertEqual(ruamel.yaml.YAML(typ="safe").load(self.write_records("yaml")), self.expected_records())
+
+    def test_text(self):
+        stream = io.StringIO()
+        writer = SigmaOutputWriter(separator="\0", stream=stream)
+        writer.write_results(pathlib.Path("rule.yml"), [ "query 1", "query 2" ])
+        writer.write_final("final")
+        self.assertEqual(stream.getvalue(), "query 1\0query 2\0final\n")
+
+    def test_file_prefix(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            writer = SigmaOutputWriter(tmpdir + "/", ".txt", target="test")
+            writer.write_results(pathlib.Path("single.yml"), [ "query 1" ])
+            writer.write_results(pathlib.Path("multi.yml"), [ "query 2", "query 3" ])
+            writer.write_results(pathlib.Path("none.yml"), [])      # further output goes into one file
+            writer.write_results(pathlib.Path("other.yml"), [ "query 4" ])
+            writer.write_final("final")
+            writer.close()
+            files = { path.name: path.read_text() for path in pathlib.Path(tmpdir).iterdir() }
+        self.assertEqual(files, {
+            "single.txt": "query 1\n",
+            "multi_0.txt": "query 2\n",
+            "multi_1.txt": "query 3\n",
+            "test_mono_output.txt": "query 4\nfinal\n",
+            })
+
+    def test_open_error(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with self.assertRaises(SigmaOutputError):
+                SigmaOutputWriter(tmpdir + "/missing/output.txt")
+
+class TestRuleMetadata(unittest.TestCase):
+
+    def test_merge(self):
+        rules = [
+                { "title": "Global", "id": "1", "level": "low", "detection": {} },
+                { "id": "2", "status": "test" },
+                ]
+        self.assertEqual(get_rule_metadata(rules, [ "title", "id", "status", "filename" ]), { "title": "Global", "id": "2", "status": "test" })
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+# Test parallel conversion of Sigma rules
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import pathlib
+import tempfile
+import unittest
+
+from sigma.backends.base import BackendOptions
+from sigma.backends.elasticsearch import ElasticsearchQuerystringBackend, XPackWatcherBackend
+from sigma.backends.splunk import SplunkBackend, SplunkXMLBackend
+from sigma.backends.uberagent import uberAgentBackend
+from sigma.config.collection import SigmaConfigurationManager
+from sigma.configuration import SigmaConfigurationChain
+from sigma.parallel import SigmaParallelConverter, convert_file, STREAM_CHUNKSIZE
+from sigma.parser.exceptions import SigmaParseError
+
+tools = pathlib.Path(__file__).parent.parent
+
+rule = """
+title: Rule %d
+id: 00000000-0000-0000-0000-00000000000%d
+logsource:
+    product: windows
+detection:
+    selection:
+        CommandLine: '*test%d*'
+    condition: selection
+"""
+
+class TestParallelConverter(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.paths = list()
+        for i in range(7):
+            path = pathlib.Path(self.tmpdir.name) / ("rule%d.yml" % i)
+            if i == 3:
+                path.write_text("title: Broken\ndetection:\n    condition: selection\n")
+            else:
+                path.write_text(rule % (i % 5, i % 5, i))
+            self.paths.append(path)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def convert(self, backend_class, jobs, paths=None, config=None):
+        paths = paths or self.paths
+        config = config or SigmaConfigurationChain()
+        backend = backend_class(config, BackendOptions(None, None))
+        if jobs > 1:
+            converter = SigmaParallelConverter(jobs, backend, config, BackendOptions(None, None), chunksize=2)
+            outcomes = list(converter.convert(paths))
+        else:
+            outcomes = list()
+            for path in paths:
+                try:
+                    outcomes.append((path, convert_file(path, config, None, backend), None))
+                except Exception as e:
+                    outcomes.append((path, None, e))
+        return [ (path, results, type(error)) for path, results, error in outcomes ], backend.finalize()
+
+    def test_order_and_errors(self):
+        outcomes, _ = self.convert(SplunkBackend, 3)
+        self.assertEqual(outcomes, self.convert(SplunkBackend, 1)[0])
+        self.assertEqual([ path for path, _, _ in outcomes ], self.paths)
+        self.assertEqual(outcomes[3][2], SigmaParseError)
+        self.assertEqual(outcomes[4][1], ['CommandLine="*test4*"'])
+
+    def test_generator_input(self):
+        consumed = list()
+        def paths():
+            for i in range(100):
+                consumed.append(i)
+                yield self.paths[i % len(self.paths)]
+
+        config = SigmaConfigurationChain()
+        converter = SigmaParallelConverter(2, SplunkBackend(config, BackendOptions(None, None)), config, BackendOptions(None, None))
+        outcomes = converter.convert(paths())
+        self.assertEqual(next(outcomes)[0], self.paths[0])
+        self.assertLessEqual(len(consumed), (2 * 2 + 1) * STREAM_CHUNKSIZE)
+        self.assertEqual(len(list(outcomes)), 99)
+
+    def test_merged_state(self):
+        self.assertEqual(self.convert(SplunkXMLBackend, 3), self.convert(SplunkXMLBackend, 1))
+
+    def test_summed_state(self):
+        config = SigmaConfigurationChain()
+        backend, worker = [ uberAgentBackend(config, BackendOptions(None, None)) for i in range(2) ]
+        backend.unsupportedCategories["webserver"] = 1
+        worker.unsupportedCategories.update(webserver=2, proxy=1)
+        self.assertTrue(backend.mergeState(worker.getState()))
+        self.assertEqual(backend.unsupportedCategories, { "webserver": 3, "proxy": 1 })
+        self.assertEqual(worker.unsupportedCategories, { "webserver": 2, "proxy": 1 })
+
+    def test_conflicting_rule_names(self):
+        # rules 0 and 5 have the same id and are converted in different chunks
+        outcomes, result = self.convert(XPackWatcherBackend, 3)
+        self.assertEqual(result, self.convert(XPackWatcherBackend, 1)[1])
+        self.assertIn("00000000-0000-0000-0000-000000000000-Rule-0-2", result)
+
+    def test_rule_set(self):
+        # keyword matching of es-qs depends on the field mappings of the converted rule, not of the previous one
+        scm = SigmaConfigurationManager([ str(tools / "config") ])
+        config = SigmaConfigurationChain([ scm.get("winlogbeat") ])
+        paths = sorted((tools.parent / "rules").rglob("*.yml"))
+        self.assertEqual(
+            self.convert(ElasticsearchQuerystringBackend, 3, paths, config),
+            self.convert(ElasticsearchQuerystringBackend, 1, paths, config),
+            )
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,3 +1,140 @@
 
 def test_collection():
     pass
+
+import io
+import unittest
+import yaml
+
+from sigma.filter import SigmaRuleFilter
+from sigma.parser.collection import SigmaCollectionParser, split_yaml_documents
+from sigma.parser.exceptions import SigmaParseError
+from sigma.configuration import SigmaConfiguration
+from sigma.backends.splunk import SplunkBackend
+
+rule = """title: Test
+status: stable
+logsource:
+    product: windows
+    service: security
+level: high
+tags:
+- attack.execution
+detection:
+    selection:
+        EventID: 4688
+    condition: selection
+"""
+
+class TestLazyParsing(unittest.TestCase):
+
+    def test_lazy_condition(self):
+        collection = SigmaCollectionParser(rule.replace("condition: selection", "condition: unknown"))
+        self.assertEqual(len(collection.parsers), 1)
+        self.assertEqual(collection.parsers[0].parsedyaml["title"], "Test")
+        with self.assertRaises(Exception):
+            collection.parsers[0].condparsed
+
+    def test_match_metadata(self):
+        self.assertTrue(SigmaRuleFilter("level>=high,logsource=windows,tag=attack.execution").match_metadata(rule))
+        self.assertFalse(SigmaRuleFilter("level=critical").match_metadata(rule))
+        self.assertFalse(SigmaRuleFilter("status=experimental").match_metadata(rule))
+        self.assertIsNone(SigmaRuleFilter("condition=selection").match_metadata(rule))
+        self.assertIsNone(SigmaRuleFilter("level=high").match_metadata("action: global\n" + rule))
+        self.assertIsNone(SigmaRuleFilter("level=high").match_metadata(rule + "---\n" + rule))
+
+    def test_filter_collection(self):
+        self.assertEqual(len(SigmaCollectionParser(rule, rulefilter=SigmaRuleFilter("level=high")).parsers), 1)
+        self.assertEqual(len(SigmaCollectionParser(rule, rulefilter=SigmaRuleFilter("level=low")).parsers), 0)
+        self.assertEqual(len(SigmaCollectionParser(rule + "---\n" + rule.replace("high", "low"), rulefilter=SigmaRuleFilter("level=low")).parsers), 1)
+
+collection = """action: global
+title: Test
+logsource:
+    product: windows
+detection:
+    condition: selection
+---
+detection:
+    selection:
+        EventID: 1
+---
+action: repeat
+detection:
+    selection:
+        EventID: [
+---
+action: repeat
+detection:
+    selection:
+        EventID: 3
+---
+action: reset
+---
+title: Other
+detection:
+    selection:
+        EventID: 4
+    condition: selection
+"""
+
+class TestStreamingParsing(unittest.TestCase):
+
+    def test_split_documents(self):
+        self.assertEqual(
+            list(split_yaml_documents("# comment\n---\na: 1\n---\nb: 2\n")),
+            [ (1, "# comment\n---\na: 1\n"), (4, "---\nb: 2\n") ])
+
+    def test_iter_parsers(self):
+        rules = list(SigmaCollectionParser(io.StringIO(collection), lazy=True).iter_parsers())
+        self.assertEqual([ meta["index"] for meta, parser in rules ], [ 1, 2, 3, 5 ])
+        self.assertEqual([ meta["line"] for meta, parser in rules ], [ 7, 11, 16, 23 ])
+        self.assertIsInstance(rules[1][0]["error"], yaml.YAMLError)
+        self.assertIsNone(rules[1][1])
+        self.assertEqual([ parser.parsedyaml["detection"]["selection"]["EventID"] for meta, parser in rules if parser ], [ 1, 3, 4 ])
+        self.assertEqual([ meta["title"] for meta, parser in rules ], [ "Test", None, "Test", "Other" ])
+
+    def test_iter_generate(self):
+        backend = SplunkBackend(SigmaConfiguration(), {})
+        results = list(SigmaCollectionParser(collection, lazy=True).iter_generate(backend))
+        self.assertEqual([ meta["index"] for meta, result in results ], [ 1, 2, 3, 5 ])
+        self.assertIsInstance(results[1][0]["error"], yaml.YAMLError)
+        self.assertEqual([ result is None for meta, result in results ], [ False, True, False, False ])
+        results = list(SigmaCollectionParser(collection.replace("condition: selection", "condition: unknown"), lazy=True).iter_generate(backend))
+        self.assertEqual(len(results), 4)
+        self.assertIsInstance(results[3][0]["error"], SigmaParseError)
+
+    def test_multiple_globals(self):
+        # global documents only apply to the following rules, also if conditions are parsed later
+        content = """action: global
+logsource:
+    product: windows
+detection:
+    filter:
+        A: 1
+    condition: selection and not filter
+---
+title: X
+detection:
+    selection:
+        X: 1
+---
+action: global
+detection:
+    filter:
+        B: 2
+---
+title: Y
+detection:
+    selection:
+        Y: 1
+"""
+        backend = SplunkBackend(SigmaConfiguration(), {})
+        for lazy in (False, True):
+            parsers = SigmaCollectionParser(content, lazy=lazy).parsers
+            self.assertEqual([ backend.generate(parser) for parser in parsers ], [ '(X="1" NOT (A="1"))', '(Y="1" NOT (A="1" B="2"))' ])
+
+    def test_lazy_parsers(self):
+        with self.assertRaises(yaml.YAMLError):
+            SigmaCollectionParser(collection, lazy=True).parsers
+        self.assertEqual(len(SigmaCollectionParser(collection.replace("[", "2"), lazy=True).parsers), 4)
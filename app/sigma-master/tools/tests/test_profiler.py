@@ -0,0 +1,110 @@
+# Test per-phase conversion profiler
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import json
+import os
+import pathlib
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import yaml
+
+from sigma.backends.base import BackendOptions
+from sigma.backends.splunk import SplunkBackend
+from sigma.configuration import SigmaConfigurationChain
+from sigma.parser.collection import SigmaCollectionParser
+from sigma.parser.rule import SigmaParser
+from sigma.profiler import SigmaProfiler, PHASES, percentile
+
+sigmac = str(pathlib.Path(__file__).parent.parent / "sigmac")
+
+rule = """
+title: Rule
+logsource:
+    product: test
+detection:
+    selection:
+        field: value
+    condition: selection
+"""
+
+class TestProfiler(unittest.TestCase):
+
+    def test_phases(self):
+        config = SigmaConfigurationChain()
+        backend = SplunkBackend(config, BackendOptions(None, None))
+        profiler = SigmaProfiler()
+        profiler.install(backend)
+        try:
+            profiler.start_rule("rule.yml")
+            profiler.set_target("splunk")
+            results = list(SigmaCollectionParser(rule, config).generate(backend))
+            profiler.stop_rule()
+        finally:
+            profiler.uninstall()
+        self.assertEqual(results, [ 'field="value"' ])
+        record = profiler.records[0]
+        for phase in ("yaml", "merge", "tokenize", "parse", "optimize", "fieldmapping", "generate"):
+            self.assertGreater(record["phases"][phase], 0, phase)
+        self.assertLessEqual(sum(record["phases"].values()), record["total"])
+        report = profiler.report(top=1)
+        self.assertEqual(report["rules"], 1)
+        self.assertEqual(set(report["phases"]), set(PHASES))
+        self.assertEqual(report["slowest"]["total"][0]["rule"], "rule.yml")
+        self.assertIn("splunk", report["targets"])
+
+    def test_uninstall(self):
+        originals = (yaml.safe_load_all, SigmaParser.__init__, SigmaCollectionParser._parse)
+        backend = SplunkBackend(SigmaConfigurationChain(), BackendOptions(None, None))
+        profiler = SigmaProfiler()
+        profiler.install(backend)
+        profiler.uninstall()
+        self.assertEqual((yaml.safe_load_all, SigmaParser.__init__, SigmaCollectionParser._parse), originals)
+        self.assertNotIn("generate", backend.__dict__)
+
+    def test_no_rule(self):
+        profiler = SigmaProfiler()
+        profiler.install()
+        try:
+            list(SigmaCollectionParser(rule).parsers)
+        finally:
+            profiler.uninstall()
+        self.assertEqual(profiler.records, [])
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([ 3 ], 95), 3)
+        self.assertEqual(percentile([], 95), 0.0)
+
+    def test_sigmac_profile(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmpdir = pathlib.Path(tmpdir)
+            for name in ("a.yml", "b.yml"):
+                (tmpdir / name).write_text(rule)
+            process = subprocess.run([ sys.executable, sigmac, "-t", "grep", "--profile", str(tmpdir / "profile.json"), "--profile-cprofile", str(tmpdir / "profile.pstats"), str(tmpdir / "a.yml"), str(tmpdir / "b.yml") ], stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, env=dict(os.environ, PYTHONPATH=os.path.dirname(sigmac)))
+            self.assertEqual(process.returncode, 0)
+            self.assertEqual(process.stdout.count("grep -P"), 2)
+            report = json.loads((tmpdir / "profile.json").read_text())
+            self.assertEqual(report["rules"], 2)
+            self.assertGreater(report["phases"]["read"]["total"], 0)
+            self.assertEqual(len(report["cprofile"]["rules"]), 2)
+            self.assertTrue((tmpdir / "profile.pstats").exists())
+
+if __name__ == '__main__':
+    unittest.main()
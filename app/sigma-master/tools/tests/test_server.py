@@ -0,0 +1,129 @@
+# Test conversion server
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import json
+import os
+import pathlib
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from sigma.backends.exceptions import NotSupportedError
+from sigma.config.collection import SigmaConfigurationManager
+from sigma.parser.exceptions import SigmaParseError
+from sigma.server import SigmaConversionServer, ERR_REQUEST, ERR_NO_TARGET, ERR_CONFIG_ORDER
+
+sigmac = str(pathlib.Path(__file__).parent.parent / "sigmac")
+configs = [ str(pathlib.Path(__file__).parent.parent / "config") ]
+
+rule = """
+title: Rule
+logsource:
+    product: test
+detection:
+    selection:
+        field: value
+    condition: selection
+"""
+
+def describe_error(e, sigmafile):
+    if isinstance(e, SigmaParseError):
+        return "parse error", "parse error", 4, False, True
+    elif isinstance(e, NotSupportedError):
+        return "not supported", "not supported", 9, True, True
+    return None
+
+class TestConversionServer(unittest.TestCase):
+
+    def setUp(self):
+        self.server = SigmaConversionServer(SigmaConfigurationManager(configs), describe_error, "splunk", [ "splunk-windows" ])
+
+    def request(self, **request):
+        return json.loads(self.server.handle(json.dumps(request)))
+
+    def test_convert(self):
+        response = self.request(id=1, rule=rule)
+        self.assertEqual(response, { "id": 1, "results": [ 'field="value"' ], "final": None, "code": 0, "error": None })
+        self.assertEqual(self.request(rule=rule, target="grep", config=[])["results"], [ "grep -P '^value'" ])
+        self.assertEqual(self.server.get_stats()["backends"], 2)
+
+    def test_warm_backend(self):
+        self.request(rule=rule)
+        self.request(rule=rule.replace("value", "other"))
+        self.assertEqual(len(self.server.backends), 1)
+        self.request(rule=rule, options={ "rulecomment": True })
+        self.assertEqual(len(self.server.backends), 2)
+
+    def test_state_reset(self):
+        first = self.request(rule=rule, target="splunkxml")
+        second = self.request(rule=rule.replace("value", "other"), target="splunkxml")
+        self.assertEqual(first["final"].count("<panel>"), 1)
+        self.assertEqual(second["final"].count("<panel>"), 1)
+        self.assertEqual(first["final"], second["final"].replace("other", "value"))
+
+        # uberAgent counts rules of unsupported categories and writes its rule files to the working directory
+        unsupported = rule.replace("product: test", "category: foo_unsupported\n    product: windows").replace("title: Rule", "title: Rule\nlevel: high\ndescription: Test")
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as tmpdir:
+            os.chdir(tmpdir)
+            try:
+                responses = [ self.request(rule=unsupported, target="uberagent", config=[]) for i in range(3) ]
+            finally:
+                os.chdir(cwd)
+        for response in responses:
+            self.assertEqual(response["code"], 0)
+            self.assertIn("Category foo_unsupported has 1 unsupported rules.", response["stdout"])
+
+    def test_rule_state_reset(self):
+        # es-qs quotes keywords depending on the field mapping of the previous rule if it isn't reset
+        keywords = "title: Keywords\nlogsource:\n    product: test\ndetection:\n    keywords:\n        - 'exited on signal 6 (core dumped)'\n    condition: keywords\n"
+        first = self.request(rule=keywords, target="es-qs", config=[ "winlogbeat" ])
+        self.assertEqual(self.request(rule=rule, target="es-qs", config=[ "winlogbeat" ])["results"], [ 'field:"value"' ])
+        self.assertEqual(self.request(rule=keywords, target="es-qs", config=[ "winlogbeat" ]), first)
+        self.assertEqual(first["code"], 0)
+
+    def test_errors(self):
+        self.assertEqual(self.request(id=1, rule="title: Rule\ndetection: {}\n")["code"], 4)
+        self.assertEqual(self.request(id=2, rule=rule, target="nope")["code"], ERR_REQUEST)
+        self.assertEqual(self.request(id=3)["code"], ERR_REQUEST)
+        self.assertEqual(self.request(id=4, rule=rule, target="mdatp", config=[ "splunk-windows" ])["code"], ERR_CONFIG_ORDER)
+        self.assertEqual(json.loads(self.server.handle("no json"))["code"], ERR_REQUEST)
+        self.assertEqual(self.server.get_stats()["errors"], 5)
+        self.assertEqual(self.request(id=6, rule=rule)["code"], 0)     # still serving
+
+    def test_no_target(self):
+        server = SigmaConversionServer(SigmaConfigurationManager(configs), describe_error)
+        self.assertEqual(json.loads(server.handle(json.dumps({ "rule": rule })))["code"], ERR_NO_TARGET)
+
+class TestSigmacServe(unittest.TestCase):
+
+    def test_serve_stdin(self):
+        requests = "".join(json.dumps(request) + "\n" for request in [
+            { "id": 1, "rule": rule },
+            { "id": 2, "rule": rule, "target": "splunkxml" },
+            { "id": 3, "rule": rule, "target": "splunkxml" },
+            { "id": 4, "rule": "title: Rule\ndetection: {}\n" },
+            ])
+        process = subprocess.run([ sys.executable, sigmac, "--serve", "-t", "splunk", "-c", "splunk-windows" ], input=requests, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, env=dict(os.environ, PYTHONPATH=os.path.dirname(sigmac)))
+        self.assertEqual(process.returncode, 0)
+        responses = [ json.loads(line) for line in process.stdout.splitlines() ]
+        self.assertEqual([ response["id"] for response in responses ], [ 1, 2, 3, 4 ])
+        self.assertEqual(responses[0]["results"], [ 'field="value"' ])
+        self.assertEqual(responses[1]["final"], responses[2]["final"])
+        self.assertEqual(responses[3]["code"], 4)       # ERR_SIGMA_PARSING of sigmac
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+# Test sigmac command line conversion
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import pathlib
+import subprocess
+import sys
+import tempfile
+import unittest
+
+sigmac = str(pathlib.Path(__file__).parent.parent / "sigmac")
+
+rule = """
+title: Rule
+logsource:
+    product: test
+detection:
+    selection:
+        field: value
+    condition: selection
+"""
+
+class TestMultipleTargets(unittest.TestCase):
+
+    def run_sigmac(self, *args):
+        process = subprocess.run([ sys.executable, sigmac ] + list(args), stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, env=dict(os.environ, PYTHONPATH=os.path.dirname(sigmac)))
+        return process.returncode, process.stderr
+
+    def test_target_configs(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmpdir = pathlib.Path(tmpdir)
+            rulefile = tmpdir / "rule.yml"
+            rulefile.write_text(rule)
+            code, stderr = self.run_sigmac("-t", "grep,graylog", "-c", "graylog:missing", "-o", str(tmpdir / "out.txt"), str(rulefile))
+            self.assertNotEqual(code, 0)
+            self.assertIn("missing", stderr)
+            self.assertFalse((tmpdir / "grep").exists())
+
+    def test_multiple_targets(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmpdir = pathlib.Path(tmpdir)
+            rulefile = tmpdir / "rule.yml"
+            rulefile.write_text(rule)
+            for target in ("grep", "graylog"):
+                code, _ = self.run_sigmac("-t", target, "-o", str(tmpdir / ("single-" + target)), str(rulefile))
+                self.assertEqual(code, 0)
+            code, stderr = self.run_sigmac("-t", "grep,graylog", "-o", str(tmpdir / "multi" / "out.txt"), str(rulefile))
+            self.assertEqual(code, 0)
+            self.assertIn("Conversion summary", stderr)
+            for target in ("grep", "graylog"):
+                self.assertEqual((tmpdir / "multi" / target / "out.txt").read_text(), (tmpdir / ("single-" + target)).read_text())
+
+    def test_result_cache(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmpdir = pathlib.Path(tmpdir)
+            rulefile = tmpdir / "rule.yml"
+            rulefile.write_text(rule)
+            outputs = list()
+            for i in range(2):
+                code, stderr = self.run_sigmac("-v", "-t", "grep", "--cache-dir", str(tmpdir / "cache"), "-o", str(tmpdir / ("out%d" % i)), str(rulefile))
+                self.assertEqual(code, 0)
+                outputs.append((tmpdir / ("out%d" % i)).read_text())
+            self.assertIn("Result cache of backend grep: 1 hits, 0 misses", stderr)
+            self.assertEqual(outputs[0], outputs[1])
+            code, stderr = self.run_sigmac("--cache-dir", str(tmpdir / "cache"), "--cache-gc", "0")
+            self.assertEqual(code, 0)
+            self.assertFalse((tmpdir / "cache" / "results").exists())
+
+    def test_multiple_targets_require_output(self):
+        code, _ = self.run_sigmac("-t", "grep", "-t", "graylog", "rule.yml")
+        self.assertNotEqual(code, 0)
+
+class TestInputs(unittest.TestCase):
+
+    def run_sigmac(self, *args):
+        process = subprocess.run([ sys.executable, sigmac, "-t", "grep" ] + list(args), stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, env=dict(os.environ, PYTHONPATH=os.path.dirname(sigmac)))
+        self.assertEqual(process.returncode, 0, process.stderr)
+        return process.stdout.splitlines()
+
+    def test_walk(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmpdir = pathlib.Path(tmpdir)
+            for name in ("b.yml", "a/c.yml", "a/skip/d.yml", ".hidden/e.yml", "f.txt", "a/.g.yml"):
+                path = tmpdir / name
+                path.parent.mkdir(parents=True, exist_ok=True)
+                path.write_text(rule.replace("value", pathlib.PurePath(name).stem))
+            self.assertEqual(self.run_sigmac("-r", "--sort", str(tmpdir)), [ "grep -P '^%s'" % name for name in ("c", "d", "b", "f") ])
+            self.assertEqual(self.run_sigmac("-r", "--sort", "--include", "*.yml", "--exclude", "skip", str(tmpdir)), [ "grep -P '^c'", "grep -P '^b'" ])
+            self.assertEqual(self.run_sigmac("-r", "--sort", "--exclude", "a/*", "--exclude", "*.txt", str(tmpdir)), [ "grep -P '^b'" ])
+            self.assertEqual(sorted(self.run_sigmac("-r", "-j", "2", "--include", "*.yml", str(tmpdir))), [ "grep -P '^%s'" % name for name in ("b", "c", "d") ])
+
+if __name__ == '__main__':
+    unittest.main()